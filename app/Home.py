@@ -1,17 +1,17 @@
 import streamlit as st
-import pandas as pd
 import hashlib
 import secrets
 import string
-import json
-import os
 from datetime import datetime
-# from data.data_manager import GoogleSheetsManager
-from data.test_data_manager import GoogleSheetsManager
+from data.import_profiler import track_imports, import_report, page_totals, ENABLED as IMPORT_PROFILE_ENABLED
+from data import rerun_profiler
+from data.rerun_profiler import begin_rerun, checkpoint, finish_rerun
+from data.shows import get_show, list_shows
+from data.user_store import get_user_store
+from api import api_enabled, start_api_server
 
-
-# For pie chart
-import plotly.express as px
+# pandas, plotly and the data layer are imported only once the user is logged in,
+# so the login form doesn't wait for them
 
 # Page configuration
 st.set_page_config(
@@ -21,11 +21,12 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# File path for storing users data
-USERS_FILE = ".streamlit/users.json"
-
-# Ensure the .streamlit directory exists
-os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
+# Optional JSON API for scanners and scripts, sharing this process's caches
+if api_enabled():
+    try:
+        start_api_server()
+    except OSError as e:
+        st.error(f"The JSON API could not start: {e}")
 
 # Password utilities
 def generate_password(length=10):
@@ -43,36 +44,21 @@ def verify_password(stored_hash, provided_password):
 
 # User data management functions
 def load_users():
-    """Load users from the users file"""
+    """Return the user store shared by all sessions, with a default admin account"""
     try:
-        if os.path.exists(USERS_FILE):
-            with open(USERS_FILE, 'r') as f:
-                return json.load(f)
-        else:
+        store = get_user_store()
+        if store.count() == 0:
             # Create default admin account
-            default_users = {
-                "admin@expocci.com": {
-                    "password_hash": hash_password("admin123"),
-                    "initials": "AD",
-                    "is_admin": True,
-                    "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                }
-            }
-            save_users(default_users)
-            return default_users
+            store.add("admin@expocci.com", {
+                "password_hash": hash_password("admin123"),
+                "initials": "AD",
+                "is_admin": True,
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+        return store
     except Exception as e:
         st.error(f"Error loading users: {e}")
-        return {}
-
-def save_users(users_data):
-    """Save users to the users file"""
-    try:
-        with open(USERS_FILE, 'w') as f:
-            json.dump(users_data, f)
-        return True
-    except Exception as e:
-        st.error(f"Error saving users: {e}")
-        return False
+        st.stop()
 
 # Initialize session states
 if "authenticated" not in st.session_state:
@@ -84,8 +70,7 @@ if "current_user" not in st.session_state:
 if "current_show" not in st.session_state:
     st.session_state.current_show = None
 
-if "users" not in st.session_state:
-    st.session_state.users = load_users()
+users = load_users()
 
 # Login function
 # def login():
@@ -107,13 +92,17 @@ if "users" not in st.session_state:
 # Modification 1: Update the login function to set the current_show automatically
 def login():
     if email_input.endswith("@expocci.com"):
-        if email_input in st.session_state.users:
+        user = users.get(email_input)
+        if user:
             # User exists, verify password
-            if verify_password(st.session_state.users[email_input]["password_hash"], password_input):
+            if verify_password(user["password_hash"], password_input):
                 st.session_state.authenticated = True
-                st.session_state.current_user = st.session_state.users[email_input]["initials"]
+                st.session_state.current_user = user["initials"]
                 # Automatically set the current show to the first option
-                show_options = ["Miami Boat Show 2025", "New York Auto Show 2025", "Paris Expo 2025"]
+                show_options = list_shows()
+                with track_imports("Home: data layer"):
+                    from data.show_data import select_show
+                select_show(show_options[0])
                 st.session_state.current_show = show_options[0]
                 st.rerun()
             else:
@@ -130,7 +119,7 @@ def register_user():
         st.error("Please use a valid company email address (@expocci.com)")
         return
     
-    if register_email in st.session_state.users:
+    if users.get(register_email):
         st.error("This email is already registered")
         return
     
@@ -159,15 +148,14 @@ def register_user():
         initials = register_email[:2].upper()
     
     # Store the new user
-    st.session_state.users[register_email] = {
+    if not users.add(register_email, {
         "password_hash": hash_password(register_password),
         "initials": initials,
         "is_admin": False,
         "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
-    # Save the updated users data
-    save_users(st.session_state.users)
+    }):
+        st.error("This email is already registered")
+        return
     
     st.success("Registration successful! You can now log in.")
 
@@ -177,7 +165,7 @@ def create_user():
         st.error("Please use a valid company email address (@expocci.com)")
         return
     
-    if admin_create_email in st.session_state.users:
+    if users.get(admin_create_email):
         st.error("This email is already registered")
         return
     
@@ -201,15 +189,14 @@ def create_user():
         initials = admin_create_email[:2].upper()
     
     # Store the new user
-    st.session_state.users[admin_create_email] = {
+    if not users.add(admin_create_email, {
         "password_hash": hash_password(temp_password),
         "initials": initials,
         "is_admin": make_admin,
         "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
-    # Save the updated users data
-    save_users(st.session_state.users)
+    }):
+        st.error("This email is already registered")
+        return
     
     st.success(f"""
     User created successfully!
@@ -222,24 +209,16 @@ def create_user():
 
 # Admin function to delete user
 def delete_user(email):
-    if email in st.session_state.users:
+    if users.get(email):
         # Don't allow deleting yourself
-        current_email = None
-        for e, user_data in st.session_state.users.items():
-            if user_data.get("initials") == st.session_state.current_user:
-                current_email = e
-                break
+        current_email = users.find_email_by_initials(st.session_state.current_user)
         
         if email == current_email:
             st.error("You cannot delete your own account")
             return False
         
         # Remove the user
-        del st.session_state.users[email]
-        
-        # Save the updated users data
-        save_users(st.session_state.users)
-        return True
+        return users.delete(email)
     
     return False
 
@@ -249,7 +228,7 @@ def reset_password():
         st.error("Please use a valid company email address (@expocci.com)")
         return
     
-    if reset_email not in st.session_state.users:
+    if not users.get(reset_email):
         st.error("Email not found. Please register first.")
         return
     
@@ -257,11 +236,7 @@ def reset_password():
     new_password = generate_password()
     
     # Update user's password
-    st.session_state.users[reset_email]["password_hash"] = hash_password(new_password)
-    st.session_state.users[reset_email]["last_reset"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Save the updated users data
-    save_users(st.session_state.users)
+    users.set_password(reset_email, hash_password(new_password), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     
     st.success(f"""
     Password reset successful!
@@ -274,17 +249,14 @@ def reset_password():
 # Change password function
 def change_password():
     # Find current user's email
-    current_email = None
-    for email, user_data in st.session_state.users.items():
-        if user_data.get("initials") == st.session_state.current_user:
-            current_email = email
-            break
+    current_email = users.find_email_by_initials(st.session_state.current_user)
+    user = users.get(current_email) if current_email else None
     
-    if not current_email:
+    if not user:
         st.error("User not found")
         return
     
-    if not verify_password(st.session_state.users[current_email]["password_hash"], current_password):
+    if not verify_password(user["password_hash"], current_password):
         st.error("Current password is incorrect")
         return
     
@@ -297,11 +269,7 @@ def change_password():
         return
     
     # Update the password
-    st.session_state.users[current_email]["password_hash"] = hash_password(new_password)
-    st.session_state.users[current_email]["last_reset"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Save the updated users data
-    save_users(st.session_state.users)
+    users.set_password(current_email, hash_password(new_password), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     
     st.success("Password changed successfully!")
 
@@ -316,12 +284,12 @@ def logout():
 
 # Function to change show
 def change_show():
+    # Start loading the new show's data in the background before switching
+    from data.show_data import select_show
+    select_show(selected_show)
     st.session_state.current_show = selected_show
     st.rerun()
 
-# Initialize data manager
-gs_manager = GoogleSheetsManager()
-
 # Login page if not authenticated
 if not st.session_state.authenticated:
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -369,15 +337,32 @@ if not st.session_state.authenticated:
         
         st.caption("Contact your administrator if you need assistance")
 else:
+    # Timing spans for this rerun (no-op unless profiling is enabled)
+    begin_rerun("Home")
+    checkpoint("imports")
+
+    # Heavy modules, only needed by the dashboard
+    with track_imports("Home: data layer"):
+        import pandas as pd
+        # from data.data_manager import GoogleSheetsManager
+        from data.test_data_manager import GoogleSheetsManager
+        from data.order_aggregates import get_order_aggregates
+        from data.order_time_index import get_order_time_index
+        from data.inventory_engine import get_inventory_engine
+        from data.booth_fulfillment import get_booth_fulfillment
+        from data.delivery_analytics import get_delivery_analytics
+        from data.show_data import load_dashboard_data, load_checklist_data, invalidate_show_data, data_as_of
+        from data.memory_report import record_session, session_report, memory_summary
+
+    # Initialize data manager
+    gs_manager = GoogleSheetsManager()
+
     # Check if current user is an admin
-    current_email = None
-    for email, user_data in st.session_state.users.items():
-        if user_data.get("initials") == st.session_state.current_user:
-            current_email = email
-            break
+    current_email = users.find_email_by_initials(st.session_state.current_user)
+    current_user_data = users.get(current_email) if current_email else None
     
     is_admin = False
-    if current_email and st.session_state.users[current_email].get("is_admin", False):
+    if current_user_data and current_user_data.get("is_admin", False):
         is_admin = True
 
     
@@ -388,24 +373,24 @@ else:
     #     # Show selector
     #     st.divider()
     #     st.subheader("Active Show")
+    checkpoint("sidebar")
+
     with st.sidebar:
         st.write(f"**User:** {st.session_state.current_user}")
         
-        # Show information (display only, not a selector)
-        # st.divider()
-        # st.subheader("Active Show")
-        # st.info(f"{st.session_state.current_show}")
-        
-        # # In a real application, you would load the list of shows from Google Sheets
-        # show_options = ["Miami Boat Show 2025", "New York Auto Show 2025", "Paris Expo 2025"]
-        # selected_show = st.selectbox(
-        #     "Select a show",
-        #     show_options,
-        #     index=0 if st.session_state.current_show is None else show_options.index(st.session_state.current_show)
-        # )
-        
-        # if st.button("Change show", use_container_width=True):
-        #     change_show()
+        # Show selector (only when several shows are configured)
+        show_options = list_shows()
+        if len(show_options) > 1:
+            st.divider()
+            st.subheader("Active Show")
+            selected_show = st.selectbox(
+                "Select a show",
+                show_options,
+                index=show_options.index(st.session_state.current_show) if st.session_state.current_show in show_options else 0
+            )
+            
+            if selected_show != st.session_state.current_show:
+                change_show()
         
         # Account settings
         st.divider()
@@ -427,7 +412,9 @@ else:
             st.divider()
             st.subheader("Admin Panel")
             
-            admin_tab1, admin_tab2 = st.tabs(["Create User", "User Management"])
+            admin_tab1, admin_tab2, admin_tab3, admin_tab4, admin_tab5 = st.tabs(
+                ["Create User", "User Management", "Import Times", "Rerun Profile", "Memory"]
+            )
             
             with admin_tab1:
                 st.write("Create a new user account")
@@ -443,7 +430,7 @@ else:
             with admin_tab2:
                 st.write("Registered Users")
                 users_list = []
-                for email, data in st.session_state.users.items():
+                for email, data in users.all().items():
                     users_list.append({
                         "Email": email,
                         "Initials": data.get("initials", ""),
@@ -473,6 +460,58 @@ else:
                         if delete_user(email_to_delete):
                             st.success(f"User {email_to_delete} deleted successfully")
                             st.rerun()
+            
+            with admin_tab3:
+                if IMPORT_PROFILE_ENABLED:
+                    st.write("Import time per page (this process)")
+                    st.dataframe(
+                        [{"Page": page, "Total (ms)": total} for page, total in page_totals().items()],
+                        hide_index=True,
+                        use_container_width=True
+                    )
+                    st.write("Slowest imports")
+                    st.dataframe(import_report(top=10), hide_index=True, use_container_width=True)
+                else:
+                    st.info("Set ORDERS_APP_IMPORT_PROFILE=1 to record import times.")
+
+            with admin_tab4:
+                profiling = st.toggle("Time page reruns", value=rerun_profiler.is_enabled(), key="rerun_profiling")
+                sampling = st.toggle(
+                    f"Sample 1 rerun in {rerun_profiler.SAMPLE_EVERY} with cProfile",
+                    value=rerun_profiler.cprofile_enabled(),
+                    key="rerun_cprofile",
+                    disabled=not profiling,
+                )
+                if (profiling, sampling) != (rerun_profiler.is_enabled(), rerun_profiler.cprofile_enabled()):
+                    rerun_profiler.set_enabled(profiling, cprofile=sampling)
+
+                rerun_summary = rerun_profiler.summary()
+                if rerun_summary:
+                    st.write(f"Last {rerun_profiler.HISTORY_SIZE} reruns (this process)")
+                    st.dataframe(rerun_summary, hide_index=True, use_container_width=True)
+                    st.caption(f"Reports and flamegraph input (spans.folded) are written to {rerun_profiler.PROFILE_DIR}")
+                else:
+                    st.info("No reruns recorded yet. Turn on 'Time page reruns' or set ORDERS_APP_PROFILE=1.")
+
+            with admin_tab5:
+                memory = memory_summary()
+                shared_bytes = sum(memory["shared_cache"].values())
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Process memory", f"{memory['rss'] / 1024 ** 2:.0f} MB" if memory["rss"] else "n/a")
+                col2.metric("Shared show cache", f"{shared_bytes / 1024 ** 2:.1f} MB")
+                col3.metric("Per session", f"{memory['per_session'] / 1024:.0f} KB",
+                            help=f"Average session state over {memory['sessions']} open sessions")
+                st.caption("Container size for N sessions ≈ process memory + N × per-session average. "
+                           "Order views only keep row positions into the shared cache.")
+                if memory["shared_cache"]:
+                    st.dataframe(
+                        [{"Show": name, "Cached data (MB)": round(size / 1024 ** 2, 2)}
+                         for name, size in memory["shared_cache"].items()],
+                        hide_index=True,
+                        use_container_width=True
+                    )
+                st.write("Open sessions (this process)")
+                st.dataframe(session_report(), hide_index=True, use_container_width=True)
         
         st.divider()
         if st.button("Logout", use_container_width=True):
@@ -526,56 +565,33 @@ else:
 
     # st.title(f"🎪 {st.session_state.current_show}")
     st.title(f"🎪 General Dashboard")
-    st.caption(f"")
+    st.caption(f"{st.session_state.current_show}")
         
-    # Loading data
-    @st.cache_data(ttl=60)  # Cache for 1 minute
-    def load_dashboard_data():
-        try:
-            # Load order data
-            orders_df = gs_manager.get_data("1dYeok-Dy_7a03AhPDLV2NNmGbRNoCD3q0zaAHPwxxCE", "Orders")
-            
-            # Redefine column names from the first row
-            if not orders_df.empty:
-                orders_df.columns = orders_df.iloc[0].str.strip()  # Strip whitespace from column names
-                orders_df = orders_df[1:]  # remove the now unnecessary row 0
-                orders_df = orders_df.reset_index(drop=True)  # reindex properly
-            
-            # Load checklist data
-            checklist_df = gs_manager.get_data("19ksIroX0i3WY3XmSGXQpdS1RzjpYKhqMhwK1tYiKZZA", "Orders")
+    checkpoint("load")
 
-            if not checklist_df.empty:
-                checklist_df.columns = checklist_df.iloc[0].str.strip()  # Strip whitespace from column names
-                checklist_df = checklist_df[1:]  # remove the now unnecessary row 0
-                checklist_df = checklist_df.reset_index(drop=True)  # reindex properly
-            
-            # Load inventory
-            inventory_df = gs_manager.get_data("1dYeok-Dy_7a03AhPDLV2NNmGbRNoCD3q0zaAHPwxxCE", "Show Inventory")
-            
-            # Redefine column names for inventory
-            if not inventory_df.empty:
-                inventory_df.columns = inventory_df.iloc[0].str.strip()  # Strip whitespace from column names
-                inventory_df = inventory_df[1:]  # remove the now unnecessary row 0
-                inventory_df = inventory_df.reset_index(drop=True)  # reindex properly
-            
-            return orders_df, checklist_df, inventory_df
-        except Exception as e:
-            st.error(f"Error loading data: {e}")
-            return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-    
-    # Load data
-    orders_df, checklist_df, inventory_df = load_dashboard_data()
+    # Load data (cached per show, shared by all sessions)
+    show = st.session_state.current_show
+    if get_show(show) is None:
+        st.warning(f"No spreadsheets are configured for {show}.")
+        st.stop()
+    orders_df, checklist_df, inventory_df = load_dashboard_data(show)
+
+    as_of = data_as_of(show, "dashboard")
+    if as_of:
+        st.caption(f"Data as of {as_of.strftime('%I:%M:%S %p')}")
     
+    checkpoint("metrics")
+
     # Calculate metrics
     if not orders_df.empty:
+        # Shared counters, rebuilt only when the loaded data version changes
+        aggregates = get_order_aggregates(show).sync(orders_df)
+
         # Order metrics
-        total_orders = len(orders_df)
+        total_orders = aggregates.total
         # Check if "Status" column exists before filtering
         if "Status" in orders_df.columns:
-            delivered_orders = len(orders_df[orders_df["Status"] == "Delivered"])
-            cancelled_orders = len(orders_df[orders_df["Status"] == "cancelled"])
-            pending_orders = total_orders - delivered_orders - cancelled_orders
-            delivery_rate = int(delivered_orders / total_orders * 100) if total_orders > 0 else 0
+            delivered_orders, cancelled_orders, pending_orders, delivery_rate = aggregates.status_metrics()
         else:
             delivered_orders = 0
             cancelled_orders = 0
@@ -604,46 +620,53 @@ else:
         # Progress bar
         st.progress(delivery_rate / 100)
 
+        checkpoint("charts")
+
         # ----------- PIE CHART OF ORDER STATUS -----------
         if "Status" in orders_df.columns:
-            # Clean NaN values
-            status_counts = orders_df["Status"].fillna("Unknown").value_counts()
-            status_labels = status_counts.index.tolist()
-            status_values = status_counts.values.tolist()
-            # Calculate percentages
-            status_percentages = [v / sum(status_values) * 100 for v in status_values]
-            # Compose labels with both status and count
-            status_labels_with_counts = [
-                f"{label} ({count})" for label, count in zip(status_labels, status_values)
-            ]
-
-            # Define color mapping for statuses
-            status_color_map = {
-                "In Process": "#FFD600",  # yellow
-                "In route from warehouse": "#FF9800",  # orange
-                "Delivered": "#4CAF50",  # green
-                "Cancelled": "#F44336",  # red
-                "Received": "#2196F3",  # blue
-            }
-            # Assign colors to each status in the order of status_labels
-            # If a status is not in the map, assign a default color (gray)
-            default_color = "#BDBDBD"
-            # Extract the status (without count) for color mapping
-            status_labels_raw = status_labels  # these are the raw status names
-            color_list = [status_color_map.get(status, default_color) for status in status_labels_raw]
-
-            # Create the pie chart with Plotly
-            fig = px.pie(
-                names=status_labels_with_counts,
-                values=status_values,
-                title="Order Status Distribution",
-                hole=0.3,
-                color_discrete_sequence=color_list
-            )
-            fig.update_traces(
-                textinfo='percent+label',
-                hovertemplate='%{label}: %{value} (%{percent})<extra></extra>'
-            )
+            # For pie chart
+            with track_imports("Home: charts"):
+                import plotly.express as px
+
+            def build_status_pie(aggregates):
+                # Clean NaN values
+                status_counts = aggregates.value_counts("Status", fill_na="Unknown")
+                status_labels = [label for label, _ in status_counts]
+                status_values = [count for _, count in status_counts]
+                # Compose labels with both status and count
+                status_labels_with_counts = [
+                    f"{label} ({count})" for label, count in zip(status_labels, status_values)
+                ]
+
+                # Define color mapping for statuses
+                status_color_map = {
+                    "In Process": "#FFD600",  # yellow
+                    "In route from warehouse": "#FF9800",  # orange
+                    "Delivered": "#4CAF50",  # green
+                    "Cancelled": "#F44336",  # red
+                    "Received": "#2196F3",  # blue
+                }
+                # Assign colors to each status in the order of status_labels
+                # If a status is not in the map, assign a default color (gray)
+                default_color = "#BDBDBD"
+                color_list = [status_color_map.get(status, default_color) for status in status_labels]
+
+                # Create the pie chart with Plotly
+                fig = px.pie(
+                    names=status_labels_with_counts,
+                    values=status_values,
+                    title="Order Status Distribution",
+                    hole=0.3,
+                    color_discrete_sequence=color_list
+                )
+                fig.update_traces(
+                    textinfo='percent+label',
+                    hovertemplate='%{label}: %{value} (%{percent})<extra></extra>'
+                )
+                return fig
+
+            # The figure is only rebuilt when the aggregates change
+            fig = aggregates.memoize("status_pie", build_status_pie)
             st.subheader("Order Statuses")
             st.plotly_chart(fig, use_container_width=True)
         # ----------------------------------------------------------
@@ -651,47 +674,30 @@ else:
     # Button to refresh data
     if st.button("Refresh data"):
         st.cache_data.clear()
+        invalidate_show_data(show)
         st.rerun()
     
     # Dashboard sections
-    # tab1, tab2, tab3 = st.tabs(["Latest Orders", "Inventory", "Checklist Progress"])
-    tab1, tab2 = st.tabs(["Latest Orders", "Inventory"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Latest Orders", "Inventory", "Checklist Progress", "Delivery Analytics"])
     
     with tab1:
+        checkpoint("latest")
+
         if not orders_df.empty:
-            # Check if Date and Hour columns exist before sorting
-            if "Date" in orders_df.columns and "Hour" in orders_df.columns:
-                # Convert Date and Hour to datetime for proper sorting
-                try:
-                    # Create a temporary column for sorting
-                    orders_df['datetime_sort'] = pd.to_datetime(
-                        orders_df['Date'] + ' ' + orders_df['Hour'], 
-                        errors='coerce',
-                        format='%m/%d/%Y %I:%M:%S %p'
-                    )
-                    
-                    # Sort by the datetime column
-                    last_orders = orders_df.sort_values(by='datetime_sort', ascending=False).head(10)
-                    
-                    # Drop the temporary column
-                    last_orders = last_orders.drop(columns=['datetime_sort'])
-                except Exception as e:
-                    st.warning(f"Error converting dates for sorting: {e}")
-                    # Fallback to original sorting method
-                    last_orders = orders_df.sort_values(by=["Date", "Hour"], ascending=False).head(10)
-            else:
-                sort_columns = []
-                if "Date" in orders_df.columns:
-                    sort_columns.append("Date")
-                if "Hour" in orders_df.columns:
-                    sort_columns.append("Hour")
-                
-                # Filter and display the 10 latest orders
-                if sort_columns:
-                    last_orders = orders_df.sort_values(by=sort_columns, ascending=False).head(10)
-                else:
-                    last_orders = orders_df.head(10)
-                    st.warning("Date/Hour columns not found. Orders may not be sorted correctly.")
+            # Shared timestamp index, rebuilt only when the loaded data version changes
+            time_index = get_order_time_index(show).sync(orders_df)
+
+            if "Date" not in orders_df.columns or "Hour" not in orders_df.columns:
+                st.warning("Date/Hour columns not found. Orders may not be sorted correctly.")
+
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                latest_count = st.selectbox("Orders to show", [10, 50], key="latest_orders_count")
+            with col2:
+                st.metric("Orders in the last 15 minutes", time_index.count_since(15))
+
+            # Latest orders straight from the index, no full sort
+            last_orders = time_index.latest(latest_count)
             
             # Columns to display - check if they exist
             available_columns = orders_df.columns.tolist()
@@ -709,7 +715,13 @@ else:
             st.info("No order data available.")
     
     with tab2:
+        checkpoint("inventory")
+
         if not inventory_df.empty:
+            # Ordered and available quantities computed locally (no wait for the sheet formulas)
+            inventory_engine = get_inventory_engine(show).sync(orders_df, inventory_df)
+            inventory_df = inventory_engine.apply_to(inventory_df)
+
             # Filter to display only relevant columns that exist
             inventory_columns = [col for col in ["Items", "Load List", "Pull List", 
                                  "Starting Quantity", "Ordered items", "Damaged Items", 
@@ -724,8 +736,8 @@ else:
                 if "Available Quantity" in inventory_df.columns:
                     try:
                         # Convert to numeric if possible
-                        inventory_df["Available Quantity"] = pd.to_numeric(inventory_df["Available Quantity"], errors="coerce")
-                        low_inventory = inventory_df[inventory_df["Available Quantity"] < 10]
+                        available_quantity = pd.to_numeric(inventory_df["Available Quantity"], errors="coerce")
+                        low_inventory = inventory_df[available_quantity < 10]
                         
                         if not low_inventory.empty:
                             st.subheader("⚠️ Low quantity items")
@@ -741,73 +753,109 @@ else:
         else:
             st.info("No inventory data available.")
     
-    # with tab3:
-    #     # Check if checklist_df is empty or not
-    #     if not checklist_df.empty:
-    #         # Check if Status column exists
-    #         if "Status" in checklist_df.columns:
-    #             # Calculate checklist progress
-    #             total_items = len(checklist_df)
-    #             completed_items = len(checklist_df[checklist_df["Status"] == True])
-    #             completion_percentage = int((completed_items / total_items * 100) if total_items > 0 else 0)
-                
-    #             col1, col2, col3 = st.columns(3)
-                
-    #             with col1:
-    #                 st.metric("Total items", total_items)
-                
-    #             with col2:
-    #                 st.metric("Checked items", completed_items)
-                
-    #             with col3:
-    #                 st.metric("Progress", f"{completion_percentage}%")
-                
-    #             # Progress bar
-    #             st.progress(completion_percentage / 100)
-    #         else:
-    #             st.warning("Status column not found in checklist data.")
-            
-    #         # Display by section
-    #         try:
-    #             # Get list of sections
-    #             sections = gs_manager.get_worksheets("19ksIroX0i3WY3XmSGXQpdS1RzjpYKhqMhwK1tYiKZZA")
-    #             sections = [s for s in sections if s.startswith("Section") or s == "No Section"]
-                
-    #             # Progress data by section
-    #             section_progress = []
-                
-    #             for section in sections:
-    #                 section_df = gs_manager.get_data("19ksIroX0i3WY3XmSGXQpdS1RzjpYKhqMhwK1tYiKZZA", section)
-    #                 if not section_df.empty:
-    #                     total = len(section_df)
-    #                     # Check if Status column exists
-    #                     if "Status" in section_df.columns:
-    #                         completed = len(section_df[section_df["Status"] == True])
-    #                     else:
-    #                         completed = 0
-    #                     progress = int((completed / total * 100) if total > 0 else 0)
-                        
-    #                     section_progress.append({
-    #                         "Section": section,
-    #                         "Total": total,
-    #                         "Completed": completed,
-    #                         "Progress": progress
-    #                     })
-                
-    #             # Create DataFrame for display
-    #             progress_df = pd.DataFrame(section_progress)
-                
-    #             # Display DataFrame
-    #             st.subheader("Progress by section")
-    #             st.dataframe(
-    #                 progress_df,
-    #                 use_container_width=True,
-    #                 hide_index=True
-    #             )
-    #         except Exception as e:
-    #             st.error(f"Error loading section data: {e}")
-    #     else:
-    #         st.info("No checklist data available.")
+    with tab3:
+        checkpoint("checklist")
+
+        # All sections come from one batch read, cached per show and shared by all sessions
+        checklist_sections_df, progress_df = load_checklist_data(show)
+
+        if not checklist_sections_df.empty:
+            if "Status" in checklist_sections_df.columns:
+                # Calculate checklist progress
+                total_items = int(progress_df["Total"].sum())
+                completed_items = int(progress_df["Completed"].sum())
+                completion_percentage = int((completed_items / total_items * 100) if total_items > 0 else 0)
+
+                col1, col2, col3 = st.columns(3)
+
+                with col1:
+                    st.metric("Total items", total_items)
+
+                with col2:
+                    st.metric("Checked items", completed_items)
+
+                with col3:
+                    st.metric("Progress", f"{completion_percentage}%")
+
+                # Progress bar
+                st.progress(completion_percentage / 100)
+            else:
+                st.warning("Status column not found in checklist data.")
+
+            # Display by section
+            st.subheader("Progress by section")
+            st.dataframe(
+                progress_df,
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.info("No checklist data available.")
+
+        # Checklist items joined to the orders on booth and item, kept up to date by the Orders page
+        st.subheader("Fulfillment by booth")
+        if not checklist_df.empty and not orders_df.empty:
+            fulfillment = get_booth_fulfillment(show).sync(checklist_df, orders_df)
+            booth_progress = fulfillment.by_booth()
+            if booth_progress.empty:
+                st.info("No checklist items could be matched to booths.")
+            else:
+                st.dataframe(fulfillment.by_section(), use_container_width=True, hide_index=True)
+                behind_only = st.checkbox("Only booths behind (< 100%)", value=True)
+                if behind_only:
+                    booth_progress = booth_progress[booth_progress["Progress"] < 100]
+                st.dataframe(
+                    booth_progress,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={"Progress": st.column_config.ProgressColumn(
+                        "Progress", format="%d%%", min_value=0, max_value=100)},
+                )
+        else:
+            st.info("Checklist or order data not available.")
+
+    with tab4:
+        checkpoint("analytics")
+
+        if not orders_df.empty:
+            # Shared series, updated from the new log events and recomputed only when something changed
+            analytics = get_delivery_analytics(show).sync(orders_df)
+            days = analytics.days()
+
+            if not days:
+                st.info("No order times available yet.")
+            else:
+                day = st.selectbox("Day", days, format_func=lambda d: d.strftime("%a %m/%d/%Y"),
+                                   key="analytics_day")
+                series = analytics.time_series(day)
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Waiting for delivery", analytics.current_queue())
+                with col2:
+                    st.metric("Orders per hour (latest)",
+                              int(series["Orders per hour"].iloc[-1]) if not series.empty else 0)
+                with col3:
+                    median_lead = analytics.median_lead_time()
+                    st.metric("Median order to delivery", f"{median_lead:g} min" if median_lead is not None else "n/a")
+
+                st.write("**Orders and deliveries per hour**")
+                st.line_chart(series[["Orders per hour", "Deliveries per hour"]])
+
+                st.write("**Queue depth**")
+                st.area_chart(series["Queue depth"])
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.write("**Order to delivery by section**")
+                    st.dataframe(analytics.lead_times("Section"), use_container_width=True, hide_index=True)
+                with col2:
+                    st.write("**Slowest items**")
+                    st.dataframe(analytics.lead_times("Item", top=10), use_container_width=True, hide_index=True)
+                st.caption("Order to delivery times only include orders whose placement time is known: "
+                           "recorded in the event log, or an order row not changed since it was added.")
+        else:
+            st.info("No order data available.")
             
     # Links to other pages
     st.divider()
@@ -824,3 +872,6 @@ else:
     # with col2:
     #     st.page_link("pages/2_Checklists.py", label="✅ Booth Checklist", icon="🔗")
     #     st.caption("Check booths progress status")
+
+    record_session("Home")
+    finish_rerun()
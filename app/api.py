@@ -0,0 +1,340 @@
+"""
+JSON HTTP API over the order data layer, for scanners and scripts.
+
+Runs on asyncio (standard library only). It uses the same data layer as the UI:
+reads come from the per-show cache, writes go through data.order_service, which
+updates the shared counters and stock.
+
+Started inside the Streamlit process when ORDERS_APP_API=1 (or `[api] enabled = true`
+in the secrets), so it shares the caches with the pages. It can also run on its
+own for scripts and tests:
+
+    ORDERS_APP_SHEETS=local python api.py --port 8502
+
+Routes (show names are URL-encoded):
+
+    GET    /health
+    GET    /shows
+    GET    /shows/{show}/orders?booth=&item=&color=&status=&section=&q=&limit=&offset=
+    GET    /shows/{show}/orders/{booth}
+    POST   /shows/{show}/orders            (JSON order; optional Idempotency-Key header)
+    POST   /shows/{show}/orders/status     ({"updates": [{"Booth #", "Item", "Color", "Status"}, ...]})
+    DELETE /shows/{show}/orders?booth=&item=&color=
+    GET    /shows/{show}/events?booth=&item=&color=&user=&kind=&since=&until=&limit=
+
+Order creation is only deduplicated when the client sends an Idempotency-Key:
+a retried key returns the first result, and an identical order sent under another
+key within two minutes is refused as a duplicate unless the body has
+"allow_same_content": true. Without a key every POST creates an order.
+
+When a token is configured (ORDERS_APP_API_TOKEN or `[api] token`), requests
+must send `Authorization: Bearer <token>`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import streamlit as st
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+
+# Largest request body accepted (bytes)
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 422: "Unprocessable Entity",
+               500: "Internal Server Error", 502: "Bad Gateway"}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _api_settings():
+    try:
+        return dict(st.secrets.get("api", {}))
+    except Exception:
+        return {}
+
+
+def api_enabled():
+    """True if the API should be started inside the Streamlit process."""
+    return os.environ.get("ORDERS_APP_API") == "1" or bool(_api_settings().get("enabled", False))
+
+
+def _records(df):
+    """DataFrame -> list of JSON-ready dicts (NaN becomes null)."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+class OrdersApi:
+    """Request routing. Every handler runs in a worker thread, outside the event loop."""
+
+    def __init__(self, token=None):
+        self.token = token
+
+    def _show(self, name):
+        from data.shows import get_show
+        from data.show_cache import get_show_cache
+
+        show = unquote(name)
+        if get_show(show) is None:
+            raise ApiError(404, f"Unknown show: {show}")
+        # API traffic keeps the show's data refreshed; it holds no session, so it doesn't pin the show
+        get_show_cache().touch(show)
+        return show
+
+    def handle(self, method, path, query, headers, body):
+        if self.token and headers.get("authorization") != f"Bearer {self.token}":
+            raise ApiError(401, "Missing or invalid token")
+
+        parts = [part for part in path.split("/") if part]
+        if parts == ["health"]:
+            return 200, {"status": "ok"}
+        if parts == ["shows"] and method == "GET":
+            from data.shows import list_shows
+            return 200, {"shows": list_shows()}
+        if len(parts) == 3 and parts[0] == "shows" and parts[2] == "events" and method == "GET":
+            return self.list_events(self._show(parts[1]), query)
+        if len(parts) < 3 or parts[0] != "shows" or parts[2] != "orders":
+            raise ApiError(404, f"No route for {path}")
+
+        show = self._show(parts[1])
+        rest = parts[3:]
+        if rest == [] and method == "GET":
+            return self.list_orders(show, query)
+        if rest == [] and method == "POST":
+            return self.create_order(show, body, headers)
+        if rest == [] and method == "DELETE":
+            return self.delete_order(show, query or body, headers)
+        if rest == ["status"] and method == "POST":
+            return self.update_statuses(show, body, headers)
+        if len(rest) == 1 and method == "GET":
+            return self.list_orders(show, {"booth": unquote(rest[0])})
+        raise ApiError(405, f"{method} not allowed on {path}")
+
+    def list_orders(self, show, query):
+        from data.order_service import find_orders
+
+        try:
+            limit = int(query.get("limit", 100))
+            offset = int(query.get("offset", 0))
+        except ValueError:
+            raise ApiError(400, "limit and offset must be integers")
+        orders = find_orders(show, booth=query.get("booth"), item=query.get("item"), color=query.get("color"),
+                             status=query.get("status"), section=query.get("section"), query=query.get("q"))
+        return 200, {"total": len(orders), "offset": offset, "orders": _records(orders.iloc[offset:offset + limit])}
+
+    def create_order(self, show, body, headers):
+        from data.order_service import create_order
+
+        if not isinstance(body, dict) or not body.get("Booth #") or not body.get("Item"):
+            raise ApiError(400, "An order needs at least 'Booth #' and 'Item'")
+        order = dict(body)
+        order.setdefault("User", headers.get("x-user", "API"))
+        allow_over = bool(order.pop("allow_over", False))
+        allow_same_content = bool(order.pop("allow_same_content", False))
+        result, remaining = create_order(show, order, idempotency_key=headers.get("idempotency-key"),
+                                         allow_over=allow_over, allow_same_content=allow_same_content)
+        status = {"created": 201, "applied": 200, "in_progress": 409, "duplicate": 409,
+                  "out_of_stock": 422, "failed": 502}[result]
+        return status, {"result": result, "remaining": remaining}
+
+    def list_events(self, show, query):
+        from data.event_log import EVENT_KINDS, get_event_log
+
+        kind = query.get("kind")
+        if kind is not None and kind not in EVENT_KINDS:
+            raise ApiError(400, f"kind must be one of {', '.join(EVENT_KINDS)}")
+        try:
+            limit = int(query.get("limit", 1000))
+            events = get_event_log().query(show=show, booth=query.get("booth"), item=query.get("item"),
+                                           color=query.get("color"), user=query.get("user"),
+                                           start=query.get("since"), end=query.get("until"),
+                                           kinds=[kind] if kind else None)
+        except ValueError as e:
+            raise ApiError(400, f"Invalid parameter: {e}")
+        # Most recent events last, like the log
+        return 200, {"total": len(events), "events": _records(events.tail(limit))}
+
+    def _single_order(self, show, keys):
+        from data.order_service import find_orders
+
+        matches = find_orders(show, booth=keys.get("booth", keys.get("Booth #")),
+                              item=keys.get("item", keys.get("Item")),
+                              color=keys.get("color", keys.get("Color")))
+        return matches
+
+    def update_statuses(self, show, body, headers):
+        import pandas as pd
+        from data.bulk_status import match_scans
+        from data.order_service import set_statuses
+        from data.show_data import load_order_data
+
+        updates = body.get("updates") if isinstance(body, dict) else body
+        if not isinstance(updates, list) or not all(isinstance(update, dict) for update in updates):
+            raise ApiError(400, "Expected a list of updates")
+        user = (body.get("user") if isinstance(body, dict) else None) or headers.get("x-user", "API")
+
+        scans = pd.DataFrame([{
+            "Booth #": str(update.get("Booth #", update.get("booth", ""))).strip(),
+            "Item": str(update.get("Item", update.get("item", ""))).strip(),
+            "Color": str(update.get("Color", update.get("color", "")) or "").strip(),
+            "Status": str(update.get("Status", update.get("status", "Delivered"))).strip(),
+        } for update in updates], columns=["Booth #", "Item", "Color", "Status"])
+
+        # Same keyed join and batched writes as the CSV upload on the Orders page
+        orders_df, _, _, _ = load_order_data(show)
+        matched, unmatched, ambiguous = match_scans(scans, orders_df)
+        if matched.empty:
+            return 200, {"updated": [], "failed": [], "unmatched": _records(unmatched),
+                         "ambiguous": _records(ambiguous)}
+
+        written = pd.Series(set_statuses(show, matched, user), index=matched.index, dtype=bool)
+        summary = matched[["Booth #", "Item", "Color", "New Status"]]
+        return 200, {
+            "updated": _records(summary[written]),
+            "failed": _records(summary[~written]),
+            "unmatched": _records(unmatched),
+            "ambiguous": _records(ambiguous),
+        }
+
+    def delete_order(self, show, keys, headers):
+        from data.order_service import delete_order
+
+        matches = self._single_order(show, keys or {})
+        if len(matches) == 0:
+            raise ApiError(404, "No matching order")
+        if len(matches) > 1:
+            raise ApiError(409, f"{len(matches)} orders match, add item and color")
+        if not delete_order(show, matches.iloc[0], user=headers.get("x-user", "API")):
+            raise ApiError(502, "The order could not be deleted")
+        return 200, {"result": "deleted"}
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, target, _ = request_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0) or 0)
+    if length > MAX_BODY_BYTES:
+        raise ApiError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload, default=str).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+async def _serve_connection(api, reader, writer):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, raw_body = request
+                keep_alive = headers.get("connection", "keep-alive").lower() != "close"
+                url = urlsplit(target)
+                query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                try:
+                    body = json.loads(raw_body) if raw_body else {}
+                except ValueError:
+                    raise ApiError(400, "Body is not valid JSON")
+                # Sheets calls block: run them off the event loop
+                status, payload = await loop.run_in_executor(
+                    None, api.handle, method, url.path, query, headers, body
+                )
+            except ApiError as e:
+                status, payload = e.status, {"error": e.message}
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as e:
+                print(f"API error: {e}")
+                status, payload = 500, {"error": str(e)}
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, token=None, ready=None):
+    """Runs the API until cancelled. `ready` (threading.Event) is set once listening."""
+    api = OrdersApi(token=token)
+    server = await asyncio.start_server(lambda r, w: _serve_connection(api, r, w), host, port)
+    print(f"Orders API listening on http://{host}:{port}")
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+@st.cache_resource
+def start_api_server():
+    """
+    Starts the API in a background thread of the Streamlit process (once per process).
+
+    Raises the bind error (e.g. port already in use) instead of returning, so a
+    failed start is not cached and the next call tries again.
+    """
+    settings = _api_settings()
+    host = os.environ.get("ORDERS_APP_API_HOST", settings.get("host", DEFAULT_HOST))
+    port = int(os.environ.get("ORDERS_APP_API_PORT", settings.get("port", DEFAULT_PORT)))
+    token = os.environ.get("ORDERS_APP_API_TOKEN", settings.get("token"))
+    ready = threading.Event()
+    errors = []
+
+    def run():
+        try:
+            asyncio.run(serve(host, port, token, ready))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            ready.set()
+
+    thread = threading.Thread(target=run, name="orders-api", daemon=True)
+    thread.start()
+    if not ready.wait(timeout=5):
+        raise TimeoutError(f"Orders API did not start listening on {host}:{port}")
+    if errors:
+        raise errors[0]
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orders App JSON API")
+    parser.add_argument("--host", default=os.environ.get("ORDERS_APP_API_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("ORDERS_APP_API_PORT", DEFAULT_PORT)))
+    args = parser.parse_args()
+    token = os.environ.get("ORDERS_APP_API_TOKEN", _api_settings().get("token"))
+    asyncio.run(serve(args.host, args.port, token))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import threading
+
+import pandas as pd
+
+from data.show_cache import get_show_cache
+
+
+# Colonnes possibles pour le nom de l'article dans la checklist et dans les commandes
+ITEM_COLUMNS = ["Item", "Item Name", "Items"]
+
+
+def normalize_keys(values):
+    """Normalise des numéros de stand ou des articles pour la jointure (casse, espaces, « 12.0 »)."""
+    return (pd.Series(values).astype(str).str.strip().str.lower()
+            .str.replace(r"\s+", " ", regex=True)
+            .str.replace(r"^(\d+)\.0$", r"\1", regex=True))
+
+
+def _normalize_key(value):
+    return normalize_keys([value]).iloc[0]
+
+
+def _item_column(df):
+    return next((column for column in ITEM_COLUMNS if column in df.columns), None)
+
+
+def _order_key(order):
+    item = next((order.get(column) for column in ITEM_COLUMNS if order.get(column) is not None), "")
+    return f"{_normalize_key(order.get('Booth #', ''))}|{_normalize_key(item)}"
+
+
+def _is_active(status):
+    return str(status).strip().lower() != "cancelled"
+
+
+def _is_delivered(status):
+    return str(status).strip().lower() == "delivered"
+
+
+class BoothFulfillment:
+    """
+    Avancement de chaque stand : articles de la checklist commandés et livrés.
+
+    Les clés de jointure (stand + article normalisés) des deux côtés sont calculées
+    une seule fois par version des données. Ensuite, chaque commande ajoutée,
+    supprimée ou modifiée met à jour son compteur en O(1) ; les tableaux par stand
+    et par section sont recalculés (jointure vectorisée) seulement quand ils ont
+    changé.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._checklist = pd.DataFrame(columns=["Booth #", "Section", "key"])
+        self._ordered = {}     # clé -> nombre de commandes non annulées
+        self._delivered = {}   # clé -> nombre de commandes livrées
+        self.version = 0
+        self._data_versions = None
+        self._loaded_at = 0.0
+        self._memo = {}
+
+    def sync(self, checklist_df, orders_df):
+        """Recalcule les index si la checklist ou les commandes correspondent à une nouvelle version."""
+        data_versions = (checklist_df.attrs.get("data_version"), orders_df.attrs.get("data_version"))
+        loaded_at = max(checklist_df.attrs.get("loaded_at", 0.0), orders_df.attrs.get("loaded_at", 0.0))
+        with self._lock:
+            if None not in data_versions and data_versions == self._data_versions:
+                return self
+            if loaded_at < self._loaded_at:
+                return self
+
+            item_column = _item_column(checklist_df)
+            if checklist_df.empty or "Booth #" not in checklist_df.columns or item_column is None:
+                self._checklist = pd.DataFrame(columns=["Booth #", "Section", "key"])
+            else:
+                booths = checklist_df["Booth #"].astype(str).str.strip()
+                self._checklist = pd.DataFrame({
+                    "Booth #": booths,
+                    "Section": (checklist_df["Section"].fillna("No Section").astype(str)
+                                if "Section" in checklist_df.columns else "No Section"),
+                    "key": (normalize_keys(booths).to_numpy() + "|"
+                            + normalize_keys(checklist_df[item_column]).to_numpy()),
+                })
+                self._checklist = self._checklist[booths.ne("") & booths.ne("nan")]
+
+            self._ordered, self._delivered = self._order_counts(orders_df)
+            self._data_versions = data_versions
+            self._loaded_at = loaded_at
+            self._bump()
+        return self
+
+    @staticmethod
+    def _order_counts(orders_df):
+        """Compte les commandes (non annulées, livrées) par clé, de façon vectorisée."""
+        item_column = _item_column(orders_df)
+        if orders_df.empty or "Booth #" not in orders_df.columns or item_column is None:
+            return {}, {}
+        keys = pd.Series(normalize_keys(orders_df["Booth #"]).to_numpy() + "|"
+                         + normalize_keys(orders_df[item_column]).to_numpy(), index=orders_df.index)
+        status = (orders_df["Status"].astype(str).str.strip().str.lower()
+                  if "Status" in orders_df.columns else pd.Series("", index=orders_df.index))
+        ordered = keys[status.ne("cancelled")].value_counts().to_dict()
+        delivered = keys[status.eq("delivered")].value_counts().to_dict()
+        return ordered, delivered
+
+    def _bump(self):
+        self.version += 1
+        self._memo = {}
+
+    def _adjust(self, counts, key, delta):
+        counts[key] = counts.get(key, 0) + delta
+        if counts[key] <= 0:
+            counts.pop(key)
+
+    def add_order(self, order):
+        """Prend en compte une nouvelle commande (dict)."""
+        with self._lock:
+            key = _order_key(order)
+            if _is_active(order.get("Status")):
+                self._adjust(self._ordered, key, 1)
+            if _is_delivered(order.get("Status")):
+                self._adjust(self._delivered, key, 1)
+            self._bump()
+
+    def remove_order(self, order):
+        """Retire une commande supprimée (dict ou ligne)."""
+        with self._lock:
+            key = _order_key(order)
+            if _is_active(order.get("Status")):
+                self._adjust(self._ordered, key, -1)
+            if _is_delivered(order.get("Status")):
+                self._adjust(self._delivered, key, -1)
+            self._bump()
+
+    def update_status(self, order, new_status):
+        """Met à jour les compteurs quand le statut d'une commande change."""
+        with self._lock:
+            self.remove_order(order)
+            self.add_order({**dict(order), "Status": new_status})
+
+    def by_booth(self):
+        """
+        Retourne l'avancement par stand (articles de la checklist, commandés, livrés,
+        pourcentage livré), les stands les plus en retard en premier.
+        """
+        with self._lock:
+            if "booth" not in self._memo:
+                checklist = self._checklist
+                ordered = checklist["key"].map(self._ordered).fillna(0).gt(0)
+                delivered = checklist["key"].map(self._delivered).fillna(0).gt(0)
+                table = (pd.DataFrame({
+                    "Booth #": checklist["Booth #"],
+                    "Section": checklist["Section"],
+                    "Items": 1,
+                    "Ordered": ordered.astype(int),
+                    "Delivered": delivered.astype(int),
+                }).groupby(["Booth #", "Section"], as_index=False).sum())
+                table["Progress"] = (table["Delivered"] / table["Items"] * 100).round().astype(int)
+                self._memo["booth"] = table.sort_values(["Progress", "Booth #"]).reset_index(drop=True)
+            return self._memo["booth"]
+
+    def by_section(self):
+        """Retourne l'avancement par section, calculé à partir du tableau par stand."""
+        with self._lock:
+            if "section" not in self._memo:
+                booths = self.by_booth()
+                table = booths.groupby("Section", as_index=False)[["Items", "Ordered", "Delivered"]].sum()
+                table.insert(1, "Booths", booths.groupby("Section").size().reindex(table["Section"]).to_numpy())
+                table["Progress"] = (table["Delivered"] / table["Items"].where(table["Items"] > 0)
+                                     * 100).fillna(0).round().astype(int)
+                self._memo["section"] = table.sort_values("Section").reset_index(drop=True)
+            return self._memo["section"]
+
+
+def get_booth_fulfillment(show):
+    """Retourne l'avancement par stand partagé (toutes sessions) d'un salon."""
+    return get_show_cache().resource(show, "fulfillment", BoothFulfillment)
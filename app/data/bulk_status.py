@@ -0,0 +1,87 @@
+import pandas as pd
+
+from data.booth_fulfillment import normalize_keys
+
+
+# Noms de colonnes acceptés dans les exports des scanners (en minuscules)
+COLUMN_ALIASES = {
+    "Booth #": ["booth #", "booth", "booth number", "booth no", "stand"],
+    "Item": ["item", "item name", "items", "article"],
+    "Color": ["color", "colour", "couleur"],
+    "Status": ["status", "statut"],
+}
+
+DEFAULT_STATUS = "Delivered"
+
+
+def parse_scan_csv(file):
+    """
+    Lit un export CSV de scanner et retourne un DataFrame avec les colonnes
+    Booth #, Item, Color (éventuellement vide) et Status (Delivered par défaut).
+    """
+    raw = pd.read_csv(file, dtype=str, skipinitialspace=True).dropna(how="all")
+    lookup = {str(column).strip().lower(): column for column in raw.columns}
+    scans = pd.DataFrame(index=raw.index)
+    for name, aliases in COLUMN_ALIASES.items():
+        source = next((lookup[alias] for alias in aliases if alias in lookup), None)
+        scans[name] = raw[source].fillna("").str.strip() if source is not None else ""
+    if scans["Booth #"].eq("").all() or scans["Item"].eq("").all():
+        raise ValueError("The file needs a booth column and an item column.")
+    scans["Status"] = scans["Status"].where(scans["Status"].ne(""), DEFAULT_STATUS)
+    return scans.reset_index(drop=True)
+
+
+def _keys(df, with_color):
+    keys = normalize_keys(df["Booth #"]).to_numpy() + "|" + normalize_keys(df["Item"]).to_numpy()
+    if with_color:
+        keys = keys + "|" + normalize_keys(df["Color"]).to_numpy()
+    return pd.Series(keys, index=df.index)
+
+
+def match_scans(scans, orders_df):
+    """
+    Associe chaque ligne scannée à une commande par une jointure vectorisée sur
+    stand + article (+ couleur quand le scan l'indique).
+
+    Returns:
+        tuple: (matched, unmatched, ambiguous)
+            matched : une ligne par commande trouvée (colonnes de orders_df),
+                      avec son statut actuel (Current Status) et le nouveau
+                      (New Status) ; une commande scannée plusieurs fois
+                      prend le statut du dernier scan
+            unmatched : scans sans commande correspondante
+            ambiguous : scans correspondant à plusieurs commandes (Matches = nombre)
+    """
+    scans = scans.reset_index(drop=True)
+    if orders_df.empty:
+        return pd.DataFrame(), scans, scans.iloc[0:0].assign(Matches=0)
+
+    orders = orders_df.reset_index(drop=True)
+    scans = scans.assign(_scan=range(len(scans)), _with_color=scans["Color"].ne(""))
+    orders_keys = pd.DataFrame({
+        "_order": range(len(orders)),
+        "_key": _keys(orders, with_color=False),
+        "_key_color": _keys(orders, with_color=True),
+    })
+
+    # Deux jointures : les scans avec couleur sur la clé complète, les autres sur stand + article
+    with_color = scans[scans["_with_color"]]
+    without_color = scans[~scans["_with_color"]]
+    pairs = pd.concat([
+        with_color.assign(_key_color=_keys(with_color, True)).merge(orders_keys[["_order", "_key_color"]],
+                                                                     on="_key_color"),
+        without_color.assign(_key=_keys(without_color, False)).merge(orders_keys[["_order", "_key"]], on="_key"),
+    ], ignore_index=True)[["_scan", "_order"]]
+
+    counts = pairs.groupby("_scan").size().reindex(range(len(scans)), fill_value=0)
+    scan_columns = ["Booth #", "Item", "Color", "Status"]
+    unmatched = scans.loc[counts.eq(0).to_numpy(), scan_columns]
+    ambiguous = scans.loc[counts.gt(1).to_numpy(), scan_columns].assign(Matches=counts[counts.gt(1)].to_numpy())
+
+    single = pairs[pairs["_scan"].map(counts).eq(1)].sort_values("_scan")
+    # Scans répétés d'une même commande : un seul changement de statut, celui du dernier scan
+    single = single.drop_duplicates("_order", keep="last")
+    matched = orders.iloc[single["_order"].to_numpy()].reset_index(drop=True)
+    matched["Current Status"] = matched["Status"] if "Status" in matched.columns else ""
+    matched["New Status"] = scans["Status"].iloc[single["_scan"].to_numpy()].to_numpy()
+    return matched, unmatched.reset_index(drop=True), ambiguous.reset_index(drop=True)
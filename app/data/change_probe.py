@@ -0,0 +1,81 @@
+import threading
+import time
+
+import streamlit as st
+
+
+# Deux vérifications du même classeur dans cet intervalle partagent la même requête
+PROBE_INTERVAL_SECONDS = 5
+
+
+class ChangeProbe:
+    """
+    Détecte les modifications des classeurs avant de les retélécharger.
+
+    Le signal utilisé est la date de modification Drive du classeur : une seule
+    petite requête, qui couvre aussi bien nos écritures que les modifications
+    faites directement dans Google Sheets. Après un rechargement, les empreintes
+    des feuilles permettent de savoir lesquelles ont réellement changé.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revisions = {}    # sheet_id -> (révision, heure de vérification)
+        self._fingerprints = {} # (sheet_id, feuille) -> version des données
+        self._changes = {}      # sheet_id -> feuilles modifiées au dernier chargement
+
+    def revision(self, gs_manager, sheet_id):
+        """Retourne la révision d'un classeur, en réutilisant une vérification récente."""
+        with self._lock:
+            cached = self._revisions.get(sheet_id)
+            if cached is not None and time.time() - cached[1] < PROBE_INTERVAL_SECONDS:
+                return cached[0]
+        revision = gs_manager.get_revision(sheet_id)
+        with self._lock:
+            self._revisions[sheet_id] = (revision, time.time())
+        return revision
+
+    def token(self, gs_manager, sheet_ids):
+        """
+        Retourne un jeton représentant l'état des classeurs, ou None si l'un d'eux
+        n'a pas pu être vérifié (le jeu de données est alors rechargé).
+        """
+        revisions = tuple(self.revision(gs_manager, sheet_id) for sheet_id in sheet_ids)
+        if any(revision is None for revision in revisions):
+            return None
+        return revisions
+
+    def forget(self, sheet_id):
+        """Oublie la révision connue d'un classeur (après une écriture locale)."""
+        with self._lock:
+            self._revisions.pop(sheet_id, None)
+
+    def record(self, sheet_id, frames):
+        """
+        Enregistre les empreintes des feuilles rechargées et retourne la liste de
+        celles qui ont changé depuis le chargement précédent.
+
+        Args:
+            sheet_id (str): ID du classeur
+            frames (dict): nom de la feuille -> DataFrame horodaté par stamp_version
+        """
+        changed = []
+        with self._lock:
+            for worksheet, df in frames.items():
+                version = df.attrs.get("data_version")
+                if self._fingerprints.get((sheet_id, worksheet)) != version:
+                    changed.append(worksheet)
+                self._fingerprints[(sheet_id, worksheet)] = version
+            self._changes[sheet_id] = changed
+        return changed
+
+    def changed_worksheets(self, sheet_id):
+        """Retourne les feuilles modifiées lors du dernier rechargement du classeur."""
+        with self._lock:
+            return list(self._changes.get(sheet_id, []))
+
+
+@st.cache_resource
+def get_change_probe():
+    """Retourne la sonde de modifications du processus."""
+    return ChangeProbe()
@@ -0,0 +1,87 @@
+import threading
+
+import pandas as pd
+
+from data.order_aggregates import stamp_version
+
+
+def is_section(worksheet):
+    """Indique si une feuille du classeur Booth Checklist est une section."""
+    return worksheet.startswith("Section") or worksheet == "No Section"
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes", "x", "✓")
+    return bool(value) if pd.notna(value) else False
+
+
+def _typed_section(df, section):
+    """Prépare une section : colonnes typées et colonne Section ajoutée."""
+    df = df.copy()
+    df.columns = [str(column).strip() for column in df.columns]
+    if "Status" in df.columns:
+        df["Status"] = df["Status"].map(_to_bool).astype(bool)
+    if "Booth #" in df.columns:
+        df["Booth #"] = df["Booth #"].astype(str).str.strip()
+    df.insert(0, "Section", section)
+    return df
+
+
+class ChecklistSections:
+    """
+    Sections de la checklist réunies dans un seul DataFrame, avec la progression
+    par section.
+
+    Chaque section est typée une seule fois par version de ses données : lors d'un
+    rechargement, seules les sections modifiées sont retraitées, et le DataFrame
+    combiné n'est reconstruit que si au moins une section a changé.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sections = {}   # section -> (version des données, DataFrame typé)
+        self._combined = None
+        self._progress = None
+
+    def combine(self, frames):
+        """
+        Met à jour les sections à partir des feuilles téléchargées.
+
+        Args:
+            frames (dict): nom de la section -> DataFrame horodaté par stamp_version
+
+        Returns:
+            tuple: (checklist par section, progression par section)
+        """
+        with self._lock:
+            changed = set(frames) != set(self._sections)
+            for section, df in frames.items():
+                version = df.attrs.get("data_version")
+                cached = self._sections.get(section)
+                if cached is None or cached[0] != version or version is None:
+                    self._sections[section] = (version, _typed_section(df, section))
+                    changed = True
+            for section in set(self._sections) - set(frames):
+                del self._sections[section]
+
+            if changed or self._combined is None:
+                typed = [self._sections[section][1] for section in frames]
+                combined = pd.concat(typed, ignore_index=True) if typed else pd.DataFrame(columns=["Section"])
+                self._combined = stamp_version(combined)
+                self._progress = self._section_progress(frames)
+            return self._combined, self._progress
+
+    def _section_progress(self, frames):
+        rows = []
+        for section in frames:
+            df = self._sections[section][1]
+            total = len(df)
+            completed = int(df["Status"].sum()) if "Status" in df.columns else 0
+            rows.append({
+                "Section": section,
+                "Total": total,
+                "Completed": completed,
+                "Progress": int((completed / total * 100) if total > 0 else 0),
+            })
+        return pd.DataFrame(rows, columns=["Section", "Total", "Completed", "Progress"])
@@ -0,0 +1,66 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+import gspread
+import streamlit as st
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# Nombre de connexions HTTP gardées ouvertes vers les API Google
+POOL_SIZE = 10
+
+# Le jeton est renouvelé quand il lui reste moins de ce délai avant expiration
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+
+class SheetsClientPool:
+    """
+    Client gspread autorisé, partagé par tout le processus.
+
+    Les identifiants sont lus une seule fois, le jeton OAuth est renouvelé avant
+    son expiration et les connexions HTTP (keep-alive) sont réutilisées d'un appel
+    à l'autre, y compris depuis plusieurs threads.
+    """
+
+    def __init__(self, service_account_info, scopes=SCOPES, pool_size=POOL_SIZE):
+        self.credentials = Credentials.from_service_account_info(service_account_info, scopes=scopes)
+        self._token_lock = threading.Lock()
+
+        session = AuthorizedSession(self.credentials)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        self._client = gspread.Client(auth=self.credentials, session=session)
+
+    def _ensure_token(self):
+        """Renouvelle le jeton s'il est absent ou proche de l'expiration."""
+        with self._token_lock:
+            expiry = self.credentials.expiry  # UTC, sans fuseau
+            if (not self.credentials.valid or expiry is None or
+                    expiry - datetime.utcnow() < TOKEN_REFRESH_MARGIN):
+                self.credentials.refresh(Request())
+
+    def client(self):
+        """Retourne le client gspread partagé, avec un jeton valide."""
+        self._ensure_token()
+        return self._client
+
+
+@st.cache_resource
+def get_client_pool():
+    """
+    Retourne le pool de clients Google Sheets du processus.
+
+    Avec ORDERS_APP_SHEETS=local, les classeurs sont simulés en mémoire (voir local_sheets).
+    """
+    if os.environ.get("ORDERS_APP_SHEETS") == "local":
+        from data.local_sheets import load_local_pool
+        return load_local_pool()
+    return SheetsClientPool(dict(st.secrets["gcp_service_account"]))
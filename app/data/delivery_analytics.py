@@ -0,0 +1,320 @@
+import threading
+import time
+
+import pandas as pd
+
+from data.booth_fulfillment import normalize_keys
+from data.event_log import get_event_log
+from data.order_time_index import parse_order_timestamps
+from data.show_cache import get_show_cache
+
+
+# Pas des séries temporelles ; les débits sont des sommes glissantes sur une heure
+BUCKET = "15min"
+RATE_WINDOW = "1h"
+
+# Intervalle minimal entre deux lectures des nouveaux événements du journal
+EVENT_POLL_SECONDS = 5
+
+DELIVERED = "delivered"
+CLOSED_STATUSES = ["delivered", "cancelled"]
+
+
+def _column(df, name):
+    return df[name] if name in df.columns else pd.Series("", index=df.index)
+
+
+def _keys(df):
+    """
+    Clé d'une commande : stand|article|couleur normalisés.
+
+    Ni la feuille ni le journal n'identifient une ligne : deux commandes
+    identiques (« Add again ») partagent la même clé. Chacune compte dans les
+    débits et la file d'attente, mais elles reçoivent les heures et le statut
+    du dernier événement de la clé.
+    """
+    return pd.Series(normalize_keys(_column(df, "Booth #")).to_numpy() + "|"
+                     + normalize_keys(_column(df, "Item")).to_numpy() + "|"
+                     + normalize_keys(_column(df, "Color")).to_numpy(), index=df.index)
+
+
+def _lower(values):
+    return values.fillna("").astype(str).str.strip().str.lower()
+
+
+def _empty_log():
+    return pd.DataFrame({
+        "Section": pd.Series(dtype=object),
+        "Item": pd.Series(dtype=object),
+        "Placed": pd.Series(dtype="datetime64[ns]"),
+        "Last Status": pd.Series(dtype=object),
+        "Status At": pd.Series(dtype="datetime64[ns]"),
+        "Deleted At": pd.Series(dtype="datetime64[ns]"),
+    })
+
+
+def _log_state(events):
+    """
+    Résume des événements du journal par commande : heure de création, dernier
+    statut connu (celui de la création compris) et heure de suppression.
+    """
+    events = events.assign(key=_keys(events))
+    created = events[events["Event"] == "created"].groupby("key").agg(
+        Section=("Section", "last"), Item=("Item", "last"), Placed=("Time", "last"))
+    statuses = events[events["Event"].isin(["created", "status"])].groupby("key").agg(
+        **{"Last Status": ("Status", "last"), "Status At": ("Time", "last")})
+    deleted = events[events["Event"] == "deleted"].groupby("key").agg(**{"Deleted At": ("Time", "last")})
+    state = pd.concat([created, statuses, deleted], axis=1).reindex(columns=_empty_log().columns)
+    return state.astype(_empty_log().dtypes.to_dict())
+
+
+def _merge_log(log, state):
+    """
+    Réunit deux résumés du journal en gardant, pour chaque commande, l'information
+    la plus récente : relire des événements déjà lus ne change rien, et l'ordre de
+    lecture n'a pas d'importance.
+    """
+    if log.empty:
+        return state
+    both = pd.concat([log, state])
+    # groupby().last() ignore les valeurs manquantes : après le tri, la dernière valeur connue est la plus récente
+    placed = (both.sort_values("Placed", na_position="first", kind="stable")
+              .groupby(level=0)[["Section", "Item", "Placed"]].last())
+    status = (both.sort_values("Status At", na_position="first", kind="stable")
+              .groupby(level=0)[["Last Status", "Status At"]].last())
+    deleted = both.groupby(level=0)["Deleted At"].max()
+    merged = pd.concat([placed, status, deleted], axis=1).reindex(columns=_empty_log().columns)
+    return merged.astype(_empty_log().dtypes.to_dict())
+
+
+def _changed_keys(before, after, keys):
+    """Clés parmi `keys` dont le résumé diffère entre before et after."""
+    keys = list(keys)
+    old, new = before.reindex(keys), after.reindex(keys)
+    differs = (old != new) & ~(old.isna() & new.isna())
+    return set(new.index[differs.any(axis=1).to_numpy()])
+
+
+def _order_times(rows, log, loaded_ts):
+    """
+    Heures de création, de livraison et de clôture de chaque commande.
+
+    La feuille ne garde que l'heure de la dernière modification (Date/Hour) : une
+    commande jamais modifiée est datée de sa création, une commande livrée ou
+    annulée de sa clôture. Le journal d'événements donne les heures exactes quand
+    il les a vues, et ses changements postérieurs à la lecture de la feuille
+    l'emportent sur elle.
+    """
+    joined = rows.join(log[["Placed", "Last Status", "Status At", "Deleted At"]], on="key")
+    sheet_status = _lower(joined["Status"])
+    log_status = _lower(joined["Last Status"])
+    status = log_status.where(joined["Status At"] > loaded_ts, sheet_status)
+    status_time = joined["Status At"].where((log_status == status) & joined["Status At"].notna(),
+                                            joined["Row Time"])
+
+    # Sans création dans le journal, Date/Hour n'est l'heure de création que si le statut n'a jamais changé
+    placed = joined["Placed"].where(
+        joined["Placed"].notna(),
+        joined["Row Time"].where(joined["Status At"].isna() & ~status.isin(CLOSED_STATUSES)),
+    )
+    deleted = (joined["Deleted At"] > loaded_ts) & ~(joined["Placed"] > joined["Deleted At"])
+
+    times = pd.DataFrame({
+        "key": joined["key"],
+        "Section": joined["Section"].fillna("").replace("", "No Section"),
+        "Item": joined["Item"].fillna(""),
+        "Placed": pd.to_datetime(placed),
+        "Delivered": pd.to_datetime(status_time.where(status == DELIVERED)),
+        "Closed": pd.to_datetime(status_time.where(status.isin(CLOSED_STATUSES))),
+        # Entrée dans la file d'attente : création, à défaut dernier changement connu
+        "Entered": pd.to_datetime(placed.fillna(status_time)),
+    })
+    return times[~deleted.to_numpy()].reset_index(drop=True)
+
+
+def _bucket_counts(times):
+    """Nombre de créations, livraisons, entrées et sorties de file par intervalle BUCKET."""
+    counts = {
+        column: times[column].dropna().dt.floor(BUCKET).value_counts()
+        for column in ["Placed", "Delivered", "Entered", "Closed"]
+    }
+    return pd.DataFrame(counts).fillna(0)
+
+
+class DeliveryAnalytics:
+    """
+    Débit de commandes et de livraisons, délai commande -> livraison et file
+    d'attente d'un salon.
+
+    Les heures de chaque commande sont recalculées en entier à chaque nouvelle
+    version des données de la feuille, le journal étant alors relu en entier.
+    Entre deux versions, seuls les lots d'événements pas encore lus le sont
+    (EventLog.read_new, sans critère d'heure) : les commandes dont le résumé a
+    changé sont recalculées et les compteurs par intervalle mis à jour par
+    différence. Les séries affichées
+    sont construites une fois par version et partagées par toutes les sessions.
+    """
+
+    def __init__(self, show):
+        self.show = show
+        self._lock = threading.RLock()
+        self._log = _empty_log()
+        self._seen = set()  # lots du journal déjà lus
+        self._polled = 0.0
+        self._rows = pd.DataFrame(columns=["key", "Section", "Item", "Status", "Row Time"])
+        self._loaded_ts = pd.Timestamp.now()
+        self._times = _order_times(self._rows, self._log, self._loaded_ts)
+        self._counts = _bucket_counts(self._times)
+        self._memo = {}
+        self.version = 0
+        self.data_version = None
+        self.loaded_at = 0.0
+
+    def _ingest_events(self, reset=False):
+        """
+        Lit les événements du journal pas encore lus (tous si reset) ; retourne les
+        clés des commandes dont le résumé a changé.
+        """
+        if reset:
+            self._log, self._seen = _empty_log(), set()
+        events, self._seen = get_event_log().read_new(self.show, self._seen)
+        if events.empty:
+            return set()
+        state = _log_state(events)
+        merged = _merge_log(self._log, state)
+        changed = _changed_keys(self._log, merged, state.index)
+        self._log = merged
+        return changed
+
+    def _derive(self, keys=None):
+        """Heures des commandes (toutes, ou seulement celles de `keys`)."""
+        rows = self._rows if keys is None else self._rows[self._rows["key"].isin(keys)]
+        log = self._log if keys is None else self._log[self._log.index.isin(keys)]
+
+        # Commandes créées depuis la lecture de la feuille et pas encore relues
+        new_keys = log.index[(log["Placed"] > self._loaded_ts).to_numpy() & ~log.index.isin(self._rows["key"])]
+        if len(new_keys):
+            rows = pd.concat([rows, pd.DataFrame({
+                "key": new_keys,
+                "Section": log.loc[new_keys, "Section"].to_numpy(),
+                "Item": log.loc[new_keys, "Item"].to_numpy(),
+                "Status": log.loc[new_keys, "Last Status"].to_numpy(),
+                "Row Time": pd.NaT,
+            })], ignore_index=True)
+        return _order_times(rows, log, self._loaded_ts)
+
+    def sync(self, orders_df):
+        """Prend en compte une nouvelle version des commandes et les nouveaux événements du journal."""
+        data_version = orders_df.attrs.get("data_version")
+        loaded_at = orders_df.attrs.get("loaded_at", time.time())
+        with self._lock:
+            rebuild = (data_version is None or data_version != self.data_version) and loaded_at >= self.loaded_at
+            changed = set()
+            if rebuild or time.time() - self._polled >= EVENT_POLL_SECONDS:
+                self._polled = time.time()
+                changed = self._ingest_events(reset=rebuild)
+
+            if rebuild:
+                if {"Booth #", "Item"} <= set(orders_df.columns):
+                    has_time = "Date" in orders_df.columns and "Hour" in orders_df.columns
+                    self._rows = pd.DataFrame({
+                        "key": _keys(orders_df),
+                        "Section": _column(orders_df, "Section"),
+                        "Item": _column(orders_df, "Item"),
+                        "Status": _column(orders_df, "Status"),
+                        "Row Time": (parse_order_timestamps(orders_df["Date"], orders_df["Hour"]) if has_time
+                                     else pd.Series(pd.NaT, index=orders_df.index)),
+                    }).reset_index(drop=True)
+                else:
+                    self._rows = self._rows.iloc[0:0]
+                self._loaded_ts = pd.Timestamp.fromtimestamp(loaded_at)
+                self._times = self._derive()
+                self._counts = _bucket_counts(self._times)
+                self.data_version = data_version
+                self.loaded_at = loaded_at
+                self.version += 1
+            elif changed:
+                # Seules les commandes touchées par les nouveaux événements sont recalculées
+                affected = self._times["key"].isin(changed).to_numpy()
+                updated = self._derive(changed)
+                counts = (self._counts.add(_bucket_counts(updated), fill_value=0)
+                          .sub(_bucket_counts(self._times[affected]), fill_value=0))
+                self._counts = counts[(counts != 0).any(axis=1)]
+                self._times = pd.concat([self._times[~affected], updated], ignore_index=True)
+                self.version += 1
+        return self
+
+    def _memoize(self, name, builder):
+        with self._lock:
+            if self._memo.get("version") != self.version:
+                self._memo = {"version": self.version}
+            if name not in self._memo:
+                self._memo[name] = builder()
+            return self._memo[name]
+
+    def _series(self):
+        """Toutes les séries, de la première à la dernière activité, au pas BUCKET."""
+        counts = self._counts.sort_index()
+        if counts.empty:
+            return pd.DataFrame(columns=["Orders per hour", "Deliveries per hour", "Queue depth"])
+        counts = counts.reindex(pd.date_range(counts.index.min(), counts.index.max(), freq=BUCKET), fill_value=0)
+        series = counts[["Placed", "Delivered"]].rolling(RATE_WINDOW).sum()
+        series.columns = ["Orders per hour", "Deliveries per hour"]
+        # File d'attente : commandes entrées moins commandes livrées ou annulées
+        series["Queue depth"] = counts["Entered"].cumsum() - counts["Closed"].cumsum()
+        return series
+
+    def days(self):
+        """Journées avec de l'activité, de la plus récente à la plus ancienne."""
+        def build():
+            index = self._counts.index
+            return sorted({timestamp.date() for timestamp in index}, reverse=True)
+        return self._memoize("days", build)
+
+    def time_series(self, day=None):
+        """
+        Commandes et livraisons par heure (somme glissante) et file d'attente, au
+        pas BUCKET, pour une journée (toutes par défaut).
+        """
+        series = self._memoize("series", self._series)
+        if day is None or series.empty:
+            return series
+        return self._memoize(("series", day), lambda: series[series.index.date == day])
+
+    def current_queue(self):
+        """Nombre de commandes en attente de livraison."""
+        series = self._memoize("series", self._series)
+        return int(series["Queue depth"].iloc[-1]) if not series.empty else 0
+
+    def lead_times(self, by="Section", top=None):
+        """
+        Délai commande -> livraison (minutes) par section ou par article, pour les
+        commandes dont l'heure de création est connue.
+        """
+        def build():
+            times = self._times
+            done = times[times["Placed"].notna() & times["Delivered"].notna()
+                         & (times["Delivered"] >= times["Placed"])]
+            minutes = (done["Delivered"] - done["Placed"]).dt.total_seconds() / 60
+            table = minutes.groupby(done[by]).agg(
+                **{"Delivered orders": "count", "Median (min)": "median", "Mean (min)": "mean",
+                   "90th pct (min)": lambda values: values.quantile(0.9)}
+            ).round(1).reset_index()
+            return table.sort_values("Median (min)", ascending=False).reset_index(drop=True)
+        table = self._memoize(("lead", by), build)
+        return table.head(top) if top else table
+
+    def median_lead_time(self):
+        """Délai médian commande -> livraison (minutes), toutes commandes confondues, ou None."""
+        def build():
+            times = self._times
+            done = times["Placed"].notna() & times["Delivered"].notna() & (times["Delivered"] >= times["Placed"])
+            if not done.any():
+                return None
+            return round((times.loc[done, "Delivered"] - times.loc[done, "Placed"]).dt.total_seconds().median() / 60, 1)
+        return self._memoize("median_lead", build)
+
+
+def get_delivery_analytics(show):
+    """Retourne les indicateurs de livraison partagés (toutes sessions) d'un salon."""
+    return get_show_cache().resource(show, "delivery_analytics", lambda: DeliveryAnalytics(show))
@@ -1,22 +1,19 @@
-import gspread
-from google.oauth2.service_account import Credentials
 from datetime import datetime
 import streamlit as st
+from data.client_pool import get_client_pool
 
-def direct_add_order(sheet_id, order_data):
+def direct_add_order(sheet_id, order_data, on_appended=None):
     """
     Fonction indépendante qui utilise directement l'approche fonctionnelle 
     pour ajouter une commande à Google Sheets.
+
+    `on_appended` est appelé dès que la ligne est écrite dans la feuille Orders,
+    avant toute autre opération : la commande est alors enregistrée même si la
+    suite est interrompue (rerun, arrêt du script).
     """
     try:
-        # Configurer l'accès à l'API avec les secrets Streamlit
-        scope = ["https://www.googleapis.com/auth/spreadsheets", 
-                 "https://www.googleapis.com/auth/drive"]
-        creds = Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"],
-            scopes=scope
-        )
-        gc = gspread.authorize(creds)
+        # Client autorisé partagé (pas de nouvelle authentification à chaque appel)
+        gc = get_client_pool().client()
         sh = gc.open_by_key(sheet_id)
         orders_sheet = sh.worksheet("Orders")
         
@@ -42,7 +39,8 @@ def direct_add_order(sheet_id, order_data):
         
         # Insérer la nouvelle ligne
         orders_sheet.append_row(row_data)
-        st.success("Commande ajoutée avec succès!")
+        if on_appended is not None:
+            on_appended()
         
         # Mettre à jour la feuille de section si elle existe
         section = order_data.get('Section', '')
@@ -77,14 +75,8 @@ def direct_delete_order(sheet_id, booth_num, item_name, color, section):
         bool: True si la suppression a réussi, False sinon
     """
     try:
-        # Configurer l'accès à l'API avec les secrets Streamlit
-        scope = ["https://www.googleapis.com/auth/spreadsheets", 
-                 "https://www.googleapis.com/auth/drive"]
-        creds = Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"],
-            scopes=scope
-        )
-        gc = gspread.authorize(creds)
+        # Client autorisé partagé (pas de nouvelle authentification à chaque appel)
+        gc = get_client_pool().client()
         sh = gc.open_by_key(sheet_id)
         
         # Supprimer de la feuille principale "Orders"
@@ -0,0 +1,453 @@
+import atexit
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data.booth_fulfillment import normalize_keys
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité au processus
+    fcntl = None
+
+
+EVENT_DIR = ".streamlit/events"
+
+# Types d'événement (code = position dans la liste)
+EVENT_KINDS = ["created", "status", "deleted"]
+
+# Colonnes texte, encodées par dictionnaire dans chaque segment
+TEXT_COLUMNS = ["show", "booth", "section", "item", "color", "status", "previous", "user"]
+
+# Lot d'origine de chaque événement : nom du segment dans lequel il a été écrit la
+# première fois. Il est conservé par les fusions et permet de savoir quels
+# événements ont déjà été lus (voir EventLog.read_new).
+BATCH_COLUMN = "batch"
+
+# Les événements sont écrits par lots : dès FLUSH_EVENTS événements en attente,
+# et au plus tard FLUSH_SECONDS après le premier
+FLUSH_EVENTS = 500
+FLUSH_SECONDS = 5
+
+# Au-delà de COMPACT_SEGMENTS fichiers, les segments de moins de SEGMENT_ROWS / 2
+# événements sont fusionnés, par groupes d'au plus SEGMENT_ROWS événements
+COMPACT_SEGMENTS = 32
+SEGMENT_ROWS = 250_000
+
+# Nombre de segments lus gardés en mémoire (les moins récemment utilisés sont oubliés)
+CACHED_SEGMENTS = 16
+
+COLUMN_NAMES = {"time": "Time", "kind": "Event", "show": "Show", "booth": "Booth #", "section": "Section",
+                "item": "Item", "color": "Color", "status": "Status", "previous": "Previous Status",
+                "user": "User"}
+
+
+def _to_ms(value):
+    """datetime (heure locale si naïf) -> millisecondes depuis l'epoch."""
+    return int(pd.Timestamp(value).to_pydatetime().timestamp() * 1000)
+
+
+def _local_times(ms):
+    """Millisecondes depuis l'epoch -> datetime naïfs à l'heure locale, comme les colonnes Date/Hour."""
+    local_tz = datetime.now().astimezone().tzinfo
+    return pd.to_datetime(ms, unit="ms", utc=True).tz_convert(local_tz).tz_localize(None)
+
+
+def _encode(values):
+    """Encode une colonne texte : (valeurs distinctes, codes du plus petit type entier possible)."""
+    dictionary, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    dtype = np.uint16 if len(dictionary) <= np.iinfo(np.uint16).max else np.uint32
+    return dictionary, codes.astype(dtype)
+
+
+class Segment:
+    """
+    Lot d'événements en colonnes : horodatages (ms), type, et pour chaque colonne
+    texte (et le lot d'origine) un dictionnaire de valeurs et un tableau de codes.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.rows = len(columns["time"])
+        self.t_min = int(columns["time"].min()) if self.rows else 0
+        self.t_max = int(columns["time"].max()) if self.rows else 0
+        self._normalized = {}
+
+    @classmethod
+    def from_events(cls, events, batch=""):
+        columns = {
+            "time": np.array([event["time"] for event in events], dtype=np.int64),
+            "kind": np.array([EVENT_KINDS.index(event["kind"]) for event in events], dtype=np.uint8),
+        }
+        for name in TEXT_COLUMNS:
+            dictionary, codes = _encode([event.get(name) or "" for event in events])
+            columns[f"{name}_values"] = dictionary
+            columns[name] = codes
+        columns[f"{BATCH_COLUMN}_values"], columns[BATCH_COLUMN] = _encode([batch] * len(events))
+        return cls(columns)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            columns = {name: data[name] for name in data.files}
+        if BATCH_COLUMN not in columns:
+            # Segment écrit avant le suivi des lots : il est son propre lot
+            columns[f"{BATCH_COLUMN}_values"], columns[BATCH_COLUMN] = _encode(
+                [os.path.basename(path)] * len(columns["time"]))
+        return cls(columns)
+
+    @classmethod
+    def merge(cls, segments):
+        """Réunit plusieurs segments (dictionnaires refaits), triés par horodatage."""
+        columns = {
+            "time": np.concatenate([segment.columns["time"] for segment in segments]),
+            "kind": np.concatenate([segment.columns["kind"] for segment in segments]),
+        }
+        order = np.argsort(columns["time"], kind="stable")
+        columns = {name: values[order] for name, values in columns.items()}
+        for name in TEXT_COLUMNS + [BATCH_COLUMN]:
+            decoded = np.concatenate([segment.decode(name) for segment in segments])
+            columns[f"{name}_values"], columns[name] = _encode(decoded[order])
+        return cls(columns)
+
+    def save(self, path):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez_compressed(f, **self.columns)
+        os.replace(temp_path, path)
+
+    def batches(self):
+        """Lots d'origine des événements du segment."""
+        return set(self.columns[f"{BATCH_COLUMN}_values"].tolist())
+
+    def batch_mask(self, batches):
+        """Masque des événements dont le lot d'origine est dans `batches`."""
+        codes = np.flatnonzero(np.isin(self.columns[f"{BATCH_COLUMN}_values"], list(batches)))
+        return np.isin(self.columns[BATCH_COLUMN], codes)
+
+    def decode(self, name, mask=None):
+        codes = self.columns[name] if mask is None else self.columns[name][mask]
+        return self.columns[f"{name}_values"][codes]
+
+    def matching_codes(self, name, value):
+        """Codes du dictionnaire de `name` égaux à `value` (après normalisation)."""
+        if name not in self._normalized:
+            self._normalized[name] = normalize_keys(self.columns[f"{name}_values"]).to_numpy()
+        wanted = normalize_keys([value]).iloc[0]
+        return np.flatnonzero(self._normalized[name] == wanted)
+
+    def mask(self, start=None, end=None, kinds=None, **values):
+        """Masque des événements correspondant aux critères (bornes de temps en ms, fin exclue)."""
+        times = self.columns["time"]
+        mask = np.ones(self.rows, dtype=bool)
+        if start is not None:
+            mask &= times >= start
+        if end is not None:
+            mask &= times < end
+        if kinds:
+            mask &= np.isin(self.columns["kind"], [EVENT_KINDS.index(kind) for kind in kinds])
+        for name, value in values.items():
+            if value is None:
+                continue
+            codes = self.matching_codes(name, value)
+            if len(codes) == 0:
+                return np.zeros(self.rows, dtype=bool)
+            mask &= np.isin(self.columns[name], codes)
+        return mask
+
+    def frame(self, mask):
+        data = {"time": _local_times(self.columns["time"][mask]),
+                "kind": np.array(EVENT_KINDS, dtype=object)[self.columns["kind"][mask]]}
+        for name in TEXT_COLUMNS:
+            data[name] = self.decode(name, mask)
+        return pd.DataFrame(data).rename(columns=COLUMN_NAMES)
+
+
+class EventLog:
+    """
+    Journal des événements de commande (création, changement de statut,
+    suppression), en ajout seul et en colonnes.
+
+    Les événements sont gardés en mémoire puis écrits par lots dans des segments
+    (.npz compressés) dont le nom donne la plage de temps couverte : une requête
+    sur une période ne lit que les segments concernés, et les CACHED_SEGMENTS
+    derniers segments lus restent en mémoire. Les statuts, utilisateurs, stands et
+    articles sont encodés par dictionnaire, un événement occupe quelques dizaines
+    d'octets.
+    """
+
+    def __init__(self, directory=EVENT_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._pending = []
+        self._in_flight = {}             # nom de fichier -> événements en cours d'écriture
+        self._segments = OrderedDict()   # nom de fichier -> Segment, du moins au plus récemment utilisé
+        self._meta = {}                  # nom de fichier -> (nombre d'événements, lots d'origine)
+        self._sequence = 0
+        self._flush_due = threading.Event()
+        threading.Thread(target=self._flush_loop, name="event-log-flush", daemon=True).start()
+        atexit.register(self.flush)
+
+    @contextmanager
+    def _file_lock(self):
+        """Verrou entre processus pour l'écriture et la fusion des segments."""
+        with open(os.path.join(self.directory, ".lock"), "ab") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def record(self, kind, show, order, status=None, previous=None, user=None, at=None):
+        """
+        Ajoute un événement.
+
+        Args:
+            kind (str): "created", "status" ou "deleted"
+            order (dict ou Series): commande concernée (Booth #, Section, Item, Color)
+            status (str): statut après l'événement (celui de la commande si absent)
+            previous (str): statut avant un changement de statut
+            user (str): initiales de l'auteur (celles de la commande pour une création)
+            at (float): horodatage (secondes), maintenant par défaut
+        """
+        event = {
+            "time": int((at if at is not None else time.time()) * 1000),
+            "kind": kind,
+            "show": show,
+            "booth": str(order.get("Booth #", "") or "").strip(),
+            "section": str(order.get("Section", "") or "").strip(),
+            "item": str(order.get("Item", "") or "").strip(),
+            "color": str(order.get("Color", "") or "").strip(),
+            "status": str(status if status is not None else order.get("Status", "") or "").strip(),
+            "previous": str(previous or "").strip(),
+            "user": str(user or (order.get("User", "") if kind == "created" else "") or "").strip(),
+        }
+        with self._lock:
+            self._pending.append(event)
+            full = len(self._pending) >= FLUSH_EVENTS
+        if full:
+            self.flush()
+        else:
+            self._flush_due.set()
+
+    def _flush_loop(self):
+        while True:
+            self._flush_due.wait()
+            time.sleep(FLUSH_SECONDS)
+            self._flush_due.clear()
+            self.flush()
+
+    def _name(self, t_min, t_max):
+        with self._lock:
+            self._sequence += 1
+            return f"events-{t_min}-{t_max}-{os.getpid()}-{self._sequence}.npz"
+
+    def flush(self):
+        """
+        Écrit les événements en attente dans un nouveau segment. Le verrou n'est tenu
+        que pour prendre les événements : l'encodage et l'écriture se font sans lui,
+        les requêtes voient les événements en cours d'écriture.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            events, self._pending = self._pending, []
+            times = [event["time"] for event in events]
+            name = self._name(min(times), max(times))
+            self._in_flight[name] = events
+
+        segment = Segment.from_events(events, batch=name)
+        try:
+            with self._file_lock():
+                segment.save(os.path.join(self.directory, name))
+        except OSError as e:
+            print(f"Event log write failed: {e}")
+            with self._lock:
+                del self._in_flight[name]
+                self._pending = events + self._pending
+            return
+        with self._lock:
+            del self._in_flight[name]
+            self._remember(name, segment)
+        if len(self._segment_files()) > COMPACT_SEGMENTS:
+            self.compact()
+
+    def _segment_files(self):
+        return sorted(os.path.basename(path) for path in glob.glob(os.path.join(self.directory, "events-*.npz")))
+
+    @staticmethod
+    def _time_range(name):
+        _, t_min, t_max, _ = name.split("-", 3)
+        return int(t_min), int(t_max)
+
+    def _remember(self, name, segment):
+        """Garde un segment parmi les derniers utilisés (appelé sous self._lock)."""
+        self._segments[name] = segment
+        self._segments.move_to_end(name)
+        self._meta[name] = (segment.rows, segment.batches())
+        while len(self._segments) > CACHED_SEGMENTS:
+            self._segments.popitem(last=False)
+
+    def _forget(self, names):
+        """Oublie les segments qui ne sont plus sur le disque (appelé sous self._lock)."""
+        for name in [name for name in self._meta if name not in names]:
+            del self._meta[name]
+            self._segments.pop(name, None)
+
+    def _segment(self, name, remember=True):
+        """Segment en mémoire ou lu depuis le disque (None s'il vient d'être fusionné ailleurs)."""
+        with self._lock:
+            segment = self._segments.get(name)
+            if segment is not None:
+                self._segments.move_to_end(name)
+                return segment
+        try:
+            segment = Segment.load(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if remember:
+                self._remember(name, segment)
+            else:
+                self._meta[name] = (segment.rows, segment.batches())
+        return segment
+
+    def _segment_meta(self, name):
+        """(nombre d'événements, lots d'origine) d'un segment, sans décompresser ses autres colonnes."""
+        with self._lock:
+            if name in self._meta:
+                return self._meta[name]
+        try:
+            with np.load(os.path.join(self.directory, name), allow_pickle=False) as data:
+                rows = len(data["time"])
+                batches = (set(data[f"{BATCH_COLUMN}_values"].tolist()) if BATCH_COLUMN in data.files
+                           else {name})
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._meta[name] = (rows, batches)
+        return rows, batches
+
+    def compact(self):
+        """
+        Fusionne les petits segments, par groupes d'au plus SEGMENT_ROWS événements :
+        seuls les segments du groupe en cours sont en mémoire.
+        """
+        with self._file_lock():
+            groups, rows = [[]], 0
+            for name in self._segment_files():
+                meta = self._segment_meta(name)
+                if meta is None or meta[0] >= SEGMENT_ROWS // 2:
+                    continue
+                if rows + meta[0] > SEGMENT_ROWS:
+                    groups.append([])
+                    rows = 0
+                groups[-1].append(name)
+                rows += meta[0]
+
+            for names in groups:
+                if len(names) < 2:
+                    continue
+                segments = [self._segment(name, remember=False) for name in names]
+                merged = Segment.merge([segment for segment in segments if segment is not None])
+                name = self._name(merged.t_min, merged.t_max)
+                merged.save(os.path.join(self.directory, name))
+                for old in names:
+                    os.remove(os.path.join(self.directory, old))
+                with self._lock:
+                    self._forget(set(self._meta) - set(names))
+                    self._meta[name] = (merged.rows, merged.batches())
+
+    def query(self, show=None, booth=None, item=None, color=None, user=None, start=None, end=None, kinds=None):
+        """
+        Événements correspondant aux critères, du plus ancien au plus récent.
+
+        Stand, article et couleur sont comparés après normalisation (casse,
+        espaces). `start` et `end` sont des datetime (fin exclue).
+        """
+        start_ms = _to_ms(start) if start is not None else None
+        end_ms = _to_ms(end) if end is not None else None
+        names = self._segment_files()
+        with self._lock:
+            events = self._memory_events(names)
+            # Segments fusionnés par un autre processus depuis la dernière lecture
+            self._forget(set(names))
+        pending = Segment.from_events(events) if events else None
+
+        frames = []
+        segments = [self._segment(name) for name in names
+                    if (start_ms is None or self._time_range(name)[1] >= start_ms)
+                    and (end_ms is None or self._time_range(name)[0] < end_ms)]
+        for segment in [segment for segment in segments if segment is not None] + ([pending] if pending else []):
+            mask = segment.mask(start=start_ms, end=end_ms, kinds=kinds, show=show, booth=booth, item=item,
+                                color=color, user=user)
+            if mask.any():
+                frames.append(segment.frame(mask))
+        if not frames:
+            return pd.DataFrame(columns=list(COLUMN_NAMES.values()))
+        return pd.concat(frames, ignore_index=True).sort_values("Time", kind="stable").reset_index(drop=True)
+
+    def _memory_events(self, names):
+        """Événements pas encore lisibles sur le disque : en attente et en cours d'écriture (sous self._lock)."""
+        events = [event for name, batch in self._in_flight.items() if name not in names for event in batch]
+        return events + self._pending
+
+    def read_new(self, show, seen=frozenset()):
+        """
+        Événements d'un salon qu'un lecteur n'a pas encore lus, sans critère de temps.
+
+        `seen` est l'ensemble des lots déjà lus, retourné par l'appel précédent.
+        Les événements pas encore écrits sont retournés à chaque appel : le lecteur
+        doit pouvoir relire un événement sans effet.
+
+        Returns:
+            tuple: (DataFrame des événements, du plus ancien au plus récent ; lots lus)
+        """
+        names = self._segment_files()
+        with self._lock:
+            events = self._memory_events(names)
+            in_flight = [name for name in self._in_flight if name not in names]
+
+        seen = set(seen) | set(in_flight)
+        frames = []
+        for name in names:
+            meta = self._segment_meta(name)
+            if meta is None or meta[1] <= seen:
+                continue
+            segment = self._segment(name)
+            if segment is None:
+                # Fusionné entre-temps : ses lots seront lus dans le segment fusionné
+                continue
+            mask = segment.batch_mask(meta[1] - seen) & segment.mask(show=show)
+            if mask.any():
+                frames.append(segment.frame(mask))
+            seen |= meta[1]
+        if events:
+            pending = Segment.from_events(events)
+            mask = pending.mask(show=show)
+            if mask.any():
+                frames.append(pending.frame(mask))
+        if not frames:
+            return pd.DataFrame(columns=list(COLUMN_NAMES.values())), seen
+        return pd.concat(frames, ignore_index=True).sort_values("Time", kind="stable").reset_index(drop=True), seen
+
+    def order_history(self, show, booth, item, color=None):
+        """Historique d'une commande (stand + article, et couleur si indiquée)."""
+        return self.query(show=show, booth=booth, item=item, color=color)
+
+
+@st.cache_resource
+def get_event_log():
+    """Retourne le journal d'événements du processus."""
+    return EventLog()
@@ -0,0 +1,334 @@
+import bisect
+import json
+import os
+import re
+import struct
+import threading
+from contextlib import contextmanager
+
+import streamlit as st
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité au processus
+    fcntl = None
+
+
+FEEDBACK_LOG = "forum_feedback.log"
+FEEDBACK_INDEX = "forum_feedback.idx"
+
+# Fichier de verrou entre processus : jamais remplacé, contrairement au journal et
+# à l'index que la compaction réécrit
+FEEDBACK_LOCK = "forum_feedback.lock"
+
+# Ancien fichier, importé dans le journal au premier démarrage
+DATA_FILE = "forum_feedback.json"
+
+# Entrée d'index : type (0 = message, 1 = réponse), id du message, position dans le journal
+INDEX_ENTRY = struct.Struct("<BQQ")
+MESSAGE, REPLY = 0, 1
+
+# Le journal est compacté quand il contient autant d'enregistrements de réponse
+COMPACT_AFTER_REPLIES = 200
+
+
+class FeedbackSearchIndex:
+    """Index plein texte (nom, message, réponse) et filtres des messages du forum."""
+
+    def __init__(self):
+        self.tokens = {}         # mot -> ids des messages qui le contiennent
+        self.answered = set()    # ids des messages qui ont une réponse
+        self.timestamps = []     # horodatage de chaque message, dans l'ordre des ids
+        self._sorted_tokens = None
+
+    @staticmethod
+    def tokenize(text):
+        return set(re.findall(r"\w+", (text or "").lower()))
+
+    def _add_text(self, message_id, text):
+        for token in self.tokenize(text):
+            self.tokens.setdefault(token, set()).add(message_id)
+        self._sorted_tokens = None
+
+    def add_message(self, message_id, record):
+        self.timestamps.append(record.get("timestamp", ""))
+        self._add_text(message_id, f"{record.get('name', '')} {record.get('message', '')}")
+        if record.get("reply"):
+            self.add_reply(message_id, record["reply"])
+
+    def add_reply(self, message_id, reply):
+        self.answered.add(message_id)
+        self._add_text(message_id, reply)
+
+    def _matching(self, word):
+        """Ids des messages contenant un mot commençant par `word`."""
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self.tokens)
+        ids = set()
+        i = bisect.bisect_left(self._sorted_tokens, word)
+        while i < len(self._sorted_tokens) and self._sorted_tokens[i].startswith(word):
+            ids |= self.tokens[self._sorted_tokens[i]]
+            i += 1
+        return ids
+
+    def search(self, query=None, unanswered=False, start_date=None, end_date=None):
+        """
+        Retourne les ids des messages correspondant aux critères, du plus récent au plus ancien.
+
+        Les dates sont des chaînes "YYYY-MM-DD" (bornes incluses).
+        """
+        # Les messages sont ajoutés dans l'ordre chronologique : la plage de dates
+        # correspond à une plage d'ids
+        lo = bisect.bisect_left(self.timestamps, start_date) if start_date else 0
+        hi = bisect.bisect_left(self.timestamps, end_date + "~") if end_date else len(self.timestamps)
+
+        words = self.tokenize(query) if query else set()
+        if not words and not unanswered:
+            return range(hi - 1, lo - 1, -1)
+
+        ids = None
+        for word in words:
+            matches = self._matching(word)
+            ids = matches if ids is None else ids & matches
+        if ids is None:
+            ids = set(range(lo, hi))
+        if unanswered:
+            ids = ids - self.answered
+        return sorted((i for i in ids if lo <= i < hi), reverse=True)
+
+
+class FeedbackLog:
+    """
+    Messages du forum dans un journal en ajout seul (une ligne JSON par enregistrement).
+
+    Chaque message reçoit un id stable. Les réponses sont ajoutées comme des
+    enregistrements séparés qui référencent l'id du message. Un index binaire à
+    entrées de taille fixe donne la position de chaque enregistrement, ce qui
+    permet de lire directement les messages récents. Écrire coûte O(1) quelle que
+    soit la taille de l'historique.
+    """
+
+    def __init__(self, log_path=FEEDBACK_LOG, index_path=FEEDBACK_INDEX, legacy_file=DATA_FILE,
+                 lock_path=FEEDBACK_LOCK):
+        self.log_path = log_path
+        self.index_path = index_path
+        self.lock_path = lock_path
+        self._lock = threading.RLock()
+        self._message_offsets = []  # position de chaque message, dans l'ordre des ids
+        self._reply_offsets = {}    # id du message -> position de la dernière réponse
+        self._reply_records = 0
+        self._index_size = 0
+        self._index_inode = None
+        self.search_index = FeedbackSearchIndex()
+
+        if not os.path.exists(self.log_path) and os.path.exists(legacy_file):
+            self._import_json(legacy_file)
+        with self._file_lock(shared=True):
+            self._refresh()
+
+    @contextmanager
+    def _file_lock(self, shared=False):
+        """
+        Verrou entre processus (et entre threads via self._lock) ; partagé pour les
+        lectures. Il porte sur un fichier à part : la compaction remplace le journal
+        et l'index, un verrou pris sur eux ne protégerait plus le nouveau fichier.
+        """
+        with self._lock:
+            with open(self.lock_path, "ab") as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Lit les entrées d'index ajoutées depuis la dernière lecture (éventuellement par un autre processus)."""
+        if not os.path.exists(self.index_path):
+            return
+        stat = os.stat(self.index_path)
+        if stat.st_ino != self._index_inode:
+            # Index recréé (compaction) : tout relire
+            self._message_offsets = []
+            self._reply_offsets = {}
+            self._reply_records = 0
+            self._index_size = 0
+            self._index_inode = stat.st_ino
+            self.search_index = FeedbackSearchIndex()
+        if stat.st_size <= self._index_size:
+            return
+
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_size)
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_ENTRY.size
+        entries = list(INDEX_ENTRY.iter_unpack(data[:usable]))
+        if not entries:
+            return
+        # Les nouveaux enregistrements sont à la fin du journal : une seule lecture
+        # à partir du premier d'entre eux
+        start = min(offset for _, _, offset in entries)
+        with open(self.log_path, "rb") as log:
+            log.seek(start)
+            tail = log.read()
+        for kind, message_id, offset in entries:
+            end = tail.find(b"\n", offset - start)
+            record = json.loads(tail[offset - start:end if end >= 0 else None].decode("utf-8"))
+            if kind == MESSAGE:
+                self._message_offsets.append(offset)
+                self.search_index.add_message(message_id, record)
+            else:
+                self._reply_offsets[message_id] = offset
+                self._reply_records += 1
+                self.search_index.add_reply(message_id, record["reply"])
+        self._index_size += usable
+
+    def _append(self, kind, message_id, record):
+        """Ajoute un enregistrement au journal puis son entrée à l'index."""
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.log_path, "ab") as log:
+            offset = log.seek(0, os.SEEK_END)
+            log.write(line)
+            log.flush()
+            os.fsync(log.fileno())
+        with open(self.index_path, "ab") as index:
+            index.write(INDEX_ENTRY.pack(kind, message_id, offset))
+
+    def _read(self, offset):
+        with open(self.log_path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline().decode("utf-8"))
+
+    def _import_json(self, legacy_file):
+        """Importe les messages de l'ancien fichier forum_feedback.json."""
+        try:
+            with open(legacy_file, "r", encoding="utf-8") as f:
+                messages = json.load(f)
+        except Exception as e:
+            print(f"Erreur lors de l'import de {legacy_file}: {e}")
+            return
+        with self._file_lock():
+            for message_id, msg in enumerate(messages):
+                self._append(MESSAGE, message_id, {
+                    "type": "message",
+                    "id": message_id,
+                    "name": msg.get("name", ""),
+                    "email": msg.get("email", ""),
+                    "message": msg.get("message", ""),
+                    "timestamp": msg.get("timestamp", ""),
+                    "reply": msg.get("reply"),
+                })
+
+    def add_message(self, name, email, message, timestamp):
+        """Ajoute un message et retourne son id."""
+        with self._file_lock():
+            self._refresh()
+            message_id = len(self._message_offsets)
+            self._append(MESSAGE, message_id, {
+                "type": "message",
+                "id": message_id,
+                "name": name,
+                "email": email,
+                "message": message,
+                "timestamp": timestamp,
+                "reply": None,
+            })
+            self._refresh()
+        return message_id
+
+    def add_reply(self, message_id, reply, timestamp):
+        """Ajoute la réponse de l'administrateur à un message."""
+        with self._file_lock():
+            self._refresh()
+            if not 0 <= message_id < len(self._message_offsets):
+                raise KeyError(f"Message {message_id} introuvable")
+            self._append(REPLY, message_id, {
+                "type": "reply",
+                "id": message_id,
+                "reply": reply,
+                "timestamp": timestamp,
+            })
+            self._refresh()
+            if self._reply_records >= COMPACT_AFTER_REPLIES:
+                self._compact()
+
+    def count(self):
+        """Nombre de messages."""
+        with self._file_lock(shared=True):
+            self._refresh()
+            return len(self._message_offsets)
+
+    def get(self, message_id):
+        """Retourne un message (avec sa réponse éventuelle)."""
+        with self._file_lock(shared=True):
+            self._refresh()
+            return self._get(message_id)
+
+    def _get(self, message_id):
+        message = self._read(self._message_offsets[message_id])
+        reply_offset = self._reply_offsets.get(message_id)
+        if reply_offset is not None:
+            message["reply"] = self._read(reply_offset)["reply"]
+        return message
+
+    def recent(self, limit=None, start=0):
+        """
+        Retourne les messages du plus récent au plus ancien.
+
+        Args:
+            limit (int): nombre de messages à retourner (tous si None)
+            start (int): nombre de messages récents à sauter
+        """
+        with self._file_lock(shared=True):
+            self._refresh()
+            newest = len(self._message_offsets) - 1 - start
+            oldest = -1 if limit is None else max(newest - limit, -1)
+            return [self._get(message_id) for message_id in range(newest, oldest, -1)]
+
+    def search(self, query=None, unanswered=False, start_date=None, end_date=None, page=0, page_size=20):
+        """
+        Retourne une page de messages (du plus récent au plus ancien) et le nombre
+        total de messages correspondant aux critères. Seuls les messages de la
+        page demandée sont lus dans le journal.
+        """
+        with self._file_lock(shared=True):
+            self._refresh()
+            ids = self.search_index.search(query, unanswered, start_date, end_date)
+            visible = ids[page * page_size:(page + 1) * page_size]
+            return [self._get(message_id) for message_id in visible], len(ids)
+
+    def compact(self):
+        """Réécrit le journal en intégrant les réponses aux messages."""
+        with self._file_lock():
+            self._refresh()
+            self._compact()
+
+    def _compact(self):
+        messages = [self._get(message_id) for message_id in range(len(self._message_offsets))]
+        log_tmp, index_tmp = self.log_path + ".tmp", self.index_path + ".tmp"
+        offsets = []
+        with open(log_tmp, "wb") as log, open(index_tmp, "wb") as index:
+            for message in messages:
+                offsets.append(log.tell())
+                log.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+                index.write(INDEX_ENTRY.pack(MESSAGE, message["id"], offsets[-1]))
+            log.flush()
+            os.fsync(log.fileno())
+        # Le verrou exclusif est tenu pendant les deux remplacements : les autres
+        # processus ne voient jamais le nouveau journal avec l'ancien index, puis
+        # voient un nouvel index (inode différent) et relisent tout
+        os.replace(log_tmp, self.log_path)
+        os.replace(index_tmp, self.index_path)
+        # Ici, les messages et réponses indexés sont les mêmes : seules les positions changent
+        self._message_offsets = offsets
+        self._reply_offsets = {}
+        self._reply_records = 0
+        self._index_size = len(offsets) * INDEX_ENTRY.size
+        self._index_inode = os.stat(self.index_path).st_ino
+
+
+@st.cache_resource
+def get_feedback_log():
+    """Retourne le journal du forum du processus."""
+    return FeedbackLog()
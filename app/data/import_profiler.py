@@ -0,0 +1,112 @@
+"""
+Mesure du temps d'import des modules, par page.
+
+Activé avec la variable d'environnement ORDERS_APP_IMPORT_PROFILE=1. Les imports
+faits dans un bloc `with track_imports("Page"):` sont chronométrés (temps propre et
+cumulé, comme `python -X importtime`) et regroupés par page. Ce module n'importe
+que la bibliothèque standard pour pouvoir être chargé avant tout le reste.
+"""
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+ENABLED = os.environ.get("ORDERS_APP_IMPORT_PROFILE") == "1"
+
+_original_import = builtins.__import__
+_state = threading.local()
+_reports = {}   # page -> {module: (temps propre, temps cumulé)} en secondes
+_lock = threading.Lock()
+
+
+def _absolute_name(name, globals, level):
+    if level == 0 or not globals:
+        return name
+    package = globals.get("__package__") or ""
+    base = package.rsplit(".", level - 1)[0] if level > 1 else package
+    return f"{base}.{name}" if name else base
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    page = getattr(_state, "page", None)
+    module = _absolute_name(name, globals, level)
+    if page is None or module in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _state.stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        cumulative = time.perf_counter() - start
+        children = _state.stack.pop()
+        if _state.stack:
+            _state.stack[-1] += cumulative
+        with _lock:
+            _reports.setdefault(page, {})[module] = (cumulative - children, cumulative)
+
+
+@contextmanager
+def track_imports(page):
+    """Chronomètre les nouveaux imports faits dans le bloc et les attribue à `page`."""
+    if not ENABLED:
+        yield
+        return
+
+    if builtins.__import__ is not _timed_import:
+        builtins.__import__ = _timed_import
+    previous = getattr(_state, "page", None)
+    _state.page = page
+    _state.stack = []
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _state.page = previous
+        elapsed = time.perf_counter() - start
+        if elapsed > 0.001:
+            print(format_report(page, top=10))
+
+
+def import_report(page=None, top=None):
+    """
+    Retourne le rapport d'import sous forme de liste de dicts, trié par temps cumulé.
+
+    Args:
+        page (str): page à afficher, ou None pour toutes les pages
+        top (int): nombre maximal de modules par page
+    """
+    with _lock:
+        pages = {page: _reports.get(page, {})} if page else dict(_reports)
+    rows = []
+    for name, modules in pages.items():
+        ordered = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+        for module, (self_time, cumulative) in ordered[:top]:
+            rows.append({
+                "Page": name,
+                "Module": module,
+                "Self (ms)": round(self_time * 1000, 1),
+                "Cumulative (ms)": round(cumulative * 1000, 1),
+            })
+    return rows
+
+
+def page_totals():
+    """Retourne le temps total passé en imports pour chaque page (ms)."""
+    with _lock:
+        return {
+            page: round(sum(self_time for self_time, _ in modules.values()) * 1000, 1)
+            for page, modules in _reports.items()
+        }
+
+
+def format_report(page, top=10):
+    """Formate le rapport d'une page comme la sortie de `python -X importtime`."""
+    lines = [f"import time ({page}): self [ms] | cumulative | imported package"]
+    for row in import_report(page, top=top):
+        lines.append(f"import time: {row['Self (ms)']:>9} | {row['Cumulative (ms)']:>10} | {row['Module']}")
+    lines.append(f"import time ({page}) total: {page_totals().get(page, 0.0)} ms")
+    return "\n".join(lines)
@@ -0,0 +1,205 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data.show_cache import get_show_cache
+
+
+# Types de commande qui sortent du stock, et ceux qui y font revenir des articles
+OUTGOING_TYPES = {"new order", "missing item"}
+RETURNED_TYPES = {"remove"}
+
+
+def _signed_quantity(quantity, order_type, status):
+    """Quantité d'une commande vue du stock : positive si elle en sort, négative si elle y revient."""
+    if str(status).strip().lower() == "cancelled":
+        return 0.0
+    kind = str(order_type).strip().lower()
+    qty = pd.to_numeric(quantity, errors="coerce")
+    qty = 0.0 if pd.isna(qty) else float(qty)
+    if kind in OUTGOING_TYPES:
+        return qty
+    if kind in RETURNED_TYPES:
+        return -qty
+    return 0.0
+
+
+class InventoryEngine:
+    """
+    Quantités commandées, endommagées et disponibles par article, calculées localement.
+
+    Le calcul complet (groupby vectorisé) n'a lieu qu'à chaque nouvelle version
+    des données ; chaque commande ajoutée, supprimée ou modifiée met ensuite à jour
+    son article en O(1), sans attendre les formules de la feuille. Les
+    réservations pas encore écrites dans la feuille sont réappliquées après
+    chaque recalcul complet.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.items = []
+        self._positions = {}
+        self.starting = np.zeros(0)
+        self.damaged = np.zeros(0)
+        self.ordered = np.zeros(0)
+        self.version = 0
+        self._reservations = {}  # clé de soumission -> (article, quantité), en attente d'écriture
+        self._data_versions = None
+        self._loaded_at = 0.0
+
+    def sync(self, orders_df, inventory_df):
+        """Recalcule tout si les commandes ou l'inventaire correspondent à une nouvelle version."""
+        data_versions = (orders_df.attrs.get("data_version"), inventory_df.attrs.get("data_version"))
+        loaded_at = max(orders_df.attrs.get("loaded_at", 0.0), inventory_df.attrs.get("loaded_at", 0.0))
+        with self._lock:
+            if None not in data_versions and data_versions == self._data_versions:
+                return self
+            if loaded_at < self._loaded_at:
+                return self
+
+            if inventory_df.empty or "Items" not in inventory_df.columns:
+                items = pd.Series([], dtype=object)
+            else:
+                items = inventory_df["Items"].dropna().astype(str).str.strip()
+            self.items = items.tolist()
+            self._positions = {item: i for i, item in enumerate(self.items)}
+
+            def column(name):
+                if name not in inventory_df.columns:
+                    return np.zeros(len(self.items))
+                values = pd.to_numeric(inventory_df.loc[items.index, name], errors="coerce")
+                return values.fillna(0).to_numpy(dtype=float)
+
+            self.starting = column("Starting Quantity")
+            self.damaged = column("Damaged Items")
+            self.ordered = self._ordered_by_item(orders_df)
+            # Commandes réservées par d'autres sessions, absentes de la feuille tant qu'elles ne sont pas écrites
+            for item, quantity in self._reservations.values():
+                self._apply(item, quantity)
+
+            self._data_versions = data_versions
+            self._loaded_at = loaded_at
+            self.version += 1
+        return self
+
+    def _ordered_by_item(self, orders_df):
+        """Somme vectorisée des quantités commandées, alignée sur la liste des articles."""
+        if orders_df.empty or "Item" not in orders_df.columns or "Quantity" not in orders_df.columns:
+            return np.zeros(len(self.items))
+
+        quantity = pd.to_numeric(orders_df["Quantity"], errors="coerce").fillna(0).to_numpy(dtype=float)
+        kind = (orders_df["Type"].astype(str).str.strip().str.lower()
+                if "Type" in orders_df.columns else pd.Series("new order", index=orders_df.index))
+        sign = np.where(kind.isin(OUTGOING_TYPES), 1.0, np.where(kind.isin(RETURNED_TYPES), -1.0, 0.0))
+        if "Status" in orders_df.columns:
+            cancelled = orders_df["Status"].astype(str).str.strip().str.lower().eq("cancelled").to_numpy()
+            sign = np.where(cancelled, 0.0, sign)
+
+        totals = (pd.Series(quantity * sign, index=orders_df.index)
+                  .groupby(orders_df["Item"].astype(str).str.strip())
+                  .sum())
+        # Copie modifiable : to_numpy peut retourner une vue en lecture seule (copy-on-write)
+        return np.array(totals.reindex(self.items, fill_value=0.0), dtype=float)
+
+    def _apply(self, item, delta):
+        position = self._positions.get(str(item).strip())
+        if position is None or delta == 0:
+            return
+        self.ordered[position] += delta
+        self.version += 1
+
+    def add_order(self, order):
+        """Prend en compte une nouvelle commande (dict)."""
+        with self._lock:
+            self._apply(order.get("Item"), _signed_quantity(order.get("Quantity"), order.get("Type", "New Order"),
+                                                            order.get("Status")))
+
+    def remove_order(self, order):
+        """Retire une commande supprimée (dict ou ligne)."""
+        with self._lock:
+            self._apply(order.get("Item"), -_signed_quantity(order.get("Quantity"), order.get("Type", "New Order"),
+                                                             order.get("Status")))
+
+    def update_status(self, order, new_status):
+        """Met à jour le stock quand le statut d'une commande change (annulation ou réactivation)."""
+        with self._lock:
+            before = _signed_quantity(order.get("Quantity"), order.get("Type", "New Order"), order.get("Status"))
+            after = _signed_quantity(order.get("Quantity"), order.get("Type", "New Order"), new_status)
+            self._apply(order.get("Item"), after - before)
+
+    def reserve(self, order, key, allow_over=False):
+        """
+        Réserve le stock d'une commande avant son envoi à la feuille.
+
+        La vérification et la réservation se font sous le même verrou : deux sessions
+        qui commandent le dernier article en même temps ne peuvent pas toutes les deux
+        réussir. La réservation est identifiée par `key`, la clé de soumission déjà
+        réservée dans le SubmissionLedger (unique tant qu'elle est en cours), à passer
+        ensuite à confirm ou release. Retourne (réservé, stock restant) ; le stock
+        restant est None pour un article absent de l'inventaire, qui n'est pas contrôlé.
+        """
+        with self._lock:
+            item = str(order.get("Item")).strip()
+            position = self._positions.get(item)
+            quantity = _signed_quantity(order.get("Quantity"), order.get("Type", "New Order"), order.get("Status"))
+            if position is None:
+                return True, None
+            remaining = self.starting[position] - self.ordered[position] - self.damaged[position]
+            if quantity > 0 and quantity > remaining and not allow_over:
+                return False, remaining
+            self._apply(item, quantity)
+            self._reservations[key] = (item, quantity)
+            return True, remaining - quantity
+
+    def confirm(self, key):
+        """Indique que la commande réservée est écrite dans la feuille : elle n'est plus réappliquée."""
+        with self._lock:
+            self._reservations.pop(key, None)
+
+    def release(self, key):
+        """Annule la réservation d'une commande dont l'envoi a échoué."""
+        with self._lock:
+            reservation = self._reservations.pop(key, None)
+            if reservation is not None:
+                item, quantity = reservation
+                self._apply(item, -quantity)
+
+    def available(self, item):
+        """Quantité disponible d'un article, ou None s'il n'est pas dans l'inventaire."""
+        with self._lock:
+            position = self._positions.get(str(item).strip())
+            if position is None:
+                return None
+            return self.starting[position] - self.ordered[position] - self.damaged[position]
+
+    def frame(self):
+        """Retourne les quantités par article sous forme de DataFrame."""
+        with self._lock:
+            return pd.DataFrame({
+                "Items": self.items,
+                "Starting Quantity": self.starting.copy(),
+                "Ordered items": self.ordered.copy(),
+                "Damaged Items": self.damaged.copy(),
+                "Available Quantity": self.starting - self.ordered - self.damaged,
+            })
+
+    def apply_to(self, inventory_df):
+        """
+        Retourne une copie de inventory_df dont les colonnes Ordered items et
+        Available Quantity sont remplacées par les valeurs calculées localement.
+        """
+        if inventory_df.empty or "Items" not in inventory_df.columns:
+            return inventory_df
+        local = self.frame().set_index("Items")
+        local = local[~local.index.duplicated(keep="last")]
+        keys = inventory_df["Items"].astype(str).str.strip()
+        live = inventory_df.copy()
+        for column in ["Ordered items", "Available Quantity"]:
+            live[column] = keys.map(local[column]).where(inventory_df["Items"].notna())
+        return live
+
+
+def get_inventory_engine(show):
+    """Retourne le moteur d'inventaire partagé (toutes sessions) d'un salon."""
+    return get_show_cache().resource(show, "inventory", InventoryEngine)
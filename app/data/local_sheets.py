@@ -0,0 +1,212 @@
+"""
+Classeurs Google Sheets simulés en mémoire, pour les tests et le développement.
+
+Activés avec ORDERS_APP_SHEETS=local : get_client_pool() retourne alors un
+LocalSheetsPool à la place du pool Google. Le contenu initial peut être lu dans
+un fichier JSON (ORDERS_APP_LOCAL_SHEETS) de la forme
+{"<sheet_id>": {"<feuille>": [[en-tête...], [ligne...], ...]}}.
+
+Seule la partie de l'API gspread utilisée par l'application est reproduite. Une
+latence (secondes) peut être ajoutée à chaque appel pour simuler le réseau.
+"""
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class LocalCell:
+    def __init__(self, row, col, value):
+        self.row = row
+        self.col = col
+        self.value = value
+
+
+class LocalResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class LocalWorksheet:
+    def __init__(self, spreadsheet, title, rows):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self._rows = [list(row) for row in rows]
+
+    @property
+    def row_count(self):
+        return max(len(self._rows), 1)
+
+    @property
+    def col_count(self):
+        return max((len(row) for row in self._rows), default=1)
+
+    def get_all_values(self, **kwargs):
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            return [[str(value) for value in row] for row in self._rows]
+
+    def get_all_records(self, **kwargs):
+        values = self.get_all_values()
+        if not values:
+            return []
+        header = values[0]
+        return [dict(zip(header, row + [""] * (len(header) - len(row)))) for row in values[1:]]
+
+    def find(self, query):
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            for r, row in enumerate(self._rows, 1):
+                for c, value in enumerate(row, 1):
+                    if str(value) == str(query):
+                        return LocalCell(r, c, value)
+        return None
+
+    def update_cell(self, row, col, value):
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            self._set(row, col, value)
+            self.spreadsheet._touch()
+
+    def _set(self, row, col, value):
+        while len(self._rows) < row:
+            self._rows.append([])
+        cells = self._rows[row - 1]
+        while len(cells) < col:
+            cells.append("")
+        cells[col - 1] = value
+
+    def batch_update(self, data, **kwargs):
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            for entry in data:
+                match = re.fullmatch(r"([A-Z]+)(\d+)", entry["range"].split("!")[-1].replace("$", ""))
+                letters, row = match.groups()
+                col = 0
+                for letter in letters:
+                    col = col * 26 + ord(letter) - ord("A") + 1
+                for r, values in enumerate(entry["values"]):
+                    for c, value in enumerate(values):
+                        self._set(int(row) + r, col + c, value)
+            self.spreadsheet._touch()
+
+    def append_row(self, values, **kwargs):
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            self._rows.append(list(values))
+            self.spreadsheet._touch()
+
+    def delete_rows(self, start_index, end_index=None):
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            end_index = end_index or start_index
+            del self._rows[start_index - 1:end_index]
+            self.spreadsheet._touch()
+
+
+class LocalSpreadsheet:
+    def __init__(self, client, sheet_id, worksheets):
+        self.client = client
+        self.id = sheet_id
+        self._lock = threading.RLock()
+        self._worksheets = {title: LocalWorksheet(self, title, rows) for title, rows in worksheets.items()}
+        self.modified_time = datetime.now(timezone.utc).isoformat()
+
+    def _call(self):
+        self.client._call()
+
+    def _touch(self):
+        self.modified_time = datetime.now(timezone.utc).isoformat()
+
+    def worksheets(self):
+        self._call()
+        return list(self._worksheets.values())
+
+    def worksheet(self, title):
+        self._call()
+        if title not in self._worksheets:
+            raise KeyError(f"Feuille introuvable: {title}")
+        return self._worksheets[title]
+
+    def add_worksheet(self, title, rows=()):
+        with self._lock:
+            self._worksheets[title] = LocalWorksheet(self, title, rows)
+            self._touch()
+            return self._worksheets[title]
+
+    def _range_values(self, name):
+        if len(name) > 1 and name[0] == name[-1] == "'":
+            name = name[1:-1].replace("''", "'")
+        worksheet = self._worksheets[name]
+        with self._lock:
+            return [list(row) for row in worksheet._rows]
+
+    def values_get(self, range_name, params=None):
+        self._call()
+        return {"range": range_name, "values": self._range_values(range_name)}
+
+    def values_batch_get(self, ranges, params=None):
+        self._call()
+        return {"valueRanges": [{"range": name, "values": self._range_values(name)} for name in ranges]}
+
+
+class LocalSheetsClient:
+    """Client gspread simulé : classeurs en mémoire, latence réglable."""
+
+    def __init__(self, spreadsheets=None, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._spreadsheets = {
+            sheet_id: LocalSpreadsheet(self, sheet_id, worksheets)
+            for sheet_id, worksheets in (spreadsheets or {}).items()
+        }
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def create(self, sheet_id, worksheets=None):
+        """Crée (ou remplace) un classeur simulé."""
+        self._spreadsheets[sheet_id] = LocalSpreadsheet(self, sheet_id, worksheets or {})
+        return self._spreadsheets[sheet_id]
+
+    def open_by_key(self, sheet_id):
+        self._call()
+        if sheet_id not in self._spreadsheets:
+            raise KeyError(f"Classeur introuvable: {sheet_id}")
+        return self._spreadsheets[sheet_id]
+
+    def request(self, method, url, params=None, **kwargs):
+        """Seule la requête Drive des métadonnées (modifiedTime) est simulée."""
+        self._call()
+        sheet_id = url.rstrip("/").rsplit("/", 1)[-1]
+        return LocalResponse({"modifiedTime": self.open_by_key(sheet_id).modified_time})
+
+
+class LocalSheetsPool:
+    """Remplace SheetsClientPool quand ORDERS_APP_SHEETS=local."""
+
+    def __init__(self, spreadsheets=None, latency=0.0):
+        self._client = LocalSheetsClient(spreadsheets, latency)
+
+    def client(self):
+        return self._client
+
+
+def load_local_pool():
+    """Crée le pool simulé à partir des variables d'environnement."""
+    spreadsheets = {}
+    path = os.environ.get("ORDERS_APP_LOCAL_SHEETS")
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            spreadsheets = json.load(f)
+    latency = float(os.environ.get("ORDERS_APP_LOCAL_LATENCY", "0") or 0)
+    return LocalSheetsPool(spreadsheets, latency)
@@ -0,0 +1,131 @@
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from data.show_cache import get_show_cache, session_alive
+
+
+def value_size(value, _depth=0):
+    """
+    Estime la mémoire (octets) d'une valeur de session_state : DataFrame en
+    profondeur, tableaux numpy, conteneurs parcourus sur deux niveaux, sinon
+    sys.getsizeof.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    size = sys.getsizeof(value, 0)
+    if _depth < 2:
+        if isinstance(value, dict):
+            size += sum(value_size(k, _depth + 1) + value_size(v, _depth + 1) for k, v in value.items())
+        elif isinstance(value, (list, tuple, set)):
+            size += sum(value_size(v, _depth + 1) for v in value)
+    return size
+
+
+def process_memory():
+    """Mémoire résidente du processus (octets) : VmRSS sous Linux, sinon pic de getrusage."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilo-octets sous Linux, octets sous macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception:
+        return None
+
+
+class SessionMemory:
+    """Dernière mesure de session_state pour chaque session ouverte du processus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}  # id de session -> mesure
+
+    def record(self, session_id, entry):
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = dict(entry, seen=now)
+            # Les sessions fermées ne se signalent pas : on oublie celles que le runtime ne connaît plus
+            for key in [key for key in self._sessions if session_alive(key) is False]:
+                del self._sessions[key]
+
+    def entries(self):
+        with self._lock:
+            return [dict(entry, session=session_id) for session_id, entry in self._sessions.items()]
+
+
+@st.cache_resource
+def get_session_memory():
+    """Retourne le registre des sessions du processus."""
+    return SessionMemory()
+
+
+def record_session(page):
+    """Mesure le session_state de la session courante. À appeler en fin de page."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    sizes = {}
+    for key in list(st.session_state.keys()):
+        try:
+            sizes[key] = value_size(st.session_state[key])
+        except Exception:
+            sizes[key] = 0
+    largest = max(sizes, key=sizes.get) if sizes else ""
+    get_session_memory().record(ctx.session_id, {
+        "user": st.session_state.get("current_user", ""),
+        "show": st.session_state.get("current_show") or "",
+        "page": page,
+        "keys": len(sizes),
+        "bytes": sum(sizes.values()),
+        "largest": largest,
+    })
+
+
+def session_report():
+    """Tableau des sessions ouvertes (taille de session_state), de la plus lourde à la plus légère."""
+    now = time.time()
+    rows = [{
+        "Session": entry["session"][:8],
+        "User": entry["user"],
+        "Show": entry["show"],
+        "Page": entry["page"],
+        "Keys": entry["keys"],
+        "Session state (KB)": round(entry["bytes"] / 1024, 1),
+        "Largest key": entry["largest"],
+        "Last seen (s)": int(now - entry["seen"]),
+    } for entry in get_session_memory().entries()]
+    columns = ["Session", "User", "Show", "Page", "Keys", "Session state (KB)", "Largest key", "Last seen (s)"]
+    return pd.DataFrame(rows, columns=columns).sort_values("Session state (KB)", ascending=False)
+
+
+def memory_summary():
+    """
+    Vue d'ensemble : mémoire résidente, cache partagé par salon, total et moyenne
+    des sessions. Permet d'estimer la mémoire d'un conteneur pour N sessions
+    (résident + N x moyenne par session).
+    """
+    sessions = get_session_memory().entries()
+    session_bytes = sum(entry["bytes"] for entry in sessions)
+    return {
+        "rss": process_memory(),
+        "shared_cache": get_show_cache().usage(),
+        "sessions": len(sessions),
+        "session_bytes": session_bytes,
+        "per_session": session_bytes / len(sessions) if sessions else 0,
+    }
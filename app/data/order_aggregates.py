@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+
+from data.show_cache import get_show_cache
+
+
+# Colonnes pour lesquelles on maintient des compteurs
+AGGREGATE_COLUMNS = ["Section", "Status", "Item", "Type", "User"]
+
+
+def stamp_version(df):
+    """
+    Attache une version de données et une heure de chargement au DataFrame.
+
+    La version est un hachage du contenu : deux pages qui téléchargent la même
+    feuille obtiennent la même version et partagent donc les mêmes agrégats.
+    """
+    if df.empty:
+        df.attrs["data_version"] = "empty"
+    else:
+        df.attrs["data_version"] = str(pd.util.hash_pandas_object(df, index=False).sum())
+    df.attrs["loaded_at"] = time.time()
+    return df
+
+
+def _key(value):
+    """Normalise une valeur de cellule pour l'utiliser comme clé de compteur."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return value
+
+
+class OrderAggregates:
+    """Compteurs de commandes partagés, mis à jour en O(1) par commande."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.counts = {col: Counter() for col in AGGREGATE_COLUMNS}
+        self.total = 0
+        self.version = 0
+        self.data_version = None
+        self.loaded_at = 0.0
+        self._memo = {}
+
+    def sync(self, orders_df):
+        """
+        Reconstruit les compteurs si orders_df correspond à une nouvelle version.
+
+        Une version plus ancienne que celle déjà indexée (par exemple le cache
+        d'une autre page pas encore expiré) est ignorée.
+        """
+        data_version = orders_df.attrs.get("data_version")
+        loaded_at = orders_df.attrs.get("loaded_at", time.time())
+        with self._lock:
+            if data_version is not None and data_version == self.data_version:
+                return self
+            if loaded_at < self.loaded_at:
+                return self
+
+            counts = {}
+            for col in AGGREGATE_COLUMNS:
+                if col in orders_df.columns:
+                    values = orders_df[col].value_counts(dropna=False)
+                    counts[col] = Counter({_key(k): int(v) for k, v in values.items()})
+                else:
+                    counts[col] = Counter()
+
+            self.counts = counts
+            self.total = len(orders_df)
+            self.data_version = data_version
+            self.loaded_at = loaded_at
+            self._bump()
+        return self
+
+    def _bump(self):
+        self.version += 1
+        self._memo.clear()
+
+    def add_order(self, order):
+        """Ajoute une commande (dict) aux compteurs."""
+        with self._lock:
+            for col in AGGREGATE_COLUMNS:
+                self.counts[col][_key(order.get(col))] += 1
+            self.total += 1
+            self._bump()
+
+    def remove_order(self, order):
+        """Retire une commande (dict ou ligne) des compteurs."""
+        with self._lock:
+            for col in AGGREGATE_COLUMNS:
+                key = _key(order.get(col))
+                if self.counts[col][key] > 0:
+                    self.counts[col][key] -= 1
+                    if self.counts[col][key] == 0:
+                        del self.counts[col][key]
+            self.total = max(self.total - 1, 0)
+            self._bump()
+
+    def update_status(self, old_status, new_status):
+        """Déplace une commande d'un statut à un autre."""
+        with self._lock:
+            old_key = _key(old_status)
+            if self.counts["Status"][old_key] > 0:
+                self.counts["Status"][old_key] -= 1
+                if self.counts["Status"][old_key] == 0:
+                    del self.counts["Status"][old_key]
+            self.counts["Status"][_key(new_status)] += 1
+            self._bump()
+
+    def value_counts(self, col, fill_na=None, n=None):
+        """Équivalent de df[col].value_counts() : liste de (valeur, nombre) triée."""
+        with self._lock:
+            items = []
+            for key, count in self.counts.get(col, Counter()).most_common():
+                if key is None:
+                    if fill_na is None:
+                        continue
+                    key = fill_na
+                items.append((key, count))
+        return items[:n] if n is not None else items
+
+    def counts_frame(self, col, labels, n=None):
+        """Retourne les compteurs d'une colonne sous forme de DataFrame à deux colonnes."""
+        return pd.DataFrame(self.value_counts(col, n=n), columns=labels)
+
+    def status_metrics(self):
+        """Retourne (livrées, annulées, en attente, taux de livraison en %)."""
+        with self._lock:
+            delivered = self.counts["Status"].get("Delivered", 0)
+            cancelled = self.counts["Status"].get("cancelled", 0)
+            total = self.total
+        pending = total - delivered - cancelled
+        delivery_rate = int(delivered / total * 100) if total > 0 else 0
+        return delivered, cancelled, pending, delivery_rate
+
+    def memoize(self, name, builder):
+        """Met en cache le résultat de builder(self) jusqu'au prochain changement de version."""
+        with self._lock:
+            key = (name, self.version)
+            if key not in self._memo:
+                self._memo[key] = builder(self)
+            return self._memo[key]
+
+
+def get_order_aggregates(show):
+    """Retourne le magasin d'agrégats partagé (toutes sessions) d'un salon."""
+    return get_show_cache().resource(show, "aggregates", OrderAggregates)
@@ -0,0 +1,239 @@
+import glob
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from data.show_cache import session_alive
+
+
+# Format -> (extension, type MIME)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+# Nombre de lignes écrites à la fois
+CHUNK_ROWS = 5000
+
+# Nombre maximal d'exports préparés en même temps pour tout le processus
+MAX_CONCURRENT_EXPORTS = 2
+
+# Dossier des fichiers exportés, partagé par les processus de l'application
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "orders_exports")
+
+# Un fichier prêt est supprimé à la fin de sa session, au plus tard EXPORT_TTL_SECONDS
+# après sa création ; le dossier est nettoyé toutes les SWEEP_SECONDS
+EXPORT_TTL_SECONDS = 30 * 60
+SWEEP_SECONDS = 60
+
+
+def _chunks(df, rows=CHUNK_ROWS):
+    for start in range(0, len(df), rows):
+        yield df.iloc[start:start + rows]
+
+
+def _uniform_chunk(chunk):
+    """Convertit les colonnes objet en texte (valeurs manquantes conservées) pour garder le même schéma."""
+    chunk = chunk.copy()
+    for column in chunk.columns:
+        if chunk[column].dtype == object:
+            values = chunk[column]
+            chunk[column] = values.where(values.isna(), values.astype(str))
+    return chunk
+
+
+def _write_csv(df, path, progress):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        for i, chunk in enumerate(_chunks(df)):
+            chunk.to_csv(f, header=(i == 0), index=False)
+            progress(len(chunk))
+
+
+def _write_xlsx(df, path, progress):
+    from openpyxl import Workbook
+
+    # Mode « write only » : les lignes sont écrites au fur et à mesure, sans garder la feuille en mémoire
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Orders")
+    worksheet.append([str(column) for column in df.columns])
+    for chunk in _chunks(df):
+        chunk = _uniform_chunk(chunk).astype(object).where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            worksheet.append(list(row))
+        progress(len(chunk))
+    workbook.save(path)
+
+
+def _parquet_schema(df):
+    """
+    Schéma commun à tous les blocs, établi sur df entier : texte pour les colonnes
+    objet (un bloc entièrement vide ne doit pas imposer le type null), type
+    pandas sinon.
+    """
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    for i, dtype in enumerate(df.dtypes):
+        if dtype == object:
+            schema = schema.set(i, pa.field(schema.field(i).name, pa.string()))
+    return schema
+
+
+def _write_parquet(df, path, progress):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(df)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(df):
+            writer.write_table(pa.Table.from_pandas(_uniform_chunk(chunk), schema=schema, preserve_index=False))
+            progress(len(chunk))
+
+
+WRITERS = {"CSV": _write_csv, "Excel": _write_xlsx, "Parquet": _write_parquet}
+
+
+class ExportJob:
+    """
+    Export de commandes préparé en arrière-plan dans un fichier temporaire.
+
+    Les lignes sont écrites par blocs de CHUNK_ROWS directement dans le fichier :
+    aucune copie complète du fichier n'est gardée dans la session.
+    """
+
+    def __init__(self, df, export_format, file_name, directory=EXPORT_DIR, session_id=None):
+        extension, self.mime = EXPORT_FORMATS[export_format]
+        self.export_format = export_format
+        self.file_name = f"{file_name}.{extension}"
+        self.total = len(df)
+        self.rows_written = 0
+        self.error = None
+        self.done = threading.Event()
+        self.session_id = session_id
+        self.created_at = time.time()
+        handle, self.path = tempfile.mkstemp(prefix="orders_export_", suffix=f".{extension}", dir=directory)
+        os.close(handle)
+        self._df = df
+
+    @property
+    def progress(self):
+        return self.rows_written / self.total if self.total else 1.0
+
+    def _progress(self, rows):
+        self.rows_written += rows
+
+    def run(self):
+        try:
+            WRITERS[self.export_format](self._df, self.path, self._progress)
+        except Exception as e:
+            self.error = e
+            print(f"Erreur lors de l'export des commandes: {e}")
+        finally:
+            self._df = None
+            self.done.set()
+
+    def available(self):
+        """Indique si le fichier généré existe encore (il est supprimé à son expiration)."""
+        return os.path.exists(self.path)
+
+    def open(self):
+        """Ouvre le fichier généré (à passer à st.download_button)."""
+        return open(self.path, "rb")
+
+    def cleanup(self):
+        """Supprime le fichier temporaire."""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class ExportRegistry:
+    """
+    Exports du processus et nettoyage de leur dossier.
+
+    Un fichier prêt est supprimé dès que la session qui l'a demandé est fermée, ou
+    EXPORT_TTL_SECONDS après sa création ; un export en cours d'écriture n'est
+    jamais supprimé. Les fichiers du dossier qu'aucun export ne référence (laissés
+    par un processus arrêté) sont supprimés après le même délai.
+    """
+
+    def __init__(self, directory=EXPORT_DIR, sweep_seconds=SWEEP_SECONDS):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._jobs = {}  # chemin -> ExportJob
+        self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_EXPORTS, thread_name_prefix="orders-export")
+        if sweep_seconds:
+            threading.Thread(target=self._sweep_loop, args=(sweep_seconds,), name="orders-export-sweeper",
+                             daemon=True).start()
+
+    def start(self, df, export_format, file_name, session_id=None):
+        job = ExportJob(df, export_format, file_name, directory=self.directory, session_id=session_id)
+        with self._lock:
+            self._jobs[job.path] = job
+        self._executor.submit(job.run)
+        return job
+
+    def _expired(self, job, now):
+        if not job.done.is_set():
+            return False
+        if now - job.created_at > EXPORT_TTL_SECONDS:
+            return True
+        return job.session_id is not None and session_alive(job.session_id) is False
+
+    def sweep(self, now=None):
+        """Supprime les fichiers expirés ; retourne le nombre de fichiers supprimés."""
+        now = now or time.time()
+        with self._lock:
+            expired = [job for job in self._jobs.values() if self._expired(job, now)]
+            for job in expired:
+                del self._jobs[job.path]
+            known = set(self._jobs)
+        for job in expired:
+            job.cleanup()
+
+        removed = len(expired)
+        for path in glob.glob(os.path.join(self.directory, "orders_export_*")):
+            try:
+                if path not in known and now - os.path.getmtime(path) > EXPORT_TTL_SECONDS:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass  # supprimé entre-temps par un autre processus
+        return removed
+
+    def _sweep_loop(self, sweep_seconds):
+        while True:
+            time.sleep(sweep_seconds)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Erreur lors du nettoyage des exports: {e}")
+
+
+@st.cache_resource
+def get_export_registry():
+    """Retourne le registre des exports du processus."""
+    return ExportRegistry()
+
+
+def start_export(df, export_format, file_name):
+    """
+    Lance l'export de df dans un thread et retourne l'ExportJob correspondant.
+    Le fichier est supprimé à la fin de la session courante (voir ExportRegistry).
+
+    Args:
+        df (DataFrame): commandes à exporter (vue filtrée ou salon complet)
+        export_format (str): "CSV", "Excel" ou "Parquet"
+        file_name (str): nom du fichier téléchargé, sans extension
+    """
+    ctx = get_script_run_ctx()
+    return get_export_registry().start(df, export_format, file_name, session_id=ctx.session_id if ctx else None)
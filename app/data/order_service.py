@@ -0,0 +1,187 @@
+"""
+Opérations sur les commandes d'un salon, hors interface Streamlit (API HTTP).
+
+Chaque écriture passe par les mêmes fonctions que la page Orders, puis met à jour
+les index partagés (compteurs, stock, avancement des stands, index horaire) et
+invalide le cache du salon.
+"""
+import uuid
+
+import pandas as pd
+
+from data.test_data_manager import GoogleSheetsManager
+from data.direct_sheets_operations import direct_add_order, direct_delete_order
+from data.order_aggregates import get_order_aggregates
+from data.order_time_index import get_order_time_index
+from data.inventory_engine import get_inventory_engine
+from data.booth_fulfillment import get_booth_fulfillment
+from data.submission_ledger import get_submission_ledger, order_fingerprint
+from data.event_log import get_event_log
+from data.shows import get_show
+from data.show_data import load_order_data, invalidate_show_data
+
+
+def _sync_stores(show):
+    orders_df, _, inventory_df, _ = load_order_data(show)
+    get_order_aggregates(show).sync(orders_df)
+    get_inventory_engine(show).sync(orders_df, inventory_df)
+    return orders_df
+
+
+def find_orders(show, booth=None, item=None, color=None, status=None, section=None, query=None):
+    """Filtre les commandes (en cache) d'un salon. Les critères absents sont ignorés."""
+    orders_df, _, _, _ = load_order_data(show)
+    if orders_df.empty:
+        return orders_df
+    mask = pd.Series(True, index=orders_df.index)
+    for column, value in [("Booth #", booth), ("Item", item), ("Color", color), ("Status", status),
+                          ("Section", section)]:
+        if value is not None and column in orders_df.columns:
+            mask &= orders_df[column].astype(str).str.strip().str.lower() == str(value).strip().lower()
+    if query:
+        text = orders_df["Booth #"].astype(str)
+        if "Exhibitor Name" in orders_df.columns:
+            text = text + " " + orders_df["Exhibitor Name"].astype(str)
+        mask &= text.str.contains(query, case=False, na=False, regex=False)
+    return orders_df[mask]
+
+
+def create_order(show, order, idempotency_key=None, allow_over=False, allow_same_content=False):
+    """
+    Ajoute une commande au salon.
+
+    Les envois sont dédoublonnés seulement quand le client fournit une clé
+    d'idempotence : même clé, même commande ; contenu identique récent sous une
+    autre clé, "duplicate" sauf si allow_same_content. Sans clé, chaque appel
+    est une nouvelle commande.
+
+    Returns:
+        tuple: (résultat, stock restant). Le résultat vaut "created", "applied" ou
+               "in_progress" (clé d'idempotence déjà vue), "duplicate" (commande
+               identique récente), "out_of_stock" ou "failed".
+    """
+    sheet_id = get_show(show)["order_tracking_sheet_id"]
+    _sync_stores(show)
+    ledger = get_submission_ledger()
+    fingerprint = order_fingerprint(show, order)
+    if idempotency_key:
+        key = idempotency_key
+    else:
+        key, allow_same_content = uuid.uuid4().hex, True
+    rejected = ledger.claim(key, fingerprint, allow_same_content=allow_same_content)
+    if rejected is not None:
+        return rejected, None
+
+    inventory_engine = get_inventory_engine(show)
+    reserved, left = inventory_engine.reserve(order, key, allow_over=allow_over)
+    if not reserved:
+        ledger.abandon(key, fingerprint)
+        return "out_of_stock", left
+
+    def applied():
+        ledger.complete(key)
+        inventory_engine.confirm(key)
+
+    if not direct_add_order(sheet_id, order, on_appended=applied):
+        inventory_engine.release(key)
+        ledger.abandon(key, fingerprint)
+        return "failed", None
+
+    get_order_aggregates(show).add_order(order)
+    get_booth_fulfillment(show).add_order(order)
+    get_order_time_index(show).append(order)
+    get_event_log().record("created", show, order)
+    invalidate_show_data(show)
+    return "created", left
+
+
+def set_status(show, order, new_status, user):
+    """
+    Change le statut d'une commande (dict ou ligne du DataFrame des commandes).
+
+    Returns:
+        bool: True si la feuille a été mise à jour
+    """
+    sheet_id = get_show(show)["order_tracking_sheet_id"]
+    _, sections, _, _ = load_order_data(show)
+    _sync_stores(show)
+
+    # Même choix de feuille que la page Orders
+    worksheet = order.get("Section") if order.get("Section") in sections else "Orders"
+    success = GoogleSheetsManager().update_order_status(
+        sheet_id=sheet_id,
+        worksheet=worksheet,
+        booth_num=order.get("Booth #"),
+        item_name=order.get("Item"),
+        color=order.get("Color"),
+        status=new_status,
+        user=user,
+    )
+    if success:
+        get_order_aggregates(show).update_status(order.get("Status"), new_status)
+        get_inventory_engine(show).update_status(order, new_status)
+        get_booth_fulfillment(show).update_status(order, new_status)
+        get_event_log().record("status", show, order, status=new_status, previous=order.get("Status"), user=user)
+        invalidate_show_data(show)
+    return success
+
+
+def set_statuses(show, orders, user):
+    """
+    Change le statut de plusieurs commandes, avec une écriture groupée par feuille.
+
+    Args:
+        orders (DataFrame): commandes à modifier (colonnes de orders_df) avec une
+                            colonne New Status
+
+    Returns:
+        list: pour chaque commande, True si elle a été trouvée et mise à jour
+    """
+    sheet_id = get_show(show)["order_tracking_sheet_id"]
+    _, sections, _, _ = load_order_data(show)
+    _sync_stores(show)
+    if orders.empty:
+        return []
+
+    # Même choix de feuille que la page Orders
+    section = orders["Section"] if "Section" in orders.columns else pd.Series("", index=orders.index)
+    worksheets = section.where(section.isin(sections), "Orders")
+
+    gs_manager = GoogleSheetsManager()
+    results = pd.Series(False, index=orders.index)
+    for worksheet, group in orders.groupby(worksheets, sort=False):
+        updates = list(zip(group["Booth #"], group["Item"], group["Color"], group["New Status"]))
+        results[group.index] = gs_manager.update_order_statuses(sheet_id, worksheet, updates, user)
+
+    aggregates = get_order_aggregates(show)
+    inventory_engine = get_inventory_engine(show)
+    fulfillment = get_booth_fulfillment(show)
+    event_log = get_event_log()
+    for _, order in orders[results].iterrows():
+        aggregates.update_status(order.get("Status"), order["New Status"])
+        inventory_engine.update_status(order, order["New Status"])
+        fulfillment.update_status(order, order["New Status"])
+        event_log.record("status", show, order, status=order["New Status"], previous=order.get("Status"), user=user)
+    if results.any():
+        invalidate_show_data(show)
+    return results.tolist()
+
+
+def delete_order(show, order, user=None):
+    """Supprime une commande (dict ou ligne du DataFrame des commandes). Retourne True si elle a été supprimée."""
+    sheet_id = get_show(show)["order_tracking_sheet_id"]
+    _sync_stores(show)
+    success = direct_delete_order(
+        sheet_id=sheet_id,
+        booth_num=order.get("Booth #"),
+        item_name=order.get("Item"),
+        color=order.get("Color"),
+        section=order.get("Section"),
+    )
+    if success:
+        get_order_aggregates(show).remove_order(order)
+        get_inventory_engine(show).remove_order(order)
+        get_booth_fulfillment(show).remove_order(order)
+        get_event_log().record("deleted", show, order, user=user)
+        invalidate_show_data(show)
+    return success
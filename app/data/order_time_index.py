@@ -0,0 +1,170 @@
+import bisect
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from data.show_cache import get_show_cache
+
+
+# Format écrit par direct_add_order / update_order_status, puis formats rencontrés
+# dans les anciennes lignes de la feuille
+TIMESTAMP_FORMATS = [
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%Y-%m-%d %H:%M:%S",
+]
+
+
+def parse_order_timestamps(dates, hours):
+    """
+    Convertit les colonnes Date et Hour en datetime.
+
+    Le format principal est appliqué de façon vectorisée ; seules les lignes qui
+    échouent sont reprises avec les formats suivants. Les valeurs invalides
+    donnent NaT.
+    """
+    raw = (dates.fillna("").astype(str).str.strip() + " " +
+           hours.fillna("").astype(str).str.strip()).str.strip()
+    parsed = pd.to_datetime(raw, errors="coerce", format=TIMESTAMP_FORMATS[0])
+
+    for fmt in TIMESTAMP_FORMATS[1:]:
+        missing = parsed.isna() & (raw != "")
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(raw[missing], errors="coerce", format=fmt)
+
+    missing = parsed.isna() & (raw != "")
+    if missing.any():
+        parsed[missing] = pd.to_datetime(raw[missing], errors="coerce", format="mixed")
+    return parsed
+
+
+def _to_ns(value):
+    """Horodatage en nanosecondes, l'unité de toutes les clés de l'index."""
+    return pd.Timestamp(value).as_unit("ns").value
+
+
+class OrderTimeIndex:
+    """Index des commandes trié par horodatage (Date + Hour)."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []        # horodatages en nanosecondes, triés
+        self._positions = []   # position de la ligne correspondante
+        self._invalid = []     # positions des lignes sans date exploitable
+        self._rows = None      # DataFrame indexé
+        self._appended = []    # commandes ajoutées localement depuis le chargement
+        self.data_version = None
+        self.loaded_at = 0.0
+
+    def sync(self, orders_df):
+        """Reconstruit l'index si orders_df correspond à une nouvelle version des données."""
+        data_version = orders_df.attrs.get("data_version")
+        loaded_at = orders_df.attrs.get("loaded_at", 0.0)
+        with self._lock:
+            if data_version is not None and data_version == self.data_version:
+                return self
+            if loaded_at < self.loaded_at:
+                return self
+
+            if "Date" in orders_df.columns and "Hour" in orders_df.columns and not orders_df.empty:
+                parsed = parse_order_timestamps(orders_df["Date"], orders_df["Hour"])
+                valid = parsed.notna().to_numpy()
+                # L'unité des datetime dépend de la version de pandas (µs par défaut depuis pandas 3)
+                keys = parsed[valid].astype("datetime64[ns]").astype("int64").to_numpy()
+                positions = np.flatnonzero(valid)
+                order = np.argsort(keys, kind="stable")
+                self._keys = keys[order].tolist()
+                self._positions = positions[order].tolist()
+                self._invalid = np.flatnonzero(~valid).tolist()
+            else:
+                self._keys = []
+                self._positions = []
+                self._invalid = list(range(len(orders_df)))
+
+            self._rows = orders_df
+            self._appended = []
+            self.data_version = data_version
+            self.loaded_at = loaded_at
+        return self
+
+    def append(self, order, timestamp=None):
+        """Ajoute une commande locale ; O(1) quand elle est la plus récente."""
+        timestamp = timestamp or datetime.now()
+        key = _to_ns(timestamp)
+        with self._lock:
+            position = -1 - len(self._appended)
+            self._appended.append(dict(order, Date=timestamp.strftime("%m/%d/%Y"),
+                                       Hour=timestamp.strftime("%I:%M:%S %p")))
+            if not self._keys or key >= self._keys[-1]:
+                self._keys.append(key)
+                self._positions.append(position)
+            else:
+                i = bisect.bisect_right(self._keys, key)
+                self._keys.insert(i, key)
+                self._positions.insert(i, position)
+
+    def _materialize(self, positions):
+        """Construit le DataFrame des lignes demandées (positions négatives = ajouts locaux)."""
+        rows = self._rows if self._rows is not None else pd.DataFrame()
+        local = [pos for pos in positions if pos < 0]
+        if not local:
+            return rows.iloc[positions]
+
+        in_frame = [pos for pos in positions if pos >= 0]
+        parts = pd.concat([rows.iloc[in_frame],
+                           pd.DataFrame([self._appended[-1 - pos] for pos in local])],
+                          ignore_index=True)
+        # Remettre les lignes dans l'ordre demandé
+        order, next_frame, next_local = [], 0, len(in_frame)
+        for pos in positions:
+            if pos >= 0:
+                order.append(next_frame)
+                next_frame += 1
+            else:
+                order.append(next_local)
+                next_local += 1
+        return parts.iloc[order].reset_index(drop=True)
+
+    def latest(self, n=10):
+        """Retourne les n commandes les plus récentes, de la plus récente à la plus ancienne."""
+        with self._lock:
+            positions = self._positions[-n:][::-1] if n > 0 else []
+            if len(positions) < n:
+                # Comme un tri, les lignes sans date valide viennent en dernier
+                positions = positions + self._invalid[:n - len(positions)]
+            return self._materialize(positions)
+
+    def between(self, start, end):
+        """Retourne les commandes dont l'horodatage est dans [start, end), les plus récentes d'abord."""
+        with self._lock:
+            lo = bisect.bisect_left(self._keys, _to_ns(start))
+            hi = bisect.bisect_left(self._keys, _to_ns(end))
+            return self._materialize(self._positions[lo:hi][::-1])
+
+    def since(self, minutes, now=None):
+        """Retourne les commandes des dernières `minutes` minutes."""
+        now = now or datetime.now()
+        return self.between(now - timedelta(minutes=minutes), now + timedelta(seconds=1))
+
+    def count_since(self, minutes, now=None):
+        """Nombre de commandes des dernières `minutes` minutes, sans matérialiser les lignes."""
+        now = now or datetime.now()
+        with self._lock:
+            lo = bisect.bisect_left(self._keys, _to_ns(now - timedelta(minutes=minutes)))
+            hi = bisect.bisect_right(self._keys, _to_ns(now))
+            return hi - lo
+
+    def hour_window(self, day, hour):
+        """Retourne les commandes passées pendant une heure donnée d'une journée."""
+        start = datetime(day.year, day.month, day.day, hour)
+        return self.between(start, start + timedelta(hours=1))
+
+
+def get_order_time_index(show):
+    """Retourne l'index temporel partagé (toutes sessions) d'un salon."""
+    return get_show_cache().resource(show, "time_index", OrderTimeIndex)
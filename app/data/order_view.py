@@ -0,0 +1,102 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data.show_cache import get_show_cache
+
+
+def _filter_columns(orders_df):
+    """Section, statut et texte de recherche (minuscules) sous forme de tableaux numpy."""
+    def column(name):
+        if name not in orders_df.columns:
+            return np.full(len(orders_df), None, dtype=object)
+        return orders_df[name].to_numpy(dtype=object)
+
+    text = orders_df["Booth #"].astype(str) if "Booth #" in orders_df.columns else pd.Series("", index=orders_df.index)
+    if "Exhibitor Name" in orders_df.columns:
+        # Séparateur invisible : une recherche ne peut pas chevaucher les deux champs
+        text = text + "\x1f" + orders_df["Exhibitor Name"].fillna("").astype(str)
+    return column("Section"), column("Status"), text.str.lower().reset_index(drop=True)
+
+
+class OrderFilterIndex:
+    """
+    Colonnes de filtrage des commandes d'un salon, préparées une fois par version
+    des données et partagées par toutes les sessions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data_version = None
+        self._loaded_at = 0.0
+        self._columns = None
+
+    def _columns_for(self, orders_df):
+        data_version = orders_df.attrs.get("data_version")
+        loaded_at = orders_df.attrs.get("loaded_at", 0.0)
+        with self._lock:
+            if data_version is not None and data_version == self._data_version:
+                return self._columns
+            if loaded_at < self._loaded_at:
+                # Instantané plus ancien que l'index : calculé pour cette session seulement
+                return _filter_columns(orders_df)
+            self._columns = _filter_columns(orders_df)
+            self._data_version = data_version
+            self._loaded_at = loaded_at
+            return self._columns
+
+    def positions(self, orders_df, section=None, status=None, query=None):
+        """Positions (tableau numpy) des commandes de orders_df qui correspondent aux filtres."""
+        sections, statuses, search_text = self._columns_for(orders_df)
+        mask = np.ones(len(orders_df), dtype=bool)
+        if section is not None:
+            mask &= sections == section
+        if status is not None:
+            mask &= statuses == status
+        if query:
+            mask &= search_text.str.contains(query.lower(), regex=False, na=False).to_numpy()
+        return np.flatnonzero(mask)
+
+
+class OrderView:
+    """
+    Vue filtrée sur le DataFrame partagé des commandes, sans copie : seules les
+    positions des lignes sont gardées. Les lignes ne sont matérialisées qu'au
+    moment de l'affichage, et une seule fois.
+    """
+
+    def __init__(self, orders_df, positions):
+        self.source = orders_df
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def empty(self):
+        return len(self.positions) == 0
+
+    @property
+    def columns(self):
+        return self.source.columns
+
+    def frame(self, columns=None):
+        """Matérialise les lignes de la vue (toutes les colonnes ou seulement `columns`)."""
+        if columns is None:
+            return self.source.iloc[self.positions]
+        indexer = self.source.columns.get_indexer(columns)
+        if (indexer < 0).any():
+            raise KeyError([name for name, i in zip(columns, indexer) if i < 0])
+        return self.source.iloc[self.positions, indexer]
+
+    def row(self, i):
+        """Retourne la i-ème ligne de la vue (Series)."""
+        return self.source.iloc[self.positions[i]]
+
+
+
+def filter_orders(show, orders_df, section=None, status=None, query=None):
+    """Retourne la vue des commandes correspondant aux filtres."""
+    index = get_show_cache().resource(show, "filter_index", OrderFilterIndex)
+    return OrderView(orders_df, index.positions(orders_df, section, status, query))
@@ -0,0 +1,221 @@
+"""
+Profilage des réexécutions des pages (opt-in).
+
+Activé avec la variable d'environnement ORDERS_APP_PROFILE=1 ou depuis le panneau
+d'administration. Chaque réexécution d'une page est découpée en sections nommées
+(chargement, filtres, tableau, statistiques...) :
+
+    begin_rerun("Orders")
+    checkpoint("load")      # termine la section précédente et commence "load"
+    ...
+    finish_rerun()
+
+Une réexécution sur SAMPLE_EVERY est aussi profilée avec cProfile. Les durées des
+sections sont ajoutées à PROFILE_DIR/spans.folded (format « folded stacks » lu par
+flamegraph.pl et speedscope) ; les réexécutions échantillonnées y laissent un
+fichier .prof (pstats) et un rapport texte. Comme import_profiler, ce module
+n'importe que la bibliothèque standard. Désactivé, chaque appel ne coûte qu'un test.
+"""
+import cProfile
+import io
+import os
+import pstats
+import statistics
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+PROFILE_DIR = os.environ.get("ORDERS_APP_PROFILE_DIR", ".streamlit/profiles")
+
+# Une réexécution sur SAMPLE_EVERY est profilée avec cProfile (si l'échantillonnage est activé)
+SAMPLE_EVERY = int(os.environ.get("ORDERS_APP_PROFILE_SAMPLE", "10"))
+
+# Nombre de réexécutions gardées pour le résumé
+HISTORY_SIZE = 200
+
+_settings = {
+    "enabled": os.environ.get("ORDERS_APP_PROFILE") == "1",
+    "cprofile": os.environ.get("ORDERS_APP_PROFILE_CPROFILE") == "1",
+}
+_active = {}   # session Streamlit (ou thread hors Streamlit) -> réexécution en cours
+_history = deque(maxlen=HISTORY_SIZE)   # dicts {page, started, total, spans: {chemin: secondes}}
+_lock = threading.Lock()
+_reruns = 0
+
+
+def is_enabled():
+    return _settings["enabled"]
+
+
+def set_enabled(enabled, cprofile=None):
+    """Active ou désactive le profilage pour tout le processus (panneau d'administration)."""
+    _settings["enabled"] = bool(enabled)
+    if cprofile is not None:
+        _settings["cprofile"] = bool(cprofile)
+
+
+def cprofile_enabled():
+    return _settings["cprofile"]
+
+
+class _Rerun:
+    def __init__(self, page, sampled):
+        self.page = page
+        self.started = time.perf_counter()
+        self.started_at = datetime.now()
+        self.spans = {}
+        self.checkpoint = None  # (nom, début) de la section de premier niveau en cours
+        self.profiler = cProfile.Profile() if sampled else None
+
+    def add(self, path, elapsed):
+        self.spans[path] = self.spans.get(path, 0.0) + elapsed
+
+
+def _session_key():
+    """
+    Id de la session Streamlit en cours : les réexécutions d'une même session ne
+    passent pas forcément par le même thread. Hors Streamlit, id du thread.
+    """
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+    except ImportError:
+        ctx = None
+    return ctx.session_id if ctx is not None else threading.get_ident()
+
+
+def _current():
+    if not _active:
+        return None
+    with _lock:
+        return _active.get(_session_key())
+
+
+def begin_rerun(page):
+    """Commence le profilage d'une réexécution de `page` (à appeler en haut du script)."""
+    global _reruns
+    if not _active and not _settings["enabled"]:
+        return
+    key = _session_key()
+    with _lock:
+        previous = _active.pop(key, None)
+    if previous is not None:
+        # Réexécution précédente interrompue (st.stop, st.rerun) : l'enregistrer quand même
+        _finish(previous, stopped=True)
+    if not _settings["enabled"]:
+        return
+
+    with _lock:
+        _reruns += 1
+        sampled = _settings["cprofile"] and _reruns % max(SAMPLE_EVERY, 1) == 0
+    rerun = _Rerun(page, sampled)
+    with _lock:
+        _active[key] = rerun
+    if rerun.profiler is not None:
+        rerun.profiler.enable()
+
+
+def _close_checkpoint(rerun, now):
+    if rerun.checkpoint is not None:
+        name, start = rerun.checkpoint
+        rerun.add(f"{rerun.page};{name}", now - start)
+        rerun.checkpoint = None
+
+
+def checkpoint(name):
+    """Termine la section de premier niveau en cours et commence la section `name`."""
+    rerun = _current()
+    if rerun is None:
+        return
+    now = time.perf_counter()
+    _close_checkpoint(rerun, now)
+    rerun.checkpoint = (name, now)
+
+
+def finish_rerun():
+    """Termine le profilage de la réexécution en cours (à appeler en bas du script)."""
+    if not _active:
+        return
+    with _lock:
+        rerun = _active.pop(_session_key(), None)
+    if rerun is not None:
+        _finish(rerun)
+
+
+def _finish(rerun, stopped=False):
+    now = time.perf_counter()
+    if rerun.profiler is not None:
+        rerun.profiler.disable()
+    _close_checkpoint(rerun, now)
+    total = now - rerun.started
+    with _lock:
+        _history.append({
+            "page": rerun.page,
+            "started": rerun.started_at,
+            "total": total,
+            "spans": dict(rerun.spans),
+            "stopped": stopped,
+        })
+    try:
+        _write_reports(rerun, total)
+    except OSError as e:
+        print(f"Erreur lors de l'écriture du profil: {e}")
+
+
+def _folded_lines(rerun, total):
+    """Durées propres (hors sous-sections) de chaque section, en microsecondes."""
+    spans = dict(rerun.spans)
+    spans[rerun.page] = total
+    self_times = dict(spans)
+    for path, elapsed in spans.items():
+        if ";" in path:
+            parent = path.rsplit(";", 1)[0]
+            if parent in self_times:
+                self_times[parent] -= elapsed
+    return [f"{path} {max(int(elapsed * 1_000_000), 0)}" for path, elapsed in self_times.items()]
+
+
+def _write_reports(rerun, total):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with _lock:
+        with open(os.path.join(PROFILE_DIR, "spans.folded"), "a", encoding="utf-8") as f:
+            f.write("\n".join(_folded_lines(rerun, total)) + "\n")
+
+    if rerun.profiler is None:
+        return
+    name = f"{rerun.page.replace(' ', '_')}-{rerun.started_at.strftime('%Y%m%d-%H%M%S-%f')}"
+    rerun.profiler.dump_stats(os.path.join(PROFILE_DIR, f"{name}.prof"))
+    report = io.StringIO()
+    pstats.Stats(rerun.profiler, stream=report).sort_stats("cumulative").print_stats(30)
+    with open(os.path.join(PROFILE_DIR, f"{name}.txt"), "w", encoding="utf-8") as f:
+        f.write(f"{rerun.page} rerun at {rerun.started_at.isoformat()}: {total * 1000:.1f} ms\n\n")
+        f.write(report.getvalue())
+
+
+def summary(page=None):
+    """
+    Résumé des dernières réexécutions : une ligne par page et par section, triée par
+    temps moyen décroissant.
+    """
+    with _lock:
+        reruns = [r for r in _history if page is None or r["page"] == page]
+    samples = {}
+    for rerun in reruns:
+        samples.setdefault((rerun["page"], "(total)"), []).append(rerun["total"])
+        for path, elapsed in rerun["spans"].items():
+            samples.setdefault((rerun["page"], path.split(";", 1)[1]), []).append(elapsed)
+
+    rows = []
+    for (name, section), values in samples.items():
+        values = sorted(values)
+        rows.append({
+            "Page": name,
+            "Section": section,
+            "Reruns": len(values),
+            "Mean (ms)": round(statistics.fmean(values) * 1000, 1),
+            "p95 (ms)": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+            "Max (ms)": round(values[-1] * 1000, 1),
+        })
+    return sorted(rows, key=lambda row: row["Mean (ms)"], reverse=True)
@@ -0,0 +1,295 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+
+# Budget mémoire par défaut pour l'ensemble des salons (modifiable via les secrets)
+DEFAULT_BUDGET_MB = 512
+
+# Le rafraîchissement en arrière-plan s'arrête pour un salon sans activité depuis
+# cet intervalle, et recharge chaque jeu de données à cette fraction de son ttl
+REFRESH_IDLE_SECONDS = 5 * 60
+REFRESH_AHEAD = 0.8
+REFRESH_POLL_SECONDS = 1
+
+# Nombre de chargements tentés quand le jeu de données est invalidé pendant le chargement
+RELOAD_ATTEMPTS = 3
+
+
+def session_alive(session_id):
+    """
+    Indique si une session Streamlit est encore ouverte (None hors d'un serveur
+    Streamlit, quand le runtime ne peut pas répondre).
+    """
+    try:
+        from streamlit.runtime import Runtime
+        if not Runtime.exists():
+            return None
+        return Runtime.instance().is_active_session(session_id)
+    except Exception:
+        return None
+
+
+def estimate_size(value):
+    """Estime la taille mémoire (octets) d'une valeur en cache."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_size(v) for v in value.values())
+    return 0
+
+
+class ShowShard:
+    """Données et index en cache pour un salon."""
+
+    def __init__(self, show):
+        self.show = show
+        self.datasets = {}    # nom -> (valeur, heure de chargement, taille, jeton de révision)
+        self.resources = {}   # nom -> objet partagé (agrégats, index...)
+        self.sessions = {}    # id de session -> dernière sélection
+        self.requested = 0.0  # dernière requête hors session (API)
+        self.load_locks = {}  # nom -> verrou, pour ne charger qu'une fois à la fois
+        self.sources = {}     # nom -> (loader, ttl, probe), pour le rafraîchissement
+        self.generations = {} # nom -> nombre d'invalidations
+        self.refreshing = set()
+        self.lock = threading.RLock()
+
+    def size(self):
+        with self.lock:
+            return sum(entry[2] for entry in self.datasets.values())
+
+    def has_sessions(self):
+        """Vrai si une session encore ouverte a ce salon sélectionné ; oublie les sessions fermées."""
+        with self.lock:
+            for session_id in list(self.sessions):
+                if session_alive(session_id) is False:
+                    del self.sessions[session_id]
+            return bool(self.sessions)
+
+    def is_busy(self, now, window):
+        """Vrai si le salon a été utilisé (session ou API) dans les `window` dernières secondes."""
+        with self.lock:
+            return now - self.requested < window or any(now - seen < window for seen in self.sessions.values())
+
+
+class ShowCache:
+    """
+    Cache partagé par toutes les sessions, découpé par salon.
+
+    Chaque salon a son propre shard (jeux de données et index). Quand le budget
+    mémoire est dépassé, les salons inactifs les moins récemment utilisés sont
+    évincés ; un salon sélectionné par une session encore ouverte ne l'est jamais.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._shards = OrderedDict()
+        self._lock = threading.RLock()
+        self._refresher = None
+
+    def shard(self, show):
+        """Retourne le shard d'un salon (créé au besoin) et le marque comme récemment utilisé."""
+        with self._lock:
+            if show not in self._shards:
+                self._shards[show] = ShowShard(show)
+            self._shards.move_to_end(show)
+            return self._shards[show]
+
+    def touch(self, show, session_id=None):
+        """
+        Indique qu'une session a ce salon sélectionné. Sans session (API), le salon
+        est seulement marqué comme récemment utilisé.
+        """
+        shard = self.shard(show)
+        with shard.lock:
+            if session_id is None:
+                shard.requested = time.time()
+            else:
+                shard.sessions[session_id] = time.time()
+
+    def release(self, show, session_id):
+        """Indique qu'une session a quitté ce salon."""
+        with self._lock:
+            shard = self._shards.get(show)
+        if shard is not None:
+            with shard.lock:
+                shard.sessions.pop(session_id, None)
+
+    def get(self, show, dataset, loader, ttl, probe=None):
+        """
+        Retourne un jeu de données du salon, en appelant loader() s'il est absent.
+
+        Une fois le ttl dépassé, la version précédente est retournée immédiatement
+        et le rechargement se fait en arrière-plan (stale-while-revalidate).
+        Si probe est fourni, il est appelé avant tout rechargement : quand il
+        retourne le même jeton qu'au dernier chargement, les données sont
+        considérées inchangées et gardées pour un nouveau ttl.
+        """
+        shard = self.shard(show)
+        with shard.lock:
+            shard.sources[dataset] = (loader, ttl, probe)
+            entry = shard.datasets.get(dataset)
+        self._start_refresher()
+
+        if entry is None:
+            return self._reload(shard, dataset, max_age=ttl)
+        if time.time() - entry[1] >= ttl:
+            self._refresh_async(shard, dataset)
+        return entry[0]
+
+    def _reload(self, shard, dataset, max_age):
+        """Recharge un jeu de données s'il est plus vieux que max_age secondes."""
+        with shard.lock:
+            loader, ttl, probe = shard.sources[dataset]
+            load_lock = shard.load_locks.setdefault(dataset, threading.Lock())
+
+        with load_lock:
+            for _ in range(RELOAD_ATTEMPTS):
+                # Un autre appel a peut-être chargé les données pendant l'attente
+                with shard.lock:
+                    entry = shard.datasets.get(dataset)
+                    if entry is not None and time.time() - entry[1] < max_age:
+                        return entry[0]
+                    generation = shard.generations.get(dataset, 0)
+
+                token = probe() if probe is not None else None
+                if entry is not None and token is not None and token == entry[3]:
+                    with shard.lock:
+                        if shard.generations.get(dataset, 0) == generation:
+                            shard.datasets[dataset] = (entry[0], time.time(), entry[2], token)
+                            return entry[0]
+
+                value = loader()
+                # Invalidé pendant le chargement : les données lues peuvent précéder l'écriture
+                if self.put(shard.show, dataset, value, token=token, generation=generation):
+                    return value
+            # Invalidations répétées : on rend la dernière lecture sans la mettre en cache
+            return value
+
+    def _refresh_async(self, shard, dataset, max_age=0):
+        """Lance le rechargement d'un jeu de données dans un thread, s'il n'est pas déjà en cours."""
+        with shard.lock:
+            if dataset in shard.refreshing:
+                return
+            shard.refreshing.add(dataset)
+
+        def run():
+            try:
+                self._reload(shard, dataset, max_age=max_age)
+            except Exception as e:
+                print(f"Erreur lors du rafraîchissement de {shard.show}/{dataset}: {e}")
+            finally:
+                with shard.lock:
+                    shard.refreshing.discard(dataset)
+
+        threading.Thread(target=run, name=f"refresh-{shard.show}-{dataset}", daemon=True).start()
+
+    def _start_refresher(self):
+        with self._lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._refresher = threading.Thread(target=self._refresh_loop, name="show-cache-refresher",
+                                                   daemon=True)
+                self._refresher.start()
+
+    def _refresh_loop(self):
+        """Recharge les jeux de données des salons actifs un peu avant leur expiration."""
+        while True:
+            time.sleep(REFRESH_POLL_SECONDS)
+            now = time.time()
+            with self._lock:
+                shards = list(self._shards.values())
+            for shard in shards:
+                # Pas d'activité récente sur ce salon : on laisse les données vieillir
+                if not shard.is_busy(now, window=REFRESH_IDLE_SECONDS):
+                    continue
+                with shard.lock:
+                    due = [
+                        name for name, (_, ttl, _) in shard.sources.items()
+                        if name in shard.datasets and now - shard.datasets[name][1] >= ttl * REFRESH_AHEAD
+                    ]
+                    ttls = {name: shard.sources[name][1] for name in due}
+                for name in due:
+                    self._refresh_async(shard, name, max_age=ttls[name] * REFRESH_AHEAD)
+
+    def loaded_at(self, show, dataset):
+        """Retourne l'heure (timestamp) à laquelle le jeu de données a été chargé ou vérifié."""
+        with self._lock:
+            shard = self._shards.get(show)
+        if shard is None:
+            return None
+        with shard.lock:
+            entry = shard.datasets.get(dataset)
+            return entry[1] if entry is not None else None
+
+    def put(self, show, dataset, value, loaded_at=None, token=None, generation=None):
+        """
+        Enregistre un jeu de données puis applique le budget mémoire.
+
+        Si generation est fourni, rien n'est enregistré (retourne False) quand le
+        jeu de données a été invalidé depuis.
+        """
+        shard = self.shard(show)
+        with shard.lock:
+            if generation is not None and shard.generations.get(dataset, 0) != generation:
+                return False
+            shard.datasets[dataset] = (value, loaded_at or time.time(), estimate_size(value), token)
+        self._evict(keep=show)
+        return True
+
+    def invalidate(self, show, dataset=None):
+        """Force le rechargement d'un jeu de données (ou de tous ceux du salon)."""
+        shard = self.shard(show)
+        with shard.lock:
+            names = set(shard.datasets) | set(shard.sources) if dataset is None else {dataset}
+            for name in names:
+                shard.datasets.pop(name, None)
+                shard.generations[name] = shard.generations.get(name, 0) + 1
+
+    def resource(self, show, name, factory):
+        """Retourne un objet partagé du salon (index, agrégats), créé par factory() au besoin."""
+        shard = self.shard(show)
+        with shard.lock:
+            if name not in shard.resources:
+                shard.resources[name] = factory()
+            return shard.resources[name]
+
+    def preload(self, show, dataset, loader, ttl, probe=None):
+        """Charge un jeu de données en arrière-plan s'il n'est pas déjà en cache."""
+        thread = threading.Thread(
+            target=self.get, args=(show, dataset, loader, ttl, probe),
+            name=f"preload-{show}-{dataset}", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def usage(self):
+        """Retourne la mémoire utilisée par salon (octets), du plus ancien au plus récent."""
+        with self._lock:
+            return {show: shard.size() for show, shard in self._shards.items()}
+
+    def _evict(self, keep=None):
+        with self._lock:
+            total = sum(shard.size() for shard in self._shards.values())
+            for show in list(self._shards):
+                if total <= self.budget_bytes:
+                    break
+                shard = self._shards[show]
+                if show == keep or shard.has_sessions():
+                    continue
+                total -= shard.size()
+                del self._shards[show]
+
+
+@st.cache_resource
+def get_show_cache():
+    """Retourne le cache de salons du processus."""
+    try:
+        budget_mb = int(st.secrets.get("show_cache_budget_mb", DEFAULT_BUDGET_MB))
+    except Exception:
+        budget_mb = DEFAULT_BUDGET_MB
+    return ShowCache(budget_mb * 1024 * 1024)
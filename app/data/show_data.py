@@ -0,0 +1,178 @@
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from data.test_data_manager import GoogleSheetsManager
+from data.order_aggregates import stamp_version
+from data.shows import get_show
+from data.show_cache import get_show_cache
+from data.change_probe import get_change_probe
+from data.checklist_loader import ChecklistSections, is_section
+
+
+# Intervalle de rafraîchissement de chaque jeu de données (secondes), modifiable
+# dans la section [refresh_intervals] des secrets
+REFRESH_INTERVALS = {"orders": 30, "dashboard": 60, "checklist": 60}
+
+
+def _ttl(dataset):
+    """Retourne l'intervalle de rafraîchissement d'un jeu de données."""
+    try:
+        return int(st.secrets.get("refresh_intervals", {}).get(dataset, REFRESH_INTERVALS[dataset]))
+    except Exception:
+        return REFRESH_INTERVALS[dataset]
+
+
+def _promote_header(df):
+    """Utilise la première ligne comme en-tête (les feuilles ont une ligne de titre)."""
+    if df.empty:
+        return df
+    df.columns = df.iloc[0].str.strip()  # Strip whitespace from column names
+    df = df[1:]                          # remove the now unnecessary row 0
+    return df.reset_index(drop=True)     # reindex properly
+
+
+def _fetch_order_data(show):
+    """Télécharge les données de la page Orders pour un salon."""
+    sheet_id = get_show(show)["order_tracking_sheet_id"]
+    gs_manager = GoogleSheetsManager()
+
+    # Orders, worksheet list and inventory are independent reads: run them concurrently
+    results = gs_manager.read_many({
+        "orders": (sheet_id, "Orders"),
+        "worksheets": (sheet_id, None),
+        "inventory": (sheet_id, "Show Inventory"),
+    })
+
+    orders_df = stamp_version(_promote_header(results["orders"]))
+    sections = [ws for ws in results["worksheets"] if ws.startswith("Section")]
+    inventory_df = stamp_version(_promote_header(results["inventory"]))
+    get_change_probe().record(sheet_id, {"Orders": orders_df, "Show Inventory": inventory_df})
+
+    # Extract the list of available items from the inventory
+    available_items = inventory_df["Items"].dropna().tolist() if not inventory_df.empty else []
+
+    return orders_df, sections, inventory_df, available_items
+
+
+def _fetch_dashboard_data(show):
+    """Télécharge les données du tableau de bord pour un salon."""
+    ids = get_show(show)
+    gs_manager = GoogleSheetsManager()
+    try:
+        # Orders, checklist and inventory are independent reads: run them concurrently
+        results = gs_manager.read_many({
+            "orders": (ids["order_tracking_sheet_id"], "Orders"),
+            "checklist": (ids["checklist_sheet_id"], "Orders"),
+            "inventory": (ids["order_tracking_sheet_id"], "Show Inventory"),
+        })
+
+        orders_df = stamp_version(_promote_header(results["orders"]))
+        checklist_df = stamp_version(_promote_header(results["checklist"]))
+        inventory_df = stamp_version(_promote_header(results["inventory"]))
+        probe = get_change_probe()
+        probe.record(ids["order_tracking_sheet_id"], {"Orders": orders_df, "Show Inventory": inventory_df})
+        probe.record(ids["checklist_sheet_id"], {"Orders": checklist_df})
+        return orders_df, checklist_df, inventory_df
+    except Exception as e:
+        st.error(f"Error loading data: {e}")
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+
+def _fetch_checklist_data(show):
+    """
+    Télécharge toutes les sections du classeur Booth Checklist en une seule requête.
+
+    Returns:
+        tuple: (checklist de toutes les sections avec une colonne Section,
+                progression par section)
+    """
+    sheet_id = get_show(show)["checklist_sheet_id"]
+    frames = GoogleSheetsManager().get_data_batch(sheet_id, is_section)
+    frames = {section: stamp_version(df) for section, df in frames.items()}
+    get_change_probe().record(sheet_id, frames)
+    # Seules les sections modifiées depuis le dernier chargement sont retraitées
+    return get_show_cache().resource(show, "checklist_sections", ChecklistSections).combine(frames)
+
+
+def _order_probe(show):
+    """Jeton de révision du classeur de suivi des commandes du salon."""
+    ids = get_show(show)
+    return get_change_probe().token(GoogleSheetsManager(), [ids["order_tracking_sheet_id"]])
+
+
+def _dashboard_probe(show):
+    """Jeton de révision des classeurs utilisés par le tableau de bord."""
+    ids = get_show(show)
+    return get_change_probe().token(
+        GoogleSheetsManager(), [ids["order_tracking_sheet_id"], ids["checklist_sheet_id"]]
+    )
+
+
+def _checklist_probe(show):
+    """Jeton de révision du classeur Booth Checklist du salon."""
+    return get_change_probe().token(GoogleSheetsManager(), [get_show(show)["checklist_sheet_id"]])
+
+
+def _mark_active(show):
+    """Garde le salon de la session courante à l'abri de l'éviction."""
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        get_show_cache().touch(show, ctx.session_id)
+
+
+def load_order_data(show):
+    """Retourne (orders_df, sections, inventory_df, available_items) pour un salon."""
+    _mark_active(show)
+    return get_show_cache().get(show, "orders", lambda: _fetch_order_data(show), _ttl("orders"),
+                                probe=lambda: _order_probe(show))
+
+
+def load_dashboard_data(show):
+    """Retourne (orders_df, checklist_df, inventory_df) pour un salon."""
+    _mark_active(show)
+    return get_show_cache().get(show, "dashboard", lambda: _fetch_dashboard_data(show), _ttl("dashboard"),
+                                probe=lambda: _dashboard_probe(show))
+
+
+def load_checklist_data(show):
+    """Retourne (checklist_sections_df, section_progress_df) pour un salon."""
+    _mark_active(show)
+    return get_show_cache().get(show, "checklist", lambda: _fetch_checklist_data(show), _ttl("checklist"),
+                                probe=lambda: _checklist_probe(show))
+
+
+def data_as_of(show, dataset):
+    """Retourne la date (datetime) du dernier chargement ou de la dernière vérification des données."""
+    loaded_at = get_show_cache().loaded_at(show, dataset)
+    return datetime.fromtimestamp(loaded_at) if loaded_at else None
+
+
+def invalidate_show_data(show):
+    """Force le rechargement des données d'un salon (après une écriture)."""
+    probe = get_change_probe()
+    for sheet_id in get_show(show).values():
+        probe.forget(sheet_id)
+    get_show_cache().invalidate(show)
+
+
+def select_show(show):
+    """
+    Marque le salon comme actif pour la session courante et précharge ses données
+    en arrière-plan.
+    """
+    cache = get_show_cache()
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        previous = st.session_state.get("current_show")
+        if previous and previous != show:
+            cache.release(previous, ctx.session_id)
+    _mark_active(show)
+    cache.preload(show, "orders", lambda: _fetch_order_data(show), _ttl("orders"),
+                  probe=lambda: _order_probe(show))
+    cache.preload(show, "dashboard", lambda: _fetch_dashboard_data(show), _ttl("dashboard"),
+                  probe=lambda: _dashboard_probe(show))
+    cache.preload(show, "checklist", lambda: _fetch_checklist_data(show), _ttl("checklist"),
+                  probe=lambda: _checklist_probe(show))
@@ -0,0 +1,37 @@
+import streamlit as st
+
+
+# Classeurs utilisés par chaque salon. D'autres salons peuvent être déclarés dans
+# les secrets Streamlit :
+#
+#   [shows."New York Auto Show 2025"]
+#   order_tracking_sheet_id = "..."
+#   checklist_sheet_id = "..."
+DEFAULT_SHOWS = {
+    "Miami Boat Show 2025": {
+        "order_tracking_sheet_id": "1dYeok-Dy_7a03AhPDLV2NNmGbRNoCD3q0zaAHPwxxCE",
+        "checklist_sheet_id": "19ksIroX0i3WY3XmSGXQpdS1RzjpYKhqMhwK1tYiKZZA",
+    },
+}
+
+
+def get_shows():
+    """Retourne le registre des salons : nom -> identifiants des classeurs."""
+    shows = {name: dict(ids) for name, ids in DEFAULT_SHOWS.items()}
+    try:
+        for name, ids in st.secrets.get("shows", {}).items():
+            shows[name] = dict(ids)
+    except Exception:
+        # Pas de fichier de secrets ou section absente : registre par défaut
+        pass
+    return shows
+
+
+def list_shows():
+    """Retourne la liste des noms de salons."""
+    return list(get_shows())
+
+
+def get_show(show):
+    """Retourne les identifiants des classeurs d'un salon, ou None s'il est inconnu."""
+    return get_shows().get(show)
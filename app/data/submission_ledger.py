@@ -0,0 +1,81 @@
+import hashlib
+import threading
+import time
+
+import streamlit as st
+
+
+# Durée pendant laquelle une soumission (clé ou contenu) est retenue
+SUBMISSION_TTL_SECONDS = 10 * 60
+
+# Deux commandes identiques dans cet intervalle sont considérées comme un doublon
+DUPLICATE_WINDOW_SECONDS = 2 * 60
+
+# Champs qui identifient le contenu d'une commande
+ORDER_FIELDS = ["Booth #", "Section", "Exhibitor Name", "Item", "Color", "Quantity", "Status", "Type",
+                "Boomers Quantity", "Comments"]
+
+
+def order_fingerprint(show, order):
+    """Empreinte du contenu d'une commande (champs normalisés)."""
+    values = [show] + [str(order.get(field, "")).strip().lower() for field in ORDER_FIELDS]
+    return hashlib.sha1("\x1f".join(values).encode("utf-8")).hexdigest()
+
+
+class SubmissionLedger:
+    """
+    Soumissions de formulaire récentes, partagées par toutes les sessions.
+
+    Chaque soumission porte une clé d'idempotence. Une clé déjà appliquée ou en
+    cours, ou une commande identique envoyée il y a moins de
+    DUPLICATE_WINDOW_SECONDS, est refusée avant tout appel à l'API.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = {}          # clé -> (état, heure), état "pending" ou "applied"
+        self._fingerprints = {}  # empreinte -> heure d'envoi
+
+    def _purge(self, now):
+        expired = [key for key, (_, seen) in self._keys.items() if now - seen > SUBMISSION_TTL_SECONDS]
+        for key in expired:
+            del self._keys[key]
+        expired = [fp for fp, seen in self._fingerprints.items() if now - seen > DUPLICATE_WINDOW_SECONDS]
+        for fp in expired:
+            del self._fingerprints[fp]
+
+    def claim(self, key, fingerprint, allow_same_content=False):
+        """
+        Réserve une soumission avant de l'envoyer.
+
+        Returns:
+            str: None si la soumission peut être envoyée, sinon "in_progress",
+                 "applied" ou "duplicate" (commande identique récente)
+        """
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            if key in self._keys:
+                return "in_progress" if self._keys[key][0] == "pending" else "applied"
+            if fingerprint in self._fingerprints and not allow_same_content:
+                return "duplicate"
+            self._keys[key] = ("pending", now)
+            self._fingerprints[fingerprint] = now
+            return None
+
+    def complete(self, key):
+        """Marque une soumission comme appliquée."""
+        with self._lock:
+            self._keys[key] = ("applied", time.time())
+
+    def abandon(self, key, fingerprint):
+        """Libère une soumission qui n'a pas abouti, pour qu'elle puisse être renvoyée."""
+        with self._lock:
+            self._keys.pop(key, None)
+            self._fingerprints.pop(fingerprint, None)
+
+
+@st.cache_resource
+def get_submission_ledger():
+    """Retourne le registre des soumissions du processus."""
+    return SubmissionLedger()
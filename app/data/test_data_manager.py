@@ -1,23 +1,37 @@
 import pandas as pd
 import gspread
+from gspread.urls import DRIVE_FILES_API_V3_URL
 from google.oauth2.service_account import Credentials
 import streamlit as st
 from gspread_dataframe import get_as_dataframe, set_with_dataframe
 from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from gspread.utils import rowcol_to_a1
+from data.client_pool import SCOPES, get_client_pool
+
+# Nombre maximal de lectures simultanées pour tout le processus (quota de l'API Sheets)
+MAX_CONCURRENT_READS = 4
+_read_slots = threading.BoundedSemaphore(MAX_CONCURRENT_READS)
 
 class GoogleSheetsManager:
     """Gestionnaire pour interagir avec les fichiers Google Sheets."""
     
     def __init__(self):
         # Définir les scopes nécessaires pour l'API
-        self.scopes = [
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive'
-        ]
+        self.scopes = SCOPES
         
-        # Se connecter à l'API Google Sheets
+        # Se connecter à l'API Google Sheets (pool partagé par tout le processus)
         # self._connect()
-        self.client = self._connect()
+        self.pool = self._connect()
+
+    @property
+    def client(self):
+        """Client gspread partagé, avec un jeton renouvelé avant expiration."""
+        if self.pool is None:
+            return None
+        return self.pool.client()
         
     # @st.cache_resource(ttl=3600)
     # def _connect(_self):
@@ -36,18 +50,11 @@ class GoogleSheetsManager:
     #         st.error(f"Erreur de connexion à Google Sheets: {e}")
     #         return None
 
-    @st.cache_resource(ttl=3600)
-    def _connect(_self):
+    def _connect(self):
         """Établit la connexion à l'API Google Sheets."""
         try:
-            # Récupérer les identifiants depuis les secrets Streamlit
-            credentials = Credentials.from_service_account_info(
-                st.secrets["gcp_service_account"],
-                scopes=_self.scopes
-            )
-            
-            # Créer le client gspread
-            return gspread.authorize(credentials)
+            # Les identifiants et la session HTTP sont créés une seule fois par processus
+            return get_client_pool()
         except Exception as e:
             st.error(f"Erreur de connexion à Google Sheets: {e}")
             return None
@@ -56,8 +63,9 @@ class GoogleSheetsManager:
     def get_worksheets(self, sheet_id):
         """Récupère la liste des feuilles d'un classeur Google Sheets."""
         try:
-            spreadsheet = self.client.open_by_key(sheet_id)
-            return [worksheet.title for worksheet in spreadsheet.worksheets()]
+            with _read_slots:
+                spreadsheet = self.client.open_by_key(sheet_id)
+                return [worksheet.title for worksheet in spreadsheet.worksheets()]
         except Exception as e:
             st.error(f"Erreur lors de la récupération des feuilles: {e}")
             return []
@@ -67,15 +75,98 @@ class GoogleSheetsManager:
     def get_data(self, sheet_id, worksheet_name):
         """Récupère les données d'une feuille Google Sheets."""
         try:
-            sheet = self.client.open_by_key(sheet_id)
-            worksheet = sheet.worksheet(worksheet_name)
-            df = get_as_dataframe(worksheet, evaluate_formulas=True, skipinitialspace=True)
+            with _read_slots:
+                sheet = self.client.open_by_key(sheet_id)
+                worksheet = sheet.worksheet(worksheet_name)
+                df = get_as_dataframe(worksheet, evaluate_formulas=True, skipinitialspace=True)
             df = df.dropna(how='all').reset_index(drop=True)
             return df
         except Exception as e:
             # st.error(f"Erreur lors de la récupération des données: {e}")
             return pd.DataFrame()
 
+    def get_data_batch(self, sheet_id, select):
+        """
+        Récupère en une seule requête (values.batchGet) toutes les feuilles d'un
+        classeur dont le nom est accepté par `select`.
+
+        Returns:
+            dict: nom de la feuille -> DataFrame (la première ligne sert d'en-tête),
+                  dans l'ordre du classeur
+        """
+        try:
+            with _read_slots:
+                spreadsheet = self.client.open_by_key(sheet_id)
+                names = [worksheet.title for worksheet in spreadsheet.worksheets() if select(worksheet.title)]
+                if not names:
+                    return {}
+                # Notation A1 : nom entre apostrophes, apostrophes internes doublées
+                quoted = ["'" + name.replace("'", "''") + "'" for name in names]
+                response = spreadsheet.values_batch_get(
+                    quoted,
+                    params={"valueRenderOption": "UNFORMATTED_VALUE"},
+                )
+        except Exception as e:
+            st.error(f"Erreur lors de la récupération des données: {e}")
+            return {}
+
+        frames = {}
+        for name, value_range in zip(names, response.get("valueRanges", [])):
+            values = value_range.get("values", [])
+            if not values:
+                frames[name] = pd.DataFrame()
+                continue
+            header = [str(column) for column in values[0]]
+            rows = [row[:len(header)] + [None] * (len(header) - len(row)) for row in values[1:]]
+            df = pd.DataFrame(rows, columns=header).replace("", None)
+            frames[name] = df.dropna(how='all').reset_index(drop=True)
+        return frames
+
+    def get_revision(self, sheet_id):
+        """
+        Retourne la date de dernière modification d'un classeur (métadonnées Drive).
+
+        C'est une requête très légère : elle permet de savoir si un classeur a changé
+        sans télécharger ses feuilles. Retourne None en cas d'erreur.
+        """
+        try:
+            with _read_slots:
+                response = self.client.request(
+                    "get",
+                    f"{DRIVE_FILES_API_V3_URL}/{sheet_id}",
+                    params={"fields": "modifiedTime", "supportsAllDrives": True},
+                )
+            return response.json().get("modifiedTime")
+        except Exception as e:
+            print(f"Erreur lors de la vérification des modifications: {e}")
+            return None
+
+    def read_many(self, reads, max_workers=MAX_CONCURRENT_READS):
+        """
+        Effectue plusieurs lectures indépendantes en parallèle.
+
+        Args:
+            reads (dict): nom -> (sheet_id, worksheet_name). Si worksheet_name est None,
+                          la lecture retourne la liste des feuilles du classeur.
+            max_workers (int): nombre maximal de lectures lancées en même temps
+
+        Returns:
+            dict: nom -> DataFrame (ou liste des feuilles), comme get_data / get_worksheets
+        """
+        ctx = get_script_run_ctx()
+
+        def run(sheet_id, worksheet_name):
+            # Permet aux messages st.error des threads d'apparaître sur la page
+            add_script_run_ctx(threading.current_thread(), ctx)
+            if worksheet_name is None:
+                return self.get_worksheets(sheet_id)
+            return self.get_data(sheet_id, worksheet_name)
+
+        workers = max(1, min(max_workers, len(reads)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {name: executor.submit(run, *args) for name, args in reads.items()}
+            return {name: future.result() for name, future in futures.items()}
+
     
     
     def update_order_status(self, sheet_id, worksheet, booth_num, item_name, color, status, user):
@@ -115,6 +206,63 @@ class GoogleSheetsManager:
             st.error(f"Erreur lors de la mise à jour du statut: {e}")
             return False
     
+    def update_order_statuses(self, sheet_id, worksheet, updates, user):
+        """
+        Met à jour le statut de plusieurs commandes d'une même feuille : une lecture
+        de la feuille puis une seule écriture groupée (statut, utilisateur, date, heure).
+
+        Args:
+            updates (list): tuples (booth_num, item_name, color, status)
+
+        Returns:
+            list: pour chaque mise à jour, True si la ligne a été trouvée et écrite
+        """
+        from data.booth_fulfillment import normalize_keys
+
+        try:
+            with _read_slots:
+                spreadsheet = self.client.open_by_key(sheet_id)
+                worksheet = spreadsheet.worksheet(worksheet)
+                values = worksheet.get_all_values()
+            if not values or not updates:
+                return [False] * len(updates)
+
+            header = [h.strip() for h in values[0]]
+            columns = {name: header.index(name) + 1 for name in ["Booth #", "Item", "Color", "Status", "User",
+                                                                 "Date", "Hour"] if name in header}
+            if not {"Booth #", "Item", "Color", "Status"} <= set(columns):
+                st.error(f"Colonnes manquantes dans la feuille {worksheet.title}")
+                return [False] * len(updates)
+
+            # Première ligne de la feuille pour chaque clé stand + article + couleur
+            rows = pd.DataFrame(values[1:]).reindex(columns=range(len(header)), fill_value="")
+            keys = (normalize_keys(rows[columns["Booth #"] - 1]) + "|" + normalize_keys(rows[columns["Item"] - 1])
+                    + "|" + normalize_keys(rows[columns["Color"] - 1]))
+            first_row = {key: i + 2 for i, key in reversed(list(enumerate(keys)))}
+
+            update_keys = (normalize_keys([u[0] for u in updates]) + "|" + normalize_keys([u[1] for u in updates])
+                           + "|" + normalize_keys([u[2] for u in updates]))
+            now = datetime.now()
+            stamp = {"User": user, "Date": now.strftime("%m/%d/%Y"), "Hour": now.strftime("%I:%M:%S %p")}
+
+            data, found = [], []
+            for key, (_, _, _, status) in zip(update_keys, updates):
+                row_index = first_row.get(key)
+                found.append(row_index is not None)
+                if row_index is None:
+                    continue
+                data.append({"range": rowcol_to_a1(row_index, columns["Status"]), "values": [[status]]})
+                for name, value in stamp.items():
+                    if name in columns:
+                        data.append({"range": rowcol_to_a1(row_index, columns[name]), "values": [[value]]})
+
+            if data:
+                worksheet.batch_update(data, value_input_option="USER_ENTERED")
+            return found
+        except Exception as e:
+            st.error(f"Erreur lors de la mise à jour des statuts: {e}")
+            return [False] * len(updates)
+
     def update_checklist_item(self, sheet_id, worksheet, booth_num, item_name, data):
         """Met à jour un élément de checklist dans le classeur Booth Checklist."""
         try:
@@ -0,0 +1,138 @@
+import json
+import os
+import sqlite3
+import threading
+
+import streamlit as st
+
+
+USERS_DB = ".streamlit/users.db"
+
+# Ancien fichier, importé dans la base au premier démarrage
+USERS_FILE = ".streamlit/users.json"
+
+USER_FIELDS = ["password_hash", "initials", "is_admin", "created_at", "last_reset"]
+
+
+class UserStore:
+    """
+    Comptes utilisateurs dans SQLite, indexés par email et par initiales.
+
+    Une seule instance est partagée par toutes les sessions du processus. Chaque
+    modification porte sur une seule ligne, dans une transaction, et incrémente
+    `version` pour que les sessions sachent que la liste a changé.
+    """
+
+    def __init__(self, path=USERS_DB, legacy_file=USERS_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                email TEXT PRIMARY KEY,
+                password_hash TEXT NOT NULL,
+                initials TEXT NOT NULL,
+                is_admin INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT,
+                last_reset TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS users_initials ON users (initials)")
+        self._local_version = 0
+        self._cache = None
+        self._cache_key = None
+
+        if self.count() == 0 and os.path.exists(legacy_file):
+            self._import_json(legacy_file)
+
+    def _import_json(self, legacy_file):
+        """Importe les comptes de l'ancien fichier users.json."""
+        try:
+            with open(legacy_file, 'r') as f:
+                users = json.load(f)
+        except Exception as e:
+            print(f"Erreur lors de l'import de {legacy_file}: {e}")
+            return
+        for email, record in users.items():
+            self.add(email, record)
+
+    @property
+    def version(self):
+        """Change à chaque modification, y compris par un autre processus."""
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            return (data_version, self._local_version)
+
+    def _row_to_record(self, row):
+        record = {field: row[field] for field in USER_FIELDS if row[field] is not None}
+        record["is_admin"] = bool(row["is_admin"])
+        return record
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def get(self, email):
+        """Retourne le compte associé à un email, ou None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def find_email_by_initials(self, initials):
+        """Retourne l'email du (premier) compte ayant ces initiales, ou None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT email FROM users WHERE initials = ? ORDER BY rowid LIMIT 1", (initials,)
+            ).fetchone()
+        return row["email"] if row else None
+
+    def all(self):
+        """Retourne tous les comptes (email -> dict), mis en cache jusqu'à la prochaine modification."""
+        with self._lock:
+            key = self.version
+            if self._cache is None or self._cache_key != key:
+                rows = self._conn.execute("SELECT * FROM users ORDER BY rowid").fetchall()
+                self._cache = {row["email"]: self._row_to_record(row) for row in rows}
+                self._cache_key = key
+            return dict(self._cache)
+
+    def add(self, email, record):
+        """Crée un compte. Retourne False si l'email existe déjà."""
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT INTO users (email, password_hash, initials, is_admin, created_at, last_reset) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (email, record["password_hash"], record.get("initials", ""),
+                     int(bool(record.get("is_admin", False))), record.get("created_at"),
+                     record.get("last_reset")),
+                )
+            except sqlite3.IntegrityError:
+                return False
+            self._local_version += 1
+            return True
+
+    def set_password(self, email, password_hash, last_reset):
+        """Remplace le mot de passe d'un compte. Retourne False si le compte n'existe pas."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE users SET password_hash = ?, last_reset = ? WHERE email = ?",
+                (password_hash, last_reset, email),
+            )
+            self._local_version += 1
+            return cursor.rowcount == 1
+
+    def delete(self, email):
+        """Supprime un compte. Retourne False si le compte n'existe pas."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM users WHERE email = ?", (email,))
+            self._local_version += 1
+            return cursor.rowcount == 1
+
+
+@st.cache_resource
+def get_user_store():
+    """Retourne le magasin d'utilisateurs du processus."""
+    return UserStore()
@@ -0,0 +1,396 @@
+"""
+Concurrent-session load test for the Streamlit pages.
+
+Drives N headless sessions of Home.py and pages/1_Orders.py with Streamlit's
+AppTest. AppTest is not thread-safe (it installs a process-wide Runtime, config
+options and st.secrets), so every session runs in its own process. Each session
+runs a user script:
+
+    login -> dashboard -> open Orders -> filter by section -> filter by status
+          -> search -> edit a status -> add an order
+
+The Sheets API is replaced by the in-memory stand-in (data.local_sheets). Every
+process seeds it from the same synthetic workbook file and adds a fixed latency
+to every call. The processes don't share caches or sheet writes: a level
+measures N single-session servers contending for the same machine. To measure
+cache sharing between sessions, drive a real `streamlit run` server instead.
+
+AppTest cannot edit st.data_editor cells. The "edit status" step therefore writes
+through order_service.set_status and then reruns the page. It does not go
+through the page's editor path (update_order_status + safe_clear_cache).
+
+For each concurrency level the report gives rerun latency percentiles per step,
+Sheets API calls per minute, CPU (all session processes) and peak resident
+memory (sum of the per-process peaks):
+
+    python load_test.py --sessions 1,5,10,20 --iterations 3 --latency 0.15
+    python load_test.py --sessions 10 --json results.json
+
+Runs in a temporary working directory: the user database, profiles and other
+.streamlit files of the app are not touched.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+HOME_SCRIPT = os.path.join(APP_DIR, "Home.py")
+ORDERS_SCRIPT = os.path.join(APP_DIR, "pages", "1_Orders.py")
+
+SECTIONS = ["Section A", "Section B", "Section C", "Section D"]
+ITEMS = ["Chair", "Table 6ft", "Table 8ft", "Carpet", "Trash Can", "Power Strip", "Easel", "Stool"]
+COLORS = ["White ", "Black ", "Blue", "Red "]
+STATUSES = ["In Process", "In route from warehouse", "Delivered", "Received"]
+ORDER_COLUMNS = ["Booth #", "Section", "Exhibitor Name", "Item", "Color", "Quantity", "Date", "Hour",
+                 "Status", "Type", "Boomer's Quantity", "Comments", "User"]
+
+STEPS = ["login", "open orders", "filter section", "filter status", "search", "edit status", "add order"]
+
+EDIT_STATUS_NOTE = ("'edit status' writes through order_service.set_status (AppTest cannot drive "
+                    "st.data_editor), not the page's editor path (update_order_status + safe_clear_cache)")
+
+PASSWORD = "load-test-password"
+
+
+def _titled(title, header, rows):
+    """Worksheet read with a title line above the header, like the real Orders and Show Inventory sheets."""
+    return [[title] + [""] * (len(header) - 1), header] + rows
+
+
+def build_workbooks(show_ids, booths=300, orders=2000, seed=7):
+    """
+    Synthetic order tracking and checklist workbooks, in the local_sheets JSON layout.
+
+    Orders and Show Inventory have a title line above the header (the pages skip
+    it); the section sheets, which the status updates write to, don't.
+    """
+    rng = random.Random(seed)
+    start = datetime.now().replace(hour=7, minute=0, second=0, microsecond=0)
+
+    exhibitors = {booth: f"Exhibitor {booth}" for booth in range(100, 100 + booths)}
+    booth_sections = {booth: SECTIONS[i % len(SECTIONS)] for i, booth in enumerate(exhibitors)}
+
+    order_rows = []
+    for _ in range(orders):
+        booth = rng.choice(list(exhibitors))
+        placed = start + timedelta(seconds=rng.randint(0, 10 * 3600))
+        order_rows.append([
+            str(booth), booth_sections[booth], exhibitors[booth], rng.choice(ITEMS), rng.choice(COLORS),
+            str(rng.randint(1, 6)), placed.strftime("%m/%d/%Y"), placed.strftime("%I:%M:%S %p"),
+            rng.choice(STATUSES), "New Order", "1", "", "LT",
+        ])
+
+    order_sheet = {"Orders": _titled("Order Tracking", ORDER_COLUMNS, order_rows)}
+    for section in SECTIONS:
+        order_sheet[section] = [ORDER_COLUMNS] + [row for row in order_rows if row[1] == section]
+    order_sheet["Show Inventory"] = _titled(
+        "Show Inventory", ["Items", "Starting Quantity", "Damaged Items", "Ordered items", "Available Quantity"],
+        [[item, str(rng.randint(orders // 2, orders)), "0", "", ""] for item in ITEMS],
+    )
+
+    checklist_columns = ["Booth #", "Exhibitor Name", "Item Name", "Status"]
+    checklist_rows = [[str(booth), exhibitors[booth], rng.choice(ITEMS), rng.choice(["TRUE", "FALSE"])]
+                      for booth in exhibitors for _ in range(2)]
+    checklist_sheet = {"Orders": _titled("Booth Checklist", checklist_columns, checklist_rows)}
+    for section in SECTIONS:
+        checklist_sheet[section] = [checklist_columns] + [
+            row for row in checklist_rows if booth_sections[int(row[0])] == section
+        ]
+
+    return {show_ids["order_tracking_sheet_id"]: order_sheet, show_ids["checklist_sheet_id"]: checklist_sheet}
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class ResourceSampler(threading.Thread):
+    """Samples the resident memory of the current process while a session runs."""
+
+    def __init__(self, interval=0.5):
+        super().__init__(name="load-test-sampler", daemon=True)
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.rss_samples = []
+
+    def run(self):
+        from data.memory_report import process_memory
+
+        while not self.stop_event.wait(self.interval):
+            rss = process_memory()
+            if rss:
+                self.rss_samples.append(rss)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+class LoadSession:
+    """One simulated user: a Home session and an Orders session sharing the login state."""
+
+    def __init__(self, number, show, timeout, think_time, seed):
+        self.email = f"load{number}@expocci.com"
+        self.number = number
+        self.show = show
+        self.timeout = timeout
+        self.think_time = think_time
+        self.rng = random.Random(seed + number)
+        self.timings = []  # (step, seconds, ok)
+        self.errors = []
+
+    def _timed(self, step, action):
+        started = time.perf_counter()
+        try:
+            at = action()
+            ok = not at.exception
+            if not ok:
+                self.errors.append(f"{step}: {at.exception[0].value}")
+        except Exception as e:
+            ok = False
+            self.errors.append(f"{step}: {e}")
+        self.timings.append((step, time.perf_counter() - started, ok))
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, 2 * self.think_time))
+
+    def run(self, iterations):
+        from streamlit.testing.v1 import AppTest
+        from data.order_service import find_orders, set_status
+
+        home = AppTest.from_file(HOME_SCRIPT, default_timeout=self.timeout)
+        home.run()
+        home.text_input(key="login_email").input(self.email)
+        home.text_input(key="login_password").input(PASSWORD)
+        # The login reruns the script into the dashboard
+        self._timed("login", lambda: home.button(key="login_button").click().run())
+        if not home.session_state["authenticated"]:
+            self.errors.append("login: not authenticated")
+            return
+
+        orders = AppTest.from_file(ORDERS_SCRIPT, default_timeout=self.timeout)
+        for key in ["authenticated", "current_user", "current_show"]:
+            orders.session_state[key] = home.session_state[key]
+        self._timed("open orders", orders.run)
+
+        # Widgets are looked up again before each step: every run rebuilds the element tree
+        def section_filter():
+            return orders.sidebar.selectbox[0]
+
+        def status_filter():
+            return orders.sidebar.selectbox[1]
+
+        def search():
+            return orders.sidebar.text_input[0]
+
+        for _ in range(iterations):
+            self._timed("filter section", lambda: section_filter().select(self.rng.choice(SECTIONS)).run())
+            self._timed("filter status", lambda: status_filter().select(self.rng.choice(["All", "Delivered"])).run())
+            self._timed("search", lambda: search().input(str(self.rng.randint(100, 199))).run())
+
+            # AppTest cannot drive st.data_editor: the edit goes through the same data layer
+            # call as the editor (one status write, shared counters, cache invalidation),
+            # then the page reruns like it does after an edit
+            def edit_status():
+                candidates = find_orders(self.show, section=section_filter().value)
+                if not candidates.empty:
+                    order = candidates.iloc[self.rng.randrange(len(candidates))]
+                    set_status(self.show, order, self.rng.choice(STATUSES), home.session_state["current_user"])
+                return orders.run()
+
+            self._timed("edit status", edit_status)
+
+            def add_order():
+                next(w for w in orders.selectbox if w.label == "Item").select(self.rng.choice(ITEMS))
+                next(w for w in orders.text_input if w.label == "Booth Number").input(
+                    str(self.rng.randint(100, 199)))
+                next(w for w in orders.text_input if w.label == "Exhibitor Name").input(f"Load test {self.number}")
+                next(w for w in orders.checkbox if w.label.startswith("Add again")).check()
+                return next(w for w in orders.button if w.label == "Add Order").click().run()
+
+            self._timed("add order", add_order)
+            search().input("")
+
+
+def create_users(count):
+    from data.user_store import get_user_store
+
+    store = get_user_store()
+    password_hash = hashlib.sha256(PASSWORD.encode()).hexdigest()
+    for number in range(count):
+        store.add(f"load{number}@expocci.com", {
+            "password_hash": password_hash,
+            "initials": f"L{number}",
+            "is_admin": False,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+
+def run_session(number, iterations, show, timeout, think_time, seed, workdir, start_barrier, results):
+    """Runs one user in the current (dedicated) process and puts its measurements on `results`."""
+    os.chdir(workdir)
+    sys.path.insert(0, APP_DIR)
+    user = LoadSession(number, show, timeout, think_time, seed)
+    try:
+        from data.client_pool import get_client_pool
+
+        client = get_client_pool().client()
+    except Exception as e:
+        # Don't leave the other sessions waiting at the barrier
+        start_barrier.abort()
+        results.put({"started": time.time(), "finished": time.time(), "timings": [],
+                     "errors": [f"session start: {e}"], "api_calls": 0, "cpu_s": 0.0, "peak_rss": None})
+        return
+    sampler = ResourceSampler()
+    # Imports and process start-up are done: all sessions of the level start together
+    try:
+        start_barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    calls_before, cpu_before = client.calls, time.process_time()
+    started = time.time()
+    sampler.start()
+    try:
+        user.run(iterations)
+    except Exception as e:
+        user.errors.append(f"session: {e}")
+    finally:
+        sampler.stop()
+        results.put({
+            "started": started,
+            "finished": time.time(),
+            "timings": user.timings,
+            "errors": user.errors,
+            "api_calls": client.calls - calls_before,
+            "cpu_s": time.process_time() - cpu_before,
+            "peak_rss": max(sampler.rss_samples) if sampler.rss_samples else None,
+        })
+
+
+def run_level(sessions, iterations, show, timeout, think_time, seed, workdir):
+    """Runs `sessions` users concurrently, one process each, and returns the measurements of this level."""
+    context = multiprocessing.get_context("spawn")
+    start_barrier = context.Barrier(sessions)
+    queue = context.Queue()
+    processes = [
+        context.Process(target=run_session, name=f"load-session-{number}",
+                        args=(number, iterations, show, timeout, think_time, seed, workdir, start_barrier, queue))
+        for number in range(sessions)
+    ]
+    for process in processes:
+        process.start()
+    # Results are read before join: a child cannot exit while its queue data is unread
+    users = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    elapsed = max(user["finished"] for user in users) - min(user["started"] for user in users)
+    timings = [timing for user in users for timing in user["timings"]]
+    latencies = {step: [seconds for name, seconds, _ in timings if name == step] for step in STEPS}
+    all_reruns = [seconds for _, seconds, _ in timings]
+    peaks = [user["peak_rss"] for user in users if user["peak_rss"]]
+    return {
+        "sessions": sessions,
+        "elapsed_s": round(elapsed, 2),
+        "reruns": len(timings),
+        "errors": sum(1 for _, _, ok in timings if not ok),
+        "error_samples": [error for user in users for error in user["errors"]][:5],
+        "p50_s": round(percentile(all_reruns, 50), 3),
+        "p90_s": round(percentile(all_reruns, 90), 3),
+        "p99_s": round(percentile(all_reruns, 99), 3),
+        "steps": {
+            step: {"p50_s": round(percentile(values, 50), 3), "p90_s": round(percentile(values, 90), 3),
+                   "p99_s": round(percentile(values, 99), 3)}
+            for step, values in latencies.items() if values
+        },
+        "api_calls_per_min": round(sum(user["api_calls"] for user in users) / elapsed * 60, 1),
+        "cpu_percent": round(100 * sum(user["cpu_s"] for user in users) / elapsed, 1),
+        "peak_rss_mb": round(sum(peaks) / 1024 ** 2, 1) if peaks else None,
+    }
+
+
+def print_report(results, latency):
+    print(f"\nSheets latency: {latency * 1000:.0f} ms per call, one process per session")
+    print(f"Note: {EDIT_STATUS_NOTE}")
+    header = f"{'sessions':>8} {'reruns':>7} {'errors':>6} {'p50 s':>7} {'p90 s':>7} {'p99 s':>7} " \
+             f"{'calls/min':>9} {'cpu %':>6} {'rss MB':>7}"
+    print(header)
+    print("-" * len(header))
+    for level in results:
+        print(f"{level['sessions']:>8} {level['reruns']:>7} {level['errors']:>6} {level['p50_s']:>7.3f} "
+              f"{level['p90_s']:>7.3f} {level['p99_s']:>7.3f} {level['api_calls_per_min']:>9.1f} "
+              f"{level['cpu_percent'] if level['cpu_percent'] is not None else 'n/a':>6} "
+              f"{level['peak_rss_mb'] if level['peak_rss_mb'] is not None else 'n/a':>7}")
+
+    print("\np90 per step (s)")
+    print(f"{'sessions':>8} " + " ".join(f"{step:>14}" for step in STEPS))
+    for level in results:
+        print(f"{level['sessions']:>8} " + " ".join(
+            f"{level['steps'][step]['p90_s']:>14.3f}" if step in level["steps"] else f"{'-':>14}"
+            for step in STEPS))
+
+    for level in results:
+        for error in level["error_samples"]:
+            print(f"[{level['sessions']} sessions] {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test of the Orders App")
+    parser.add_argument("--sessions", default="1,5,10,20", help="Concurrency levels, comma-separated")
+    parser.add_argument("--iterations", type=int, default=3, help="Filter/search/edit/add rounds per session")
+    parser.add_argument("--latency", type=float, default=0.15, help="Seconds added to every Sheets call")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Average pause between steps (seconds)")
+    parser.add_argument("--orders", type=int, default=2000, help="Orders in the synthetic show")
+    parser.add_argument("--timeout", type=float, default=120, help="Timeout of a single rerun (seconds)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.sessions.split(",") if level.strip()]
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    workdir = tempfile.mkdtemp(prefix="orders-load-test-")
+    os.chdir(workdir)
+    sys.path.insert(0, APP_DIR)
+
+    from data.shows import get_show, list_shows
+
+    show = list_shows()[0]
+    workbook_file = os.path.join(workdir, "sheets.json")
+    with open(workbook_file, "w", encoding="utf-8") as f:
+        json.dump(build_workbooks(get_show(show), orders=args.orders, seed=args.seed), f)
+
+    # Inherited by the session processes: each one seeds its client pool from the same file
+    os.environ["ORDERS_APP_SHEETS"] = "local"
+    os.environ["ORDERS_APP_LOCAL_SHEETS"] = workbook_file
+    os.environ["ORDERS_APP_LOCAL_LATENCY"] = str(args.latency)
+    create_users(max(levels))
+
+    print(f"Load test of '{show}' with {args.orders} orders, working directory {workdir}")
+    results = []
+    for sessions in levels:
+        print(f"Running {sessions} concurrent sessions...")
+        results.append(run_level(sessions, args.iterations, show, args.timeout, args.think_time, args.seed,
+                                 workdir))
+
+    print_report(results, args.latency)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"latency_s": args.latency, "orders": args.orders, "notes": [EDIT_STATUS_NOTE],
+                       "levels": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,10 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 import time
+import uuid
 import asyncio
-# from data.data_manager import GoogleSheetsManager
-from data.test_data_manager import GoogleSheetsManager
-from data.direct_sheets_operations import direct_add_order, direct_delete_order
+from data.import_profiler import track_imports
+from data.rerun_profiler import begin_rerun, checkpoint, finish_rerun
 
 # Page configuration
 st.set_page_config(
@@ -24,6 +23,30 @@ if "current_show" not in st.session_state or st.session_state.current_show is No
     st.warning("Please select a show to continue.")
     st.stop()
 
+# Timing spans for this rerun (no-op unless profiling is enabled)
+begin_rerun("Orders")
+checkpoint("imports")
+
+# Heavy modules are imported only after the checks above
+with track_imports("Orders"):
+    import pandas as pd
+    # from data.data_manager import GoogleSheetsManager
+    from data.test_data_manager import GoogleSheetsManager
+    from data.direct_sheets_operations import direct_add_order, direct_delete_order
+    from data.order_aggregates import get_order_aggregates
+    from data.order_time_index import get_order_time_index
+    from data.inventory_engine import get_inventory_engine
+    from data.booth_fulfillment import get_booth_fulfillment
+    from data.order_export import EXPORT_FORMATS, start_export
+    from data.submission_ledger import get_submission_ledger, order_fingerprint
+    from data.bulk_status import parse_scan_csv, match_scans
+    from data.order_service import set_statuses
+    from data.order_view import filter_orders
+    from data.event_log import get_event_log
+    from data.memory_report import record_session
+    from data.shows import get_show
+    from data.show_data import load_order_data, invalidate_show_data, data_as_of
+
 # Data manager initialization
 gs_manager = GoogleSheetsManager()
 
@@ -39,35 +62,19 @@ def safe_clear_cache():
     except Exception as e:
         st.error(f"Error clearing cache: {e}")
 
-# Function to load data
-@st.cache_data(ttl=30)  # Cache for 30 seconds to refresh more frequently
+# Sheet IDs of the selected show
+show = st.session_state.current_show
+show_ids = get_show(show)
+if show_ids is None:
+    st.warning(f"No spreadsheets are configured for {show}.")
+    st.stop()
+ORDER_SHEET_ID = show_ids["order_tracking_sheet_id"]
+
+# Function to load data (cached per show, shared by all sessions)
 def load_orders():
-    # Load header data from the "Orders" sheet
-    # orders_df = gs_manager.get_data(st.secrets["order_tracking_sheet_id"], "Orders")
-    orders_df = gs_manager.get_data("1dYeok-Dy_7a03AhPDLV2NNmGbRNoCD3q0zaAHPwxxCE", "Orders")
-    # Get the list of available sections
-    # worksheets = gs_manager.get_worksheets(st.secrets["order_tracking_sheet_id"])
-    worksheets = gs_manager.get_worksheets("1dYeok-Dy_7a03AhPDLV2NNmGbRNoCD3q0zaAHPwxxCE")
-    sections = [ws for ws in worksheets if ws.startswith("Section")]
-    
-    # Load inventory data
-    # inventory_df = gs_manager.get_data(st.secrets["order_tracking_sheet_id"], "Show Inventory")
-    inventory_df = gs_manager.get_data("1dYeok-Dy_7a03AhPDLV2NNmGbRNoCD3q0zaAHPwxxCE", "Show Inventory")
-
-    # Redefine column names from the first row
-    orders_df.columns = orders_df.iloc[0].str.strip()  # Strip whitespace from column names
-    orders_df = orders_df[1:]              # remove the now unnecessary row 0
-    orders_df = orders_df.reset_index(drop=True)  # reindex properly
-
-    # Redefine column names from the first row for inventory
-    inventory_df.columns = inventory_df.iloc[0].str.strip()  # Strip whitespace from column names
-    inventory_df = inventory_df[1:]              # remove the now unnecessary row 0
-    inventory_df = inventory_df.reset_index(drop=True)  # reindex properly
-
-    # Extract the list of available items from the inventory
-    available_items = inventory_df["Items"].dropna().tolist() if not inventory_df.empty else []
-    
-    return orders_df, sections, inventory_df, available_items
+    return load_order_data(show)
+
+checkpoint("load")
 
 # Initialize the session state for data reloading if needed
 if "reload_data" not in st.session_state:
@@ -75,12 +82,24 @@ if "reload_data" not in st.session_state:
 
 # Check if we need to reload data and reset the flag
 if st.session_state.get('reload_data', False):
-    load_orders.clear()
+    invalidate_show_data(show)
     st.session_state.reload_data = False
 
 # Load data
 orders_df, sections, inventory_df, available_items = load_orders()
 
+as_of = data_as_of(show, "orders")
+if as_of:
+    st.caption(f"Data as of {as_of.strftime('%I:%M:%S %p')}")
+
+# Shared order counters (also used by the Home dashboard)
+aggregates = get_order_aggregates(show).sync(orders_df)
+
+# Stock per item, computed locally and updated with each order
+inventory_engine = get_inventory_engine(show).sync(orders_df, inventory_df)
+
+checkpoint("sidebar")
+
 # Sidebar for selecting section and status - MOVED UP before first use of search_query
 with st.sidebar:
     st.header("Filters")
@@ -103,8 +122,27 @@ with st.sidebar:
         st.rerun()
 
 # Function to add a new order
+@st.fragment
 def add_new_order():
     st.subheader("Add a New Order")
+
+    # Idempotency key of this form submission, renewed only once the order has been added
+    submission_key = st.session_state.setdefault("new_order_key", uuid.uuid4().hex)
+
+    # The item is picked outside the form so its remaining stock shows up as soon as it is selected
+    if available_items:
+        item = st.selectbox("Item", [""] + available_items + ["Unlisted Item - See the Comments"])
+    else:
+        item = st.text_input("Item")
+
+    comments_required = item == "Unlisted Item - See the Comments"
+
+    remaining = inventory_engine.available(item) if item else None
+    if remaining is not None:
+        if remaining > 0:
+            st.caption(f"Remaining stock for {item}: {remaining:g}")
+        else:
+            st.warning(f"{item} is out of stock (remaining: {remaining:g}).")
     
     with st.form("new_order_form"):
         col1, col2, col3 = st.columns(3)
@@ -122,14 +160,6 @@ def add_new_order():
             
         with col2:
             exhibitor_name = st.text_input("Exhibitor Name")
-            
-            # If items are available, show a selector
-            if available_items:
-                item = st.selectbox("Item", [""] + available_items + ["Unlisted Item - See the Comments"])
-            else:
-                item = st.text_input("Item")
-            
-            comments_required = item == "Unlisted Item - See the Comments"
 
             # Order type
             order_type = st.selectbox("Type", ["New Order", "Missing Item ", "Remove"])
@@ -141,6 +171,10 @@ def add_new_order():
             quantity = st.number_input("Quantity", min_value=1, max_value=10000000000000, value=1)
 
             boomer = st.number_input("Boomer's Quantity", min_value=1, max_value=10000000000000, value=1)
+
+            allow_over = False
+            if remaining is not None:
+                allow_over = st.checkbox("Order beyond remaining stock")
     
         # Comments
         comments = st.text_area("Comments", max_chars=1000, help="Enter additional details here")
@@ -148,6 +182,8 @@ def add_new_order():
         # Check if comments are required
         if comments_required and not comments:
             st.warning("Comments are required for unlisted items.")
+
+        repeat_order = st.checkbox("Add again even if an identical order was just added")
         
         # Submit button
         submit_button = st.form_submit_button("Add Order", use_container_width=True)
@@ -173,302 +209,466 @@ def add_new_order():
                     'User': st.session_state.current_user
                 }
                 
-                success = direct_add_order("1dYeok-Dy_7a03AhPDLV2NNmGbRNoCD3q0zaAHPwxxCE", order_data)
+                # Repeated clicks and identical recent orders are dropped before any API call
+                ledger = get_submission_ledger()
+                fingerprint = order_fingerprint(show, order_data)
+                rejected = ledger.claim(submission_key, fingerprint, allow_same_content=repeat_order)
 
-                if success:
-                    st.success("Order added successfully!")
-                    # Force le rechargement complet des données
-                    load_orders.clear()  # Effacer le cache de load_orders
-                    st.session_state.reload_data = True
-                    time.sleep(1)
-                    st.rerun()  # Reload the page
+                if rejected == "in_progress":
+                    st.info("This order is already being added.")
+                elif rejected == "applied":
+                    st.info("This order has already been added.")
+                elif rejected == "duplicate":
+                    st.warning("An identical order was added less than 2 minutes ago. Check "
+                               "'Add again even if an identical order was just added' to add it anyway.")
+                else:
+                    # Reserve the stock first so concurrent sessions cannot both take the last units
+                    reserved, left = inventory_engine.reserve(order_data, submission_key, allow_over=allow_over)
+                    success = False
+                    if not reserved:
+                        ledger.abandon(submission_key, fingerprint)
+                        st.error(f"Only {left:g} {item} left in stock. Lower the quantity or check "
+                                 f"'Order beyond remaining stock'.")
+                    else:
+                        # No Streamlit call between the claim and the write: a rerun cannot land in between.
+                        # Once the row is appended the claim is applied and the stock taken, whatever follows.
+                        def applied():
+                            ledger.complete(submission_key)
+                            inventory_engine.confirm(submission_key)
 
-# Main interface with tabs
-tab1, tab2 = st.tabs(["Order List", "New Order"])
+                        success = direct_add_order(ORDER_SHEET_ID, order_data, on_appended=applied)
+                        if not success:
+                            # The write itself failed (it reports the error): free the claim and the stock
+                            inventory_engine.release(submission_key)
+                            ledger.abandon(submission_key, fingerprint)
 
-# Tab 1: Order List
-with tab1:
-    # Filter data according to criteria
-    filtered_df = orders_df.copy()
-    
-    # Apply section filter
-    if selected_section != "All Sections":
-        filtered_df = filtered_df[filtered_df["Section"] == selected_section]
-    
-    # Apply status filter
-    if selected_status != "All":
-        filtered_df = filtered_df[filtered_df["Status"] == selected_status]
-    
-    # Apply search filter
-    if search_query:
-        filtered_df = filtered_df[
-            filtered_df["Booth #"].astype(str).str.contains(search_query, case=False, na=False) |
-            filtered_df["Exhibitor Name"].str.contains(search_query, case=False, na=False)
-        ]
+                    if success:
+                        st.session_state.new_order_key = uuid.uuid4().hex
+                        # Shared stores first: a rerun raised by the messages below must not skip them
+                        aggregates.add_order(order_data)
+                        get_booth_fulfillment(show).add_order(order_data)
+                        get_order_time_index(show).append(order_data)
+                        get_event_log().record("created", show, order_data)
+                        # Force le rechargement complet des données
+                        invalidate_show_data(show)  # Effacer le cache du salon
+                        st.session_state.reload_data = True
+                        st.success("Order added successfully!")
+                        if left is not None and left < 0:
+                            st.warning(f"This order exceeds the remaining stock of {item} by {-left:g}.")
+                        time.sleep(1)
+                        st.rerun()  # Reload the page
+
+# Order table with inline status editing
+@st.fragment
+def order_table(view):
+    # Columns to display
+    display_columns = ["Booth #", "Section", "Exhibitor Name", "Item", "Color", 
+              "Quantity", "Date", "Hour", "Status", "Type", "Boomer's Quantity", "Comments", "User"]
     
-    # Display number of orders found
-    st.write(f"**{len(filtered_df)} orders found**")
+    # Check that all columns to display exist in the DataFrame
+    display_columns = [col for col in display_columns if col in view.columns]
     
-    # Display data
-    if not filtered_df.empty:
-        # Columns to display
-        display_columns = ["Booth #", "Section", "Exhibitor Name", "Item", "Color", 
-                  "Quantity", "Date", "Hour", "Status", "Type", "Boomer's Quantity", "Comments", "User"]
-        
-        # Check that all columns to display exist in the DataFrame
-        display_columns = [col for col in display_columns if col in filtered_df.columns]
-        
-        # Display data as a table
-        edited_df = st.data_editor(
-            filtered_df[display_columns],
-            use_container_width=True,
-            hide_index=True,
-            column_config={
-                "Booth #": st.column_config.NumberColumn(
-                    "Booth #",
-                    width="small",
-                ),
-                "Section": st.column_config.TextColumn(
-                    "Section",
-                    width="medium",
-                ),
-                "Color": st.column_config.TextColumn(
-                    "Color",
-                    width="small",
-                ),
-                "Quantity": st.column_config.NumberColumn(
-                    "Quantity",
-                    width="small",
-                ),
-                "Date": st.column_config.TextColumn(
-                    "Date",
-                    width="small",
-                ),
-                "Hour": st.column_config.TextColumn(
-                    "Hour",
-                    width="small",
-                ),
-                "Status": st.column_config.SelectboxColumn(
-                    "Status",
-                    width="small",
-                    options=["In Process", "In route from warehouse", "Delivered", "Cancelled", "Received"],
-                ),
-                "Type": st.column_config.SelectboxColumn(
-                    "Type",
-                    width="small",
-                    options=["New Order", "Missing Item ", "Remove"],
-                ),
-                "Boomer's Quantity": st.column_config.NumberColumn(
-                    "Boomer's Quantity",
-                    width="small",
-                ),
-                "Comments": st.column_config.TextColumn(
-                    "Comments",
-                    width="medium",
-                ),
-                "User": st.column_config.TextColumn(
-                    "User",
-                    width="small",
-                ),
-                "Exhibitor Name": st.column_config.TextColumn(
-                    "Exhibitor Name",
-                    width="medium",
-                ),
-                "Item": st.column_config.TextColumn(
-                    "Item",
-                    width="medium",
-                ),
-            },
-            num_rows="dynamic",
+    checkpoint("editor")
+
+    # The only copy of the filtered rows, made here for the editor and reused for the diff
+    table_df = view.frame(display_columns)
+
+    # Display data as a table
+    edited_df = st.data_editor(
+        table_df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Booth #": st.column_config.NumberColumn(
+                "Booth #",
+                width="small",
+            ),
+            "Section": st.column_config.TextColumn(
+                "Section",
+                width="medium",
+            ),
+            "Color": st.column_config.TextColumn(
+                "Color",
+                width="small",
+            ),
+            "Quantity": st.column_config.NumberColumn(
+                "Quantity",
+                width="small",
+            ),
+            "Date": st.column_config.TextColumn(
+                "Date",
+                width="small",
+            ),
+            "Hour": st.column_config.TextColumn(
+                "Hour",
+                width="small",
+            ),
+            "Status": st.column_config.SelectboxColumn(
+                "Status",
+                width="small",
+                options=["In Process", "In route from warehouse", "Delivered", "Cancelled", "Received"],
+            ),
+            "Type": st.column_config.SelectboxColumn(
+                "Type",
+                width="small",
+                options=["New Order", "Missing Item ", "Remove"],
+            ),
+            "Boomer's Quantity": st.column_config.NumberColumn(
+                "Boomer's Quantity",
+                width="small",
+            ),
+            "Comments": st.column_config.TextColumn(
+                "Comments",
+                width="medium",
+            ),
+            "User": st.column_config.TextColumn(
+                "User",
+                width="small",
+            ),
+            "Exhibitor Name": st.column_config.TextColumn(
+                "Exhibitor Name",
+                width="medium",
+            ),
+            "Item": st.column_config.TextColumn(
+                "Item",
+                width="medium",
+            ),
+        },
+        num_rows="dynamic",
+    )
+
+    checkpoint("diff")
+
+    # Only status edits are saved: compare that column in one vectorized pass
+    if edited_df is None or "Status" not in display_columns or edited_df.equals(table_df):
+        return
+
+    n = min(len(edited_df), len(table_df))
+    new_statuses = edited_df["Status"].to_numpy()[:n]
+    old_statuses = table_df["Status"].to_numpy()[:n]
+    unchanged = (pd.isna(new_statuses) & pd.isna(old_statuses)) | (new_statuses == old_statuses)
+
+    for i in (~unchanged).nonzero()[0]:
+        original_row = view.row(i)
+        booth_num = original_row["Booth #"]
+        item_name = original_row["Item"]
+        new_status = new_statuses[i] if not pd.isna(new_statuses[i]) else ""
+
+        # Déterminer la feuille de travail
+        worksheet = "Orders"
+        if original_row["Section"] in sections:
+            worksheet = original_row["Section"]
+
+        # Mettre à jour le statut
+        success = gs_manager.update_order_status(
+            sheet_id=ORDER_SHEET_ID,
+            worksheet=worksheet,
+            booth_num=booth_num,
+            item_name=item_name,
+            color=original_row["Color"],
+            status=new_status,
+            user=st.session_state.current_user
         )
-    
-        with st.expander("Delete Orders"):
-            st.warning("Select an order to delete from the list:")
-
-            # Create select box for selecting orders
-            if not filtered_df.empty:
-                # Create a simple selection mechanism by row index
-                order_options = []
-                for i, row in filtered_df.iterrows():
-                    option_text = f"Booth #{row['Booth #']} - {row['Item']} ({row['Color']}) - {row['Exhibitor Name']}"
-                    order_options.append((option_text, i))  # Store row index instead of row data
-
-                # No options means no orders
-                if not order_options:
-                    st.info("No orders available to delete.")
-                else:
-                    # Create a select box for order selection
-                    selected_order_text = st.selectbox(
-                        "Select order to delete:",
-                        options=[option[0] for option in order_options],
-                        key="delete_order_selectbox"
+
+        if success:
+            aggregates.update_status(original_row["Status"], new_status)
+            inventory_engine.update_status(original_row, new_status)
+            get_booth_fulfillment(show).update_status(original_row, new_status)
+            get_event_log().record("status", show, original_row, status=new_status,
+                                   previous=original_row["Status"], user=st.session_state.current_user)
+            st.success(f"Status updated for booth #{booth_num}, item {item_name}")
+            safe_clear_cache()
+            time.sleep(0.5)
+            st.rerun()
+        else:
+            st.error(f"Error updating status for booth #{booth_num}")
+
+
+# Delete tool
+@st.fragment
+def delete_tool(view):
+    with st.expander("Delete Orders"):
+        st.warning("Select an order to delete from the list:")
+
+        # Options are row positions in the filtered view, labels built in one vectorized pass
+        label_df = view.frame(["Booth #", "Item", "Color", "Exhibitor Name"])
+        labels = ("Booth #" + label_df["Booth #"].astype(str) + " - " + label_df["Item"].astype(str)
+                  + " (" + label_df["Color"].astype(str) + ") - "
+                  + label_df["Exhibitor Name"].astype(str)).tolist()
+
+        # No options means no orders
+        if not labels:
+            st.info("No orders available to delete.")
+        else:
+            # Create a select box for order selection
+            selected_idx = st.selectbox(
+                "Select order to delete:",
+                options=range(len(labels)),
+                format_func=labels.__getitem__,
+                key="delete_order_selectbox"
+            )
+
+            # Ensure index is in bounds
+            if selected_idx is not None and 0 <= selected_idx < len(view):
+                selected_row = view.row(selected_idx)
+
+                # Delete button with confirmation
+                if st.button("Delete Selected Order", key="delete_order_button"):
+                    if st.session_state.get("confirm_delete", False):
+                        # Execute the delete operation
+                        success = direct_delete_order(
+                            sheet_id=ORDER_SHEET_ID,
+                            booth_num=selected_row["Booth #"],
+                            item_name=selected_row["Item"],
+                            color=selected_row["Color"],
+                            section=selected_row["Section"]
+                        )
+
+                        if success:
+                            aggregates.remove_order(selected_row)
+                            inventory_engine.remove_order(selected_row)
+                            get_booth_fulfillment(show).remove_order(selected_row)
+                            get_event_log().record("deleted", show, selected_row, user=st.session_state.current_user)
+                            st.success(f"Order for Booth #{selected_row['Booth #']} - {selected_row['Item']} has been deleted!")
+                            st.session_state["confirm_delete"] = False
+                            
+                            # Force refresh data
+                            invalidate_show_data(show)
+                            st.session_state.reload_data = True
+                            time.sleep(1)
+                            st.rerun()
+                        else:
+                            st.error("Failed to delete the order. Please try again.")
+                            st.session_state["confirm_delete"] = False
+                    else:
+                        st.session_state["confirm_delete"] = True
+                        st.warning(f"Are you sure you want to delete the order for Booth #{selected_row['Booth #']} - {selected_row['Item']}? Click 'Delete Selected Order' again to confirm.")
+
+                # Cancel button
+                if st.session_state.get("confirm_delete", False):
+                    if st.button("Cancel", key="cancel_delete_button"):
+                        st.session_state["confirm_delete"] = False
+                        st.rerun()
+
+
+# Progress of a running export: only this block reruns while the file is written
+@st.fragment(run_every=0.5)
+def export_progress(export_job):
+    if export_job.done.is_set():
+        # One full rerun to show the download button and stop polling
+        st.rerun()
+    st.progress(export_job.progress, text=f"Exporting {export_job.rows_written}/{export_job.total} orders...")
+
+
+# Export of the current view or of the whole show
+@st.fragment
+def export_tool(view):
+    with st.expander("Export Orders"):
+        col1, col2 = st.columns(2)
+        with col1:
+            export_scope = st.radio("Orders", ["Current view", "Whole show"], horizontal=True)
+        with col2:
+            export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True)
+
+        if st.button("Prepare export"):
+            previous_job = st.session_state.get("export_job")
+            if previous_job is not None:
+                previous_job.cleanup()
+            export_df = view.frame() if export_scope == "Current view" else orders_df
+            file_name = f"{show} orders {datetime.now().strftime('%Y-%m-%d %H%M')}"
+            # The file is written in chunks by a worker thread, the page keeps running
+            st.session_state.export_job = start_export(export_df, export_format, file_name)
+
+        export_job = st.session_state.get("export_job")
+        if export_job is not None:
+            if not export_job.done.is_set():
+                export_progress(export_job)
+            elif export_job.error is not None:
+                st.error(f"Export failed: {export_job.error}")
+            elif not export_job.available():
+                st.info("This export has expired. Prepare it again.")
+            else:
+                with export_job.open() as export_file:
+                    st.download_button(
+                        f"Download {export_job.file_name}",
+                        data=export_file,
+                        file_name=export_job.file_name,
+                        mime=export_job.mime,
+                        use_container_width=True,
                     )
 
-                    # Get the selected row index safely
-                    selected_idx = next((i for text, i in order_options if text == selected_order_text), None)
-                    
-                    # Ensure index is in bounds
-                    if selected_idx is not None and 0 <= selected_idx < len(filtered_df):
-                        selected_row = filtered_df.iloc[selected_idx]
-
-                        # Delete button with confirmation
-                        if st.button("Delete Selected Order", key="delete_order_button"):
-                            if st.session_state.get("confirm_delete", False):
-                                # Execute the delete operation
-                                success = direct_delete_order(
-                                    sheet_id="1dYeok-Dy_7a03AhPDLV2NNmGbRNoCD3q0zaAHPwxxCE",
-                                    booth_num=selected_row["Booth #"],
-                                    item_name=selected_row["Item"],
-                                    color=selected_row["Color"],
-                                    section=selected_row["Section"]
-                                )
-
-                                if success:
-                                    st.success(f"Order for Booth #{selected_row['Booth #']} - {selected_row['Item']} has been deleted!")
-                                    st.session_state["confirm_delete"] = False
-                                    
-                                    # Force refresh data
-                                    load_orders.clear()
-                                    st.session_state.reload_data = True
-                                    time.sleep(1)
-                                    st.rerun()
-                                else:
-                                    st.error("Failed to delete the order. Please try again.")
-                                    st.session_state["confirm_delete"] = False
-                            else:
-                                st.session_state["confirm_delete"] = True
-                                st.warning(f"Are you sure you want to delete the order for Booth #{selected_row['Booth #']} - {selected_row['Item']}? Click 'Delete Selected Order' again to confirm.")
-
-                        # Cancel button
-                        if st.session_state.get("confirm_delete", False):
-                            if st.button("Cancel", key="cancel_delete_button"):
-                                st.session_state["confirm_delete"] = False
-                                st.rerun()
+
+# Creations, status changes and deletions recorded for a booth
+@st.fragment
+def order_history():
+    with st.expander("Order History"):
+        col1, col2 = st.columns(2)
+        with col1:
+            history_booth = st.text_input("Booth #", key="history_booth")
+        with col2:
+            history_item = st.text_input("Item (optional)", key="history_item")
+
+        if history_booth:
+            history = get_event_log().query(show=show, booth=history_booth, item=history_item or None)
+            if history.empty:
+                st.info(f"No recorded changes for booth #{history_booth}.")
             else:
-                st.info("No orders available to delete.")
+                st.dataframe(
+                    history.drop(columns=["Show"]).iloc[::-1],
+                    use_container_width=True,
+                    hide_index=True,
+                )
 
-        # Check if any modifications have been made
-        if edited_df is not None and not edited_df.equals(filtered_df[display_columns]):
-            # Identifier les lignes modifiées
-            for i, (_, row) in enumerate(edited_df.iterrows()):
-                original_row = filtered_df.iloc[i]
-                
-                # Vérifier chaque colonne pour des modifications
-                for col in display_columns:
-                    # Handle NA values safely by using pandas.isna() to check for NaN values
-                    if pd.isna(row[col]) and pd.isna(original_row[col]):
-                        continue  # Both are NaN, so they're equal
-                    elif pd.isna(row[col]) or pd.isna(original_row[col]):
-                        # One is NaN and the other isn't, so they're different
-                        if col == "Status":
-                            # Handle status update
-                            booth_num = original_row["Booth #"]
-                            item_name = original_row["Item"]
-                            color = original_row["Color"]
-                            new_status = row["Status"] if not pd.isna(row["Status"]) else ""
-                            
-                            # Déterminer la feuille de travail
-                            worksheet = "Orders"
-                            if original_row["Section"] in sections:
-                                worksheet = original_row["Section"]
-                            
-                            # Mettre à jour le statut
-                            success = gs_manager.update_order_status(
-                                sheet_id="1dYeok-Dy_7a03AhPDLV2NNmGbRNoCD3q0zaAHPwxxCE",
-                                worksheet=worksheet,
-                                booth_num=booth_num,
-                                item_name=item_name,
-                                color=color,
-                                status=new_status,
-                                user=st.session_state.current_user
-                            )
-                            
-                            if success:
-                                st.success(f"Status updated for booth #{booth_num}, item {item_name}")
-                                safe_clear_cache()
-                                time.sleep(0.5)
-                                st.rerun()
-                            else:
-                                st.error(f"Error updating status for booth #{booth_num}")
-                    elif row[col] != original_row[col]:
-                        # Neither is NaN and they're different
-                        if col == "Status":
-                            # Handle status update
-                            booth_num = original_row["Booth #"]
-                            item_name = original_row["Item"]
-                            color = original_row["Color"]
-                            new_status = row["Status"]
-                            
-                            # Déterminer la feuille de travail
-                            worksheet = "Orders"
-                            if original_row["Section"] in sections:
-                                worksheet = original_row["Section"]
-                            
-                            # Mettre à jour le statut
-                            success = gs_manager.update_order_status(
-                                sheet_id="1dYeok-Dy_7a03AhPDLV2NNmGbRNoCD3q0zaAHPwxxCE",
-                                worksheet=worksheet,
-                                booth_num=booth_num,
-                                item_name=item_name,
-                                color=color,
-                                status=new_status,
-                                user=st.session_state.current_user
-                            )
-                            
-                            if success:
-                                st.success(f"Status updated for booth #{booth_num}, item {item_name}")
-                                safe_clear_cache()
-                                time.sleep(0.5)
-                                st.rerun()
-                            else:
-                                st.error(f"Error updating status for booth #{booth_num}")
-    else:
-        st.info("No orders match the search criteria.")
 
-# Tab 2: New Order
-with tab2:
-    # Interface to add a new order
-    add_new_order()
+# Bulk status update from a scanner CSV export
+@st.fragment
+def bulk_status_upload():
+    st.subheader("Bulk Status Upload")
+    st.caption("CSV with Booth # and Item columns, optionally Color and Status (Delivered if missing).")
+
+    uploaded = st.file_uploader("Scanner export", type=["csv"], key="bulk_status_file")
+    if uploaded is None:
+        return
+
+    try:
+        scans = parse_scan_csv(uploaded)
+    except Exception as e:
+        st.error(f"Could not read the file: {e}")
+        return
+
+    # One vectorized join of the scans against the loaded orders
+    matched, unmatched, ambiguous = match_scans(scans, orders_df)
+    changes = matched[matched["Current Status"].astype(str) != matched["New Status"]] if not matched.empty else matched
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Rows", len(scans))
+    with col2:
+        # Orders, not rows: a booth scanned twice changes its order once
+        st.metric("Matched orders", len(matched))
+    with col3:
+        st.metric("Unmatched", len(unmatched))
+    with col4:
+        st.metric("Ambiguous", len(ambiguous))
+
+    preview_columns = [col for col in ["Booth #", "Section", "Exhibitor Name", "Item", "Color",
+                                       "Current Status", "New Status"] if col in matched.columns]
+    if not changes.empty:
+        st.write(f"**{len(changes)} status changes**")
+        st.dataframe(changes[preview_columns], use_container_width=True, hide_index=True)
+    if not unmatched.empty:
+        with st.expander(f"Unmatched rows ({len(unmatched)})"):
+            st.dataframe(unmatched, use_container_width=True, hide_index=True)
+    if not ambiguous.empty:
+        with st.expander(f"Ambiguous rows ({len(ambiguous)}) - add a Color column to tell them apart"):
+            st.dataframe(ambiguous, use_container_width=True, hide_index=True)
+
+    if changes.empty:
+        st.info("Nothing to update.")
+    elif st.button(f"Apply {len(changes)} updates", type="primary", key="bulk_status_apply"):
+        with st.spinner("Updating statuses..."):
+            # One read and one batched write per worksheet
+            results = set_statuses(show, changes, st.session_state.current_user)
+        updated = sum(results)
+        if updated:
+            st.success(f"{updated} orders updated.")
+        if updated < len(results):
+            st.warning(f"{len(results) - updated} orders were not found in the sheet.")
+        st.session_state.reload_data = True
+        time.sleep(1)
+        st.rerun()
+
 
 # Statistics at the bottom of the page
-if not orders_df.empty:
-    st.divider()
-    st.subheader("Order Statistics")
+def order_statistics():
+    if not orders_df.empty:
+        st.divider()
+        st.subheader("Order Statistics")
     
-    col1, col2, col3 = st.columns(3)
+        col1, col2, col3 = st.columns(3)
     
-    with col1:
-        # Orders by section
-        section_counts = orders_df["Section"].value_counts().reset_index()
-        section_counts.columns = ["Section", "Number of Orders"]
+        with col1:
+            # Orders by section
+            section_counts = aggregates.counts_frame("Section", ["Section", "Number of Orders"])
         
-        st.write("**Orders by Section**")
-        st.dataframe(
-            section_counts,
-            use_container_width=True,
-            hide_index=True,
-        )
+            st.write("**Orders by Section**")
+            st.dataframe(
+                section_counts,
+                use_container_width=True,
+                hide_index=True,
+            )
     
-    with col2:
-        # Order statuses
-        status_counts = orders_df["Status"].value_counts().reset_index()
-        status_counts.columns = ["Status", "Number"]
+        with col2:
+            # Order statuses
+            status_counts = aggregates.counts_frame("Status", ["Status", "Number"])
         
-        st.write("**Order Statuses**")
-        st.dataframe(
-            status_counts,
-            use_container_width=True,
-            hide_index=True,
-        )
+            st.write("**Order Statuses**")
+            st.dataframe(
+                status_counts,
+                use_container_width=True,
+                hide_index=True,
+            )
     
-    with col3:
-        # Most ordered items
-        top_items = orders_df["Item"].value_counts().reset_index().head(5)
-        top_items.columns = ["Item", "Number"]
+        with col3:
+            # Most ordered items
+            top_items = aggregates.counts_frame("Item", ["Item", "Number"], n=5)
         
-        st.write("**Most Ordered Items**")
-        st.dataframe(
-            top_items,
-            use_container_width=True,
-            hide_index=True,
-        )
+            st.write("**Most Ordered Items**")
+            st.dataframe(
+                top_items,
+                use_container_width=True,
+                hide_index=True,
+            )
+
+
+# Main interface with tabs
+tab1, tab2, tab3 = st.tabs(["Order List", "New Order", "Bulk Status Upload"])
+
+# Tab 1: Order List
+with tab1:
+    checkpoint("filter")
+
+    # Filter data according to criteria: row positions over the shared cached frame, no copy
+    filtered = filter_orders(
+        show,
+        orders_df,
+        section=selected_section if selected_section != "All Sections" else None,
+        status=selected_status if selected_status != "All" else None,
+        query=search_query,
+    )
+    
+    # Display number of orders found
+    st.write(f"**{len(filtered)} orders found**")
+    
+    # Display data
+    if not filtered.empty:
+        order_table(filtered)
+
+        checkpoint("delete")
+        delete_tool(filtered)
+    else:
+        st.info("No orders match the search criteria.")
+
+    checkpoint("export")
+    export_tool(filtered)
+
+    checkpoint("history")
+    order_history()
+
+# Tab 2: New Order
+with tab2:
+    checkpoint("new order")
+
+    # Interface to add a new order
+    add_new_order()
+
+# Tab 3: Bulk Status Upload
+with tab3:
+    checkpoint("bulk upload")
+    bulk_status_upload()
+
+checkpoint("stats")
+order_statistics()
+
+record_session("Orders")
+finish_rerun()
@@ -1,45 +1,29 @@
 import streamlit as st
-import json
-import os
 from datetime import datetime
 import pytz
+from data.feedback_log import get_feedback_log
 
 
-DATA_FILE = "forum_feedback.json"
+# Current time in the show's timezone
+def now_eastern():
+    eastern = pytz.timezone("America/New_York")
+    return datetime.now(eastern).strftime("%Y-%m-%d %H:%M:%S")
 
-# Load existing messages
-def load_messages():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    else:
-        return []
+# Number of messages shown per page
+PAGE_SIZE = 20
 
-# Save messages to JSON
-def save_messages(messages):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(messages, f, indent=2)
+# Load one page of messages (newest first) and the number of matching messages
+def load_messages(query=None, unanswered=False, start_date=None, end_date=None, page=0):
+    return get_feedback_log().search(query, unanswered, start_date, end_date, page, PAGE_SIZE)
 
-# Add new message
+# Add new message (appended to the log, nothing is rewritten)
 def add_message(name, email, message):
-    messages = load_messages()
-    eastern = pytz.timezone("America/New_York")
-    now_eastern = datetime.now(eastern)
-    messages.append({
-        "name": name,
-        "email": email,
-        "message": message,
-        "timestamp": now_eastern.strftime("%Y-%m-%d %H:%M:%S"),
-        "reply": None
-    })
-    save_messages(messages)
+    return get_feedback_log().add_message(name, email, message, now_eastern())
 
 
 # Add reply to a message
-def reply_to_message(index, reply):
-    messages = load_messages()
-    messages[index]["reply"] = reply
-    save_messages(messages)
+def reply_to_message(message_id, reply):
+    get_feedback_log().add_reply(message_id, reply, now_eastern())
 
 # Streamlit app
 def forum_page():
@@ -58,12 +42,33 @@ def forum_page():
     st.markdown("---")
     st.subheader("📨 Previous Feedback")
 
-    messages = load_messages()
+    # Search and filters
+    col1, col2, col3 = st.columns([2, 1, 2])
+    with col1:
+        query = st.text_input("Search (name, message, reply)")
+    with col2:
+        unanswered = st.checkbox("Unanswered only")
+    with col3:
+        date_range = st.date_input("Date range", value=(), format="YYYY-MM-DD")
+    start_date = date_range[0].strftime("%Y-%m-%d") if len(date_range) > 0 else None
+    end_date = date_range[-1].strftime("%Y-%m-%d") if len(date_range) > 0 else None
+
+    # Pagination: only the requested page is read from storage
+    page = st.session_state.get("feedback_page", 1)
+    messages, total = load_messages(query, unanswered, start_date, end_date, page - 1)
+    page_count = max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
+    if page > page_count:
+        page = page_count
+        messages, total = load_messages(query, unanswered, start_date, end_date, page - 1)
+
     if not messages:
-        st.info("No messages yet. Be the first to write!")
+        if query or unanswered or start_date:
+            st.info("No messages match these filters.")
+        else:
+            st.info("No messages yet. Be the first to write!")
     else:
-        for i, msg in enumerate(reversed(messages)):
-            idx = len(messages) - 1 - i  # to keep correct index
+        st.caption(f"{total} messages - page {page} of {page_count}")
+        for msg in messages:
             with st.expander(f"🧾 {msg['name']} ({msg['timestamp']})"):
                 st.write(msg["message"])
                 st.caption(f"📧 {msg['email']}")
@@ -72,13 +77,16 @@ def forum_page():
                     st.success(f"💬 Admin reply: {msg['reply']}")
                 else:
                     # Optional: only allow admin to reply
-                    with st.form(f"reply_form_{i}"):
+                    with st.form(f"reply_form_{msg['id']}"):
                         admin_reply = st.text_input("Reply as Admin")
                         reply_submit = st.form_submit_button("Send Reply")
                         if reply_submit and admin_reply:
-                            reply_to_message(idx, admin_reply)
+                            reply_to_message(msg["id"], admin_reply)
                             st.success("✅ Reply sent!")
 
+    if page_count > 1:
+        st.number_input("Page", min_value=1, max_value=page_count, value=page, key="feedback_page")
+
 
 if __name__ == "__main__":
     forum_page()
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from data.bulk_status import match_scans
+
+
+ORDERS = pd.DataFrame({
+    "Booth #": ["101", "101", "102", "103", "103"],
+    "Item": ["Chair", "Table", "Chair", "Lamp", "Lamp"],
+    "Color": ["Black", "", "White", "Red", "Blue"],
+    "Status": ["In Process", "In Process", "In Route", "In Process", "In Process"],
+    "Exhibitor Name": ["Acme", "Acme", "Globex", "Initech", "Initech"],
+})
+
+
+def scans(rows):
+    return pd.DataFrame(rows, columns=["Booth #", "Item", "Color", "Status"])
+
+
+def test_splits_matched_unmatched_and_ambiguous():
+    matched, unmatched, ambiguous = match_scans(scans([
+        ["101", "Chair", "Black", "Delivered"],   # couleur indiquée
+        ["102", "Chair", "", "Delivered"],        # sans couleur : une seule commande
+        ["103", "Lamp", "", "Delivered"],         # sans couleur : deux commandes
+        ["104", "Chair", "", "Delivered"],        # stand inconnu
+        ["101", "Chair", "White", "Delivered"],   # mauvaise couleur
+    ]), ORDERS)
+
+    assert list(zip(matched["Booth #"], matched["Item"], matched["Color"])) == [
+        ("101", "Chair", "Black"), ("102", "Chair", "White")]
+    assert matched["Current Status"].tolist() == ["In Process", "In Route"]
+    assert matched["New Status"].tolist() == ["Delivered", "Delivered"]
+    assert matched["Exhibitor Name"].tolist() == ["Acme", "Globex"]
+
+    assert list(zip(unmatched["Booth #"], unmatched["Color"])) == [("104", ""), ("101", "White")]
+    assert ambiguous[["Booth #", "Item", "Matches"]].values.tolist() == [["103", "Lamp", 2]]
+
+
+def test_color_disambiguates_and_keys_are_normalized():
+    matched, unmatched, ambiguous = match_scans(scans([
+        [" 103 ", "lamp", "BLUE", "Cancelled"],
+        ["101", "TABLE ", "", "Delivered"],
+    ]), ORDERS)
+
+    assert list(zip(matched["Booth #"], matched["Item"], matched["Color"])) == [
+        ("103", "Lamp", "Blue"), ("101", "Table", "")]
+    assert matched["New Status"].tolist() == ["Cancelled", "Delivered"]
+    assert unmatched.empty and ambiguous.empty
+
+
+def test_no_orders():
+    scanned = scans([["101", "Chair", "", "Delivered"]])
+    matched, unmatched, ambiguous = match_scans(scanned, ORDERS.iloc[0:0])
+
+    assert matched.empty
+    assert unmatched["Booth #"].tolist() == ["101"]
+    assert ambiguous.empty
+
+
+def test_repeated_scans_change_an_order_once():
+    matched, unmatched, ambiguous = match_scans(scans([
+        ["101", "Chair", "", "In Route"],
+        ["101", "chair", "Black", "Delivered"],   # même commande, avec la couleur
+        ["102", "Table", "", "Delivered"],        # pas de commande 102 Table
+        ["101", "Table", "", "Delivered"],
+        ["101", "Table", "", "Delivered"],
+    ]), ORDERS)
+
+    assert list(zip(matched["Booth #"], matched["Item"], matched["New Status"])) == [
+        ("101", "Chair", "Delivered"), ("101", "Table", "Delivered")]
+    assert unmatched["Item"].tolist() == ["Table"]
+    assert ambiguous.empty
@@ -0,0 +1,74 @@
+import pytest
+
+from data import test_data_manager
+from data.local_sheets import LocalSheetsPool, LocalWorksheet
+from data.test_data_manager import GoogleSheetsManager
+
+
+HEADER = ["Booth #", "Section", "Exhibitor Name", "Item", "Color", "Quantity", "Date", "Hour", "Status", "Type",
+          "Boomers Quantity", "Comments", "User"]
+
+
+def order(booth, section, item, color, status="In Process"):
+    return [booth, section, "Acme", item, color, "1", "01/02/2026", "09:00:00 AM", status, "New Order", "", "", "AB"]
+
+
+@pytest.fixture
+def sheets(monkeypatch):
+    pool = LocalSheetsPool({"sheet": {
+        "Orders": [HEADER, order("101", "", "Chair", "Black"), order("101", "", "Chair", "Black"),
+                   order("102", "", "Table", "")],
+        "Hall A": [HEADER, order("201", "Hall A", "Lamp", "Red"), order("202", "Hall A", "Lamp", "Blue")],
+    }})
+    monkeypatch.setattr(test_data_manager, "get_client_pool", lambda: pool)
+
+    writes = []
+    batch_update = LocalWorksheet.batch_update
+
+    def counting_batch_update(self, data, **kwargs):
+        writes.append((self.title, len(data)))
+        return batch_update(self, data, **kwargs)
+
+    monkeypatch.setattr(LocalWorksheet, "batch_update", counting_batch_update)
+    return pool.client(), writes
+
+
+def rows(client, worksheet):
+    return client.open_by_key("sheet").worksheet(worksheet)._rows
+
+
+def test_one_batch_update_per_worksheet(sheets):
+    client, writes = sheets
+    manager = GoogleSheetsManager()
+
+    found_orders = manager.update_order_statuses("sheet", "Orders", [
+        ("101", "Chair", "black", "Delivered"),
+        (" 102 ", "table", "", "In Route"),
+        ("999", "Chair", "", "Delivered"),
+    ], "XY")
+    found_hall = manager.update_order_statuses("sheet", "Hall A", [
+        ("201", "Lamp", "Red", "Delivered"),
+        ("202", "Lamp", "Blue", "Cancelled"),
+    ], "XY")
+
+    assert found_orders == [True, True, False]
+    assert found_hall == [True, True]
+    # Statut + User + Date + Hour par commande trouvée, en une écriture par feuille
+    assert writes == [("Orders", 8), ("Hall A", 8)]
+    # Par feuille : classeur, onglet, lecture, écriture
+    assert client.calls == 8
+
+    status, user = HEADER.index("Status"), HEADER.index("User")
+    orders = rows(client, "Orders")
+    assert [row[status] for row in orders[1:]] == ["Delivered", "In Process", "In Route"]
+    assert [row[user] for row in orders[1:]] == ["XY", "AB", "XY"]
+    assert [row[status] for row in rows(client, "Hall A")[1:]] == ["Delivered", "Cancelled"]
+
+
+def test_no_write_when_nothing_matches(sheets):
+    client, writes = sheets
+
+    found = GoogleSheetsManager().update_order_statuses("sheet", "Orders", [("999", "Chair", "", "Delivered")], "XY")
+
+    assert found == [False]
+    assert writes == []
@@ -0,0 +1,106 @@
+import time
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from data import delivery_analytics
+from data.delivery_analytics import DeliveryAnalytics
+from data.event_log import EventLog
+from data.order_aggregates import stamp_version
+
+
+SHOW = "Spring"
+
+
+def order(booth, item, status, at, section="Hall A", color=""):
+    stamp = datetime.fromtimestamp(at)
+    return {"Booth #": booth, "Section": section, "Item": item, "Color": color, "Status": status,
+            "Date": stamp.strftime("%m/%d/%Y"), "Hour": stamp.strftime("%I:%M:%S %p"), "User": "AB"}
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    log = EventLog(str(tmp_path))
+    monkeypatch.setattr(delivery_analytics, "get_event_log", lambda: log)
+    monkeypatch.setattr(delivery_analytics, "EVENT_POLL_SECONDS", 0)
+    return log
+
+
+def full_recompute(orders):
+    return DeliveryAnalytics(SHOW).sync(orders)
+
+
+def assert_same(incremental, full):
+    counts = incremental._counts.sort_index()
+    expected = full._counts.sort_index()
+    pd.testing.assert_frame_equal(counts[expected.columns], expected, check_dtype=False, check_freq=False)
+    times = incremental._times.sort_values(["key", "Placed"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(times, full._times.sort_values(["key", "Placed"]).reset_index(drop=True))
+
+
+def test_incremental_counts_match_full_recompute(log):
+    now = time.time()
+    loaded_at = now - 3 * 3600
+    rows = [
+        order("101", "Chair", "In Process", loaded_at - 7200),
+        order("102", "Table", "In Process", loaded_at - 5400, section="Hall B"),
+        order("103", "Lamp", "Delivered", loaded_at - 3600),
+        order("104", "Sofa", "In Route", loaded_at - 1800, color="Red"),
+        order("104", "Sofa", "In Route", loaded_at - 1800, color="Red"),  # « Add again »
+    ]
+    for row in rows[:3]:
+        log.record("created", SHOW, row, at=loaded_at - 7200)
+    log.record("status", SHOW, rows[2], status="Delivered", previous="In Process", at=loaded_at - 3600)
+    log.record("created", "Autumn", rows[0], at=loaded_at - 7200)
+    log.flush()
+
+    orders = stamp_version(pd.DataFrame(rows))
+    orders.attrs["loaded_at"] = loaded_at
+    analytics = DeliveryAnalytics(SHOW).sync(orders)
+    assert_same(analytics, full_recompute(orders))
+
+    # Après la lecture de la feuille : livraison, nouvelle commande, suppression
+    log.record("status", SHOW, rows[0], status="Delivered", previous="In Process", at=now - 3000)
+    log.record("created", SHOW, order("105", "Desk", "In Process", now - 2400), at=now - 2400)
+    log.flush()
+    log.record("deleted", SHOW, rows[1], at=now - 1200)
+    version = analytics.version
+    analytics.sync(orders)
+    assert analytics.version == version + 1
+    assert_same(analytics, full_recompute(orders))
+
+    # Événement horodaté avant les précédents mais lu après eux
+    log.record("status", SHOW, rows[3], status="Cancelled", previous="In Route", at=now - 5000)
+    log.flush()
+    log.record("status", SHOW, order("105", "Desk", "In Process", now), status="Delivered", at=now - 600)
+    analytics.sync(orders)
+    assert_same(analytics, full_recompute(orders))
+
+    # Relire des événements pas encore écrits ne change rien
+    analytics.sync(orders)
+    log.flush()
+    analytics.sync(orders)
+    assert_same(analytics, full_recompute(orders))
+
+    times = analytics._times.set_index("key")
+    assert times.loc["101|chair|", "Delivered"] == pd.Timestamp.fromtimestamp(int((now - 3000) * 1000) / 1000)
+    assert "102|table|" not in times.index
+    assert pd.notna(times.loc["105|desk|", "Delivered"])
+    assert times.loc["104|sofa|red", "Closed"].notna().all()
+
+
+def test_new_sheet_version_rebuilds(log):
+    now = time.time()
+    rows = [order("101", "Chair", "In Process", now - 7200)]
+    orders = stamp_version(pd.DataFrame(rows))
+    orders.attrs["loaded_at"] = now - 3600
+    analytics = DeliveryAnalytics(SHOW).sync(orders)
+
+    log.record("status", SHOW, rows[0], status="Delivered", at=now - 1800)
+    log.flush()
+    reloaded = stamp_version(pd.DataFrame([dict(rows[0], Status="Delivered")]))
+    analytics.sync(reloaded)
+
+    assert analytics.data_version == reloaded.attrs["data_version"]
+    assert_same(analytics, full_recompute(reloaded))
@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+import pytest
+
+from data import event_log
+from data.event_log import EventLog, Segment
+
+
+def event(time_ms, kind="status", show="Spring", booth="101", item="Chair", color="Black", status="Delivered",
+          user="AB"):
+    return {"time": time_ms, "kind": kind, "show": show, "booth": booth, "section": "", "item": item,
+            "color": color, "status": status, "previous": "", "user": user}
+
+
+def columns(segment, mask=None):
+    """Événements d'un segment décodés, pour comparer deux segments."""
+    return [segment.columns["time"].tolist() if mask is None else segment.columns["time"][mask].tolist()] + [
+        segment.decode(name, mask).tolist() for name in event_log.TEXT_COLUMNS + [event_log.BATCH_COLUMN]]
+
+
+def test_segment_save_load_round_trip(tmp_path):
+    events = [event(3000, booth="102"), event(1000, kind="created", status="In Process"), event(2000, user="CD")]
+    segment = Segment.from_events(events, batch="first")
+    path = str(tmp_path / "segment.npz")
+    segment.save(path)
+
+    loaded = Segment.load(path)
+
+    assert (loaded.rows, loaded.t_min, loaded.t_max) == (3, 1000, 3000)
+    assert columns(loaded) == columns(segment)
+    assert loaded.columns["kind"].tolist() == [1, 0, 1]
+    assert loaded.columns["user"].dtype == np.uint16
+    assert loaded.batches() == {"first"}
+    assert loaded.decode("booth").tolist() == ["102", "101", "101"]
+
+
+def test_legacy_segment_is_its_own_batch(tmp_path):
+    segment = Segment.from_events([event(1000)])
+    legacy = {name: values for name, values in segment.columns.items() if not name.startswith("batch")}
+    path = str(tmp_path / "events-1000-1000-1-1.npz")
+    np.savez_compressed(path, **legacy)
+
+    assert Segment.load(path).batches() == {"events-1000-1000-1-1.npz"}
+
+
+def test_merge_sorts_by_time_and_keeps_batches():
+    first = Segment.from_events([event(1000), event(4000, booth="104")], batch="a")
+    second = Segment.from_events([event(2000, user="CD", color="Red"), event(3000, kind="deleted")], batch="b")
+
+    merged = Segment.merge([first, second])
+
+    assert merged.columns["time"].tolist() == [1000, 2000, 3000, 4000]
+    assert merged.decode("batch").tolist() == ["a", "b", "b", "a"]
+    assert merged.decode("user").tolist() == ["AB", "CD", "AB", "AB"]
+    assert merged.decode("color").tolist() == ["Black", "Red", "Black", "Black"]
+    assert merged.columns["kind"].tolist() == [1, 1, 2, 1]
+    assert merged.batches() == {"a", "b"}
+    assert columns(merged, merged.batch_mask({"b"})) == columns(second)
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    monkeypatch.setattr(event_log, "COMPACT_SEGMENTS", 4)
+    monkeypatch.setattr(event_log, "SEGMENT_ROWS", 6)
+    return EventLog(str(tmp_path))
+
+
+def record_batch(log, start, count=2, show="Spring"):
+    for i in range(count):
+        log.record("status", show, {"Booth #": str(start + i), "Item": "Chair", "Color": ""}, status="Delivered",
+                   at=start + i)
+    log.flush()
+
+
+def test_compaction_keeps_every_event(log):
+    for start in range(100, 600, 100):
+        record_batch(log, start)
+
+    # 5 segments de 2 événements > 4 : fusion par groupes d'au plus 6 événements
+    files = log._segment_files()
+    assert len(files) == 2
+    assert sorted(log._segment_meta(name)[0] for name in files) == [4, 6]
+    assert len(set().union(*(log._segment_meta(name)[1] for name in files))) == 5
+
+    history = log.query(show="Spring")
+    assert history["Booth #"].tolist() == [str(start + i) for start in range(100, 600, 100) for i in range(2)]
+    assert log.query(show="Spring", booth="301")["Time"].tolist() == history["Time"].iloc[[5]].tolist()
+
+
+def test_read_new_across_compaction(log):
+    record_batch(log, 100)
+    record_batch(log, 200, show="Autumn")
+    first, seen = log.read_new("Spring")
+    assert first["Booth #"].tolist() == ["100", "101"]
+
+    # Les lots déjà lus ne sont pas relus après leur fusion avec de nouveaux
+    for start in range(300, 600, 100):
+        record_batch(log, start)
+    log.record("status", "Spring", {"Booth #": "900", "Item": "Chair"}, status="Delivered", at=50)
+
+    second, seen = log.read_new("Spring", seen)
+    assert second["Booth #"].tolist() == ["900", "300", "301", "400", "401", "500", "501"]
+
+    # Un événement en attente est relu tant qu'il n'est pas écrit, puis plus jamais
+    third, seen = log.read_new("Spring", seen)
+    assert third["Booth #"].tolist() == ["900"]
+    log.flush()
+    fourth, seen = log.read_new("Spring", seen)
+    assert fourth["Booth #"].tolist() == ["900"]
+    assert log.read_new("Spring", seen)[0].empty
+
+
+def test_other_process_compaction_is_seen(log, tmp_path):
+    record_batch(log, 100)
+    record_batch(log, 200)
+    _, seen = log.read_new("Spring")
+
+    other = EventLog(str(tmp_path))
+    other.compact()
+
+    assert len(os.listdir(tmp_path)) == 2  # segment fusionné + .lock
+    assert log.read_new("Spring", seen)[0].empty
+    assert log.query(show="Spring")["Booth #"].tolist() == ["100", "101", "200", "201"]
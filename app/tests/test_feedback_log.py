@@ -0,0 +1,52 @@
+import os
+import threading
+
+import pytest
+
+from data.feedback_log import FeedbackLog
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {"log_path": str(tmp_path / "feedback.log"), "index_path": str(tmp_path / "feedback.idx"),
+            "legacy_file": str(tmp_path / "feedback.json"), "lock_path": str(tmp_path / "feedback.lock")}
+
+
+def test_messages_and_replies_survive_compaction(paths):
+    log = FeedbackLog(**paths)
+    for i in range(5):
+        log.add_message(f"User {i}", "", f"message {i}", f"2026-01-0{i + 1} 10:00")
+    log.add_reply(1, "fixed", "2026-01-06 10:00")
+
+    log.compact()
+    other = FeedbackLog(**paths)
+
+    for reader in (log, other):
+        assert reader.count() == 5
+        assert reader.get(1)["reply"] == "fixed"
+        assert [m["id"] for m in reader.search(unanswered=True)[0]] == [4, 3, 2, 0]
+        assert [m["id"] for m in reader.search(query="fix")[0]] == [1]
+
+
+def test_compaction_keeps_other_processes_serialized(paths):
+    log = FeedbackLog(**paths)
+    log.add_message("A", "", "first", "2026-01-01 10:00")
+    log.add_reply(0, "done", "2026-01-01 11:00")
+    lock_inode = os.stat(paths["lock_path"]).st_ino
+
+    # Une autre instance (verrou de fichier distinct, comme un autre processus)
+    other = FeedbackLog(**paths)
+    done = threading.Event()
+    writer = threading.Thread(target=lambda: (other.add_message("B", "", "second", "2026-01-02 10:00"),
+                                              done.set()))
+    with log._file_lock():
+        log._compact()
+        writer.start()
+        # Le journal vient d'être remplacé : l'écriture doit quand même attendre le verrou
+        assert not done.wait(0.3)
+    writer.join(5)
+
+    assert done.is_set()
+    assert os.stat(paths["lock_path"]).st_ino == lock_inode
+    assert [m["message"] for m in log.recent()] == ["second", "first"]
+    assert log.get(0)["reply"] == "done"
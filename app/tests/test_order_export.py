@@ -0,0 +1,76 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from data import order_export
+from data.order_export import EXPORT_TTL_SECONDS, ExportRegistry
+
+
+ORDERS = pd.DataFrame({"Booth #": ["101", "102", "103"], "Item": ["Chair", None, "Lamp"], "Quantity": [1, 2, 3]})
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ExportRegistry(str(tmp_path), sweep_seconds=0)
+
+
+def finished(job):
+    assert job.done.wait(5)
+    assert job.error is None
+    return job
+
+
+@pytest.mark.parametrize("export_format", ["CSV", "Excel", "Parquet"])
+def test_export_files_are_complete(registry, export_format):
+    job = finished(registry.start(ORDERS, export_format, "orders"))
+
+    read = {"CSV": lambda path: pd.read_csv(path, dtype={"Booth #": str}),
+            "Excel": lambda path: pd.read_excel(path, dtype={"Booth #": str}),
+            "Parquet": pd.read_parquet}[export_format]
+    exported = read(job.path)
+    assert exported["Booth #"].tolist() == ["101", "102", "103"]
+    assert exported["Quantity"].tolist() == [1, 2, 3]
+    assert job.progress == 1.0
+
+
+def test_files_expire_after_ttl(registry, tmp_path):
+    job = finished(registry.start(ORDERS, "CSV", "orders"))
+
+    assert registry.sweep() == 0 and job.available()
+    assert registry.sweep(now=time.time() + EXPORT_TTL_SECONDS + 1) == 1
+    assert not job.available()
+    assert os.listdir(tmp_path) == []
+
+
+def test_files_of_closed_sessions_are_removed(registry, monkeypatch):
+    monkeypatch.setattr(order_export, "session_alive", lambda session_id: session_id == "open")
+    kept = finished(registry.start(ORDERS, "CSV", "orders", session_id="open"))
+    closed = finished(registry.start(ORDERS, "CSV", "orders", session_id="closed"))
+
+    assert registry.sweep() == 1
+    assert kept.available() and not closed.available()
+
+
+def test_running_exports_and_recent_orphans_are_kept(registry, tmp_path, monkeypatch):
+    monkeypatch.setattr(order_export, "session_alive", lambda session_id: False)
+    job = order_export.ExportJob(ORDERS, "CSV", "orders", directory=str(tmp_path), session_id="closed")
+    recent = tmp_path / "orders_export_recent.csv"
+    stale = tmp_path / "orders_export_stale.csv"
+    recent.write_text("")
+    stale.write_text("")
+    old = time.time() - EXPORT_TTL_SECONDS - 1
+    os.utime(stale, (old, old))
+    with registry._lock:
+        registry._jobs[job.path] = job
+
+    assert registry.sweep() == 1
+    assert recent.exists() and not stale.exists()
+    # Export pas encore écrit : ni sa session fermée ni son âge ne le suppriment
+    assert registry.sweep(now=time.time() + 2 * EXPORT_TTL_SECONDS) == 1
+    assert job.available() and not recent.exists()
+
+    job.run()
+    assert registry.sweep() == 1
+    assert not job.available()
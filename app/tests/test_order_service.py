@@ -0,0 +1,112 @@
+import pandas as pd
+import pytest
+import streamlit as st
+from streamlit.runtime.scriptrunner import RerunData
+from streamlit.runtime.scriptrunner_utils.exceptions import RerunException
+
+from data import direct_sheets_operations, order_service
+from data.booth_fulfillment import BoothFulfillment
+from data.event_log import EventLog
+from data.inventory_engine import InventoryEngine
+from data.local_sheets import LocalSheetsPool, LocalWorksheet
+from data.order_aggregates import OrderAggregates, stamp_version
+from data.order_time_index import OrderTimeIndex
+from data.submission_ledger import SubmissionLedger, order_fingerprint
+
+
+SHOW = "Spring"
+HEADER = ["Booth #", "Section", "Exhibitor Name", "Item", "Color", "Quantity", "Date", "Hour", "Status", "Type",
+          "Boomers Quantity", "Comments", "User"]
+ORDER = {"Booth #": "101", "Section": "Hall A", "Exhibitor Name": "Acme", "Item": "Chair", "Color": "Black",
+         "Quantity": 2, "Status": "In Process", "Type": "New Order", "Boomers Quantity": 1, "Comments": "",
+         "User": "AB"}
+
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    pool = LocalSheetsPool({"sheet": {"Orders": [HEADER], "Hall A": [HEADER]}})
+    orders_df = stamp_version(pd.DataFrame(columns=HEADER))
+    inventory_df = stamp_version(pd.DataFrame({"Items": ["Chair"], "Starting Quantity": [5], "Damaged Items": [0]}))
+    engine = InventoryEngine().sync(orders_df, inventory_df)
+    ledger = SubmissionLedger()
+
+    monkeypatch.setattr(direct_sheets_operations, "get_client_pool", lambda: pool)
+    monkeypatch.setattr(order_service, "get_show", lambda show: {"order_tracking_sheet_id": "sheet"})
+    monkeypatch.setattr(order_service, "load_order_data", lambda show: (orders_df, ["Hall A"], inventory_df, []))
+    monkeypatch.setattr(order_service, "get_submission_ledger", lambda: ledger)
+    monkeypatch.setattr(order_service, "get_inventory_engine", lambda show: engine)
+    for name, store in [("get_order_aggregates", OrderAggregates()), ("get_booth_fulfillment", BoothFulfillment()),
+                        ("get_order_time_index", OrderTimeIndex())]:
+        monkeypatch.setattr(order_service, name, lambda show, store=store: store)
+    log = EventLog(str(tmp_path))
+    monkeypatch.setattr(order_service, "get_event_log", lambda: log)
+    monkeypatch.setattr(order_service, "invalidate_show_data", lambda show: None)
+    return pool.client(), engine, ledger
+
+
+def orders(client):
+    return client.open_by_key("sheet").worksheet("Orders")._rows[1:]
+
+
+def test_rerun_after_append_keeps_the_order(stores, monkeypatch):
+    client, engine, ledger = stores
+
+    def rerun(*args, **kwargs):
+        raise RerunException(RerunData())
+
+    # Un second clic arrive juste après l'écriture : toute suite (message, feuille de section) est interrompue
+    monkeypatch.setattr(st, "success", rerun)
+    append_row = LocalWorksheet.append_row
+    monkeypatch.setattr(LocalWorksheet, "append_row",
+                        lambda self, values, **kwargs: rerun() if self.title == "Hall A" else append_row(self, values))
+
+    with pytest.raises(RerunException):
+        order_service.create_order(SHOW, dict(ORDER), idempotency_key="key")
+
+    assert len(orders(client)) == 1
+    assert engine.available("Chair") == 3
+    assert engine._reservations == {}
+    # La relance du script avec la même clé ne réécrit pas la commande
+    assert order_service.create_order(SHOW, dict(ORDER), idempotency_key="key") == ("applied", None)
+    assert ledger.claim("key", order_fingerprint(SHOW, ORDER)) == "applied"
+    assert len(orders(client)) == 1
+
+
+def test_failed_write_frees_the_claim_and_the_stock(stores, monkeypatch):
+    client, engine, ledger = stores
+    monkeypatch.setattr(order_service, "get_show", lambda show: {"order_tracking_sheet_id": "missing"})
+
+    assert order_service.create_order(SHOW, dict(ORDER), idempotency_key="key") == ("failed", None)
+    assert engine.available("Chair") == 5
+    assert ledger.claim("key", order_fingerprint(SHOW, ORDER)) is None
+
+
+def test_created_once(stores):
+    client, engine, _ = stores
+
+    assert order_service.create_order(SHOW, dict(ORDER), idempotency_key="key") == ("created", 3)
+    assert order_service.create_order(SHOW, dict(ORDER), idempotency_key="key") == ("applied", None)
+    assert order_service.create_order(SHOW, dict(ORDER), idempotency_key="other") == ("duplicate", None)
+    assert [row[0] for row in orders(client)] == ["101"]
+    assert client.open_by_key("sheet").worksheet("Hall A")._rows[1][3] == "Chair"
+    assert engine.available("Chair") == 3
+
+
+def test_reservations_are_keyed_by_submission():
+    inventory = stamp_version(pd.DataFrame({"Items": ["Chair"], "Starting Quantity": [5], "Damaged Items": [0]}))
+    engine = InventoryEngine().sync(stamp_version(pd.DataFrame(columns=HEADER)), inventory)
+
+    assert engine.reserve(dict(ORDER), "first") == (True, 3)
+    assert engine.reserve(dict(ORDER), "second") == (True, 1)
+    assert engine.reserve(dict(ORDER), "third") == (False, 1)
+    # Une clé inconnue (commande jamais réservée) ne touche à aucune réservation en cours
+    engine.release("unknown")
+    engine.confirm("first")
+    engine.release("second")
+    assert engine.available("Chair") == 3
+
+    # Au rechargement de la feuille, seules les réservations encore en cours sont réappliquées
+    engine.reserve(dict(ORDER), "third")
+    written = stamp_version(pd.DataFrame([dict(ORDER, Date="", Hour="")], columns=HEADER))
+    engine.sync(written, inventory)
+    assert engine.available("Chair") == 1
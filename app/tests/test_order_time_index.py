@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from data.order_aggregates import stamp_version
+from data.order_time_index import OrderTimeIndex
+
+
+def order(booth, at):
+    return {"Booth #": booth, "Item": "Chair", "Date": at.strftime("%m/%d/%Y"), "Hour": at.strftime("%I:%M:%S %p")}
+
+
+def test_sheet_rows_and_appended_orders_share_one_time_scale():
+    now = datetime.now().replace(microsecond=0)
+    orders = stamp_version(pd.DataFrame([
+        order("101", now - timedelta(days=1)),
+        order("102", now - timedelta(minutes=30)),
+        order("103", now - timedelta(minutes=5)),
+        order("104", now),
+        {"Booth #": "105", "Item": "Chair", "Date": "", "Hour": ""},
+    ]))
+    index = OrderTimeIndex().sync(orders)
+    index.append({"Booth #": "106", "Item": "Lamp"}, timestamp=now)
+    index.append({"Booth #": "107", "Item": "Lamp"}, timestamp=now - timedelta(minutes=10))
+
+    assert index.count_since(15, now=now) == 4
+    assert index.since(15, now=now)["Booth #"].tolist() == ["106", "104", "103", "107"]
+    assert index.count_since(60 * 24 * 2, now=now) == 6
+    assert index.latest(3)["Booth #"].tolist() == ["106", "104", "103"]
+    assert index.latest(7)["Booth #"].tolist()[-1] == "105"
+
+    window = index.hour_window(now - timedelta(days=1), (now - timedelta(days=1)).hour)
+    assert window["Booth #"].tolist() == ["101"]
+    assert index.between(now - timedelta(hours=1), now - timedelta(minutes=20))["Booth #"].tolist() == ["102"]
+
+
+def test_default_now_counts_an_order_placed_now():
+    index = OrderTimeIndex().sync(stamp_version(pd.DataFrame([order("101", datetime.now())])))
+    index.append({"Booth #": "102", "Item": "Lamp"})
+
+    assert index.count_since(15) == 2
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.order_aggregates import stamp_version
+from data.order_view import OrderFilterIndex, OrderView
+
+
+def make_orders():
+    orders = pd.DataFrame({
+        "Booth #": ["101", "102", "1010", "203", "204", 305],
+        "Section": ["Hall A", "Hall A", "Hall B", None, "Hall B", "Hall A"],
+        "Exhibitor Name": ["Acme", "Globex", None, "ACME West", "Initech", "Umbrella"],
+        "Item": ["Chair", "Table", "Lamp", "Chair", "Sofa", "Desk"],
+        "Status": ["In Process", "Delivered", "In Process", "In Route", "In Process", "Delivered"],
+    }, index=[10, 11, 12, 13, 14, 15])
+    return stamp_version(orders)
+
+
+def copy_filter(orders_df, section=None, status=None, query=None):
+    """Filtre de la page Orders avant OrderFilterIndex (copies successives du DataFrame)."""
+    filtered_df = orders_df.copy()
+    if section is not None:
+        filtered_df = filtered_df[filtered_df["Section"] == section]
+    if status is not None:
+        filtered_df = filtered_df[filtered_df["Status"] == status]
+    if query:
+        filtered_df = filtered_df[
+            filtered_df["Booth #"].astype(str).str.contains(query, case=False, na=False) |
+            filtered_df["Exhibitor Name"].str.contains(query, case=False, na=False)
+        ]
+    return filtered_df
+
+
+@pytest.mark.parametrize("section", [None, "Hall A", "Hall B", "Hall C"])
+@pytest.mark.parametrize("status", [None, "In Process", "Delivered"])
+@pytest.mark.parametrize("query", [None, "", "10", "acme", "ACME", "west", "305", "zzz"])
+def test_positions_match_copy_filter(section, status, query):
+    orders = make_orders()
+
+    view = OrderView(orders, OrderFilterIndex().positions(orders, section, status, query))
+
+    pd.testing.assert_frame_equal(view.frame(), copy_filter(orders, section, status, query))
+
+
+def test_index_is_shared_across_queries_and_rebuilt_for_new_data():
+    index = OrderFilterIndex()
+    orders = make_orders()
+    columns = index._columns_for(orders)
+    assert index._columns_for(orders) is columns
+
+    updated = orders.copy()
+    updated.loc[10, "Status"] = "Delivered"
+    stamp_version(updated)
+    assert np.array_equal(index.positions(updated, status="Delivered"), [0, 1, 5])
+
+    # Instantané plus ancien que l'index : filtré correctement sans remplacer l'index
+    orders.attrs["loaded_at"] = updated.attrs["loaded_at"] - 1
+    assert np.array_equal(index.positions(orders, status="Delivered"), [1, 5])
+    assert index._data_version == updated.attrs["data_version"]
+
+
+def test_view_frame_columns():
+    orders = make_orders()
+    view = OrderView(orders, OrderFilterIndex().positions(orders, section="Hall B"))
+
+    assert len(view) == 2 and not view.empty
+    assert view.frame(["Item", "Status"]).equals(orders.iloc[[2, 4]][["Item", "Status"]])
+    assert view.row(1)["Booth #"] == "204"
+    with pytest.raises(KeyError):
+        view.frame(["Item", "Missing"])